@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Benchmark the in-process vector store backend.
+
+Stores random vectors in a LocalVectorStore namespace and reports insert
+throughput, query latency percentiles and vector memory. Approximate and
+quantized indexes also report recall@k against exact search, as does a
+reduced-dimension store whose vectors went through a PCA or truncation
+projection.
+
+Usage:
+    python scripts/benchmark-vector-store.py --vectors 5000 --queries 500
+    python scripts/benchmark-vector-store.py --index hnsw --m 16 --ef-search 64
+    python scripts/benchmark-vector-store.py --quantization int8 --rescore 4
+    python scripts/benchmark-vector-store.py --reduce-to 128 --intrinsic-dimension 64
+    python scripts/benchmark-vector-store.py --reduce-to 256 --projection truncate
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.knowledge.local_vector_store import LocalVectorStore
+from src.knowledge.projection import Projection
+
+CHAPTER_ID = "benchmark"
+LAYER = "semantic"
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=5000, help="Number of stored vectors")
+    parser.add_argument("--dimension", type=int, default=768, help="Vector dimension")
+    parser.add_argument("--queries", type=int, default=500, help="Number of timed queries")
+    parser.add_argument("--top-k", type=int, default=5, help="Results per query")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--index", choices=["flat", "hnsw"], default="flat", help="Namespace index type")
+    parser.add_argument("--m", type=int, default=16, help="HNSW links per node")
+    parser.add_argument("--ef-construction", type=int, default=200, help="HNSW build candidate list size")
+    parser.add_argument("--ef-search", type=int, default=64, help="HNSW query candidate list size")
+    parser.add_argument("--quantization", choices=["int8", "float16"], help="Quantized flat index code type")
+    parser.add_argument("--rescore", type=int, default=0, help="Quantized candidate oversampling for exact rescoring")
+    parser.add_argument("--reduce-to", type=int, help="Also benchmark vectors projected to this dimension")
+    parser.add_argument("--projection", choices=["pca", "truncate"], default="pca", help="Dimensionality reduction")
+    parser.add_argument(
+        "--intrinsic-dimension", type=int, default=0,
+        help="Draw vectors from a subspace of this rank plus noise, like real embeddings (0: isotropic)",
+    )
+    return parser.parse_args()
+
+
+def make_store(args) -> LocalVectorStore:
+    """Create the vector store under test."""
+    index_options = {}
+    if args.index == "hnsw":
+        index_options = {
+            "M": args.m,
+            "ef_construction": args.ef_construction,
+            "ef_search": args.ef_search,
+            "seed": args.seed,
+        }
+    store = LocalVectorStore(
+        index_type=args.index,
+        index_options=index_options,
+        quantization=args.quantization,
+        rescore=args.rescore,
+    )
+    store.initialize()
+    return store
+
+
+async def recall(
+    store: LocalVectorStore,
+    exact: LocalVectorStore,
+    queries: np.ndarray,
+    top_k: int,
+    store_queries: np.ndarray = None,
+) -> float:
+    """Fraction of the exact top-k results that the store under test returns."""
+    if store_queries is None:
+        store_queries = queries
+    hits = 0
+    for query, store_query in zip(queries, store_queries):
+        expected = {r["id"] for r in await exact.query(CHAPTER_ID, LAYER, query, top_k=top_k)}
+        found = {r["id"] for r in await store.query(CHAPTER_ID, LAYER, store_query, top_k=top_k)}
+        hits += len(expected & found)
+    return hits / (top_k * len(queries))
+
+
+def sample_vectors(rng: np.random.Generator, count: int, dimension: int, basis: np.ndarray = None) -> np.ndarray:
+    """Draw isotropic vectors, or vectors near the subspace spanned by ``basis``."""
+    if basis is None:
+        return rng.standard_normal((count, dimension)).astype(np.float32)
+    # Decaying weights give the subspace a spectrum like real embeddings
+    latent = rng.standard_normal((count, len(basis))) / np.sqrt(np.arange(1, len(basis) + 1))
+    noise = 0.05 * rng.standard_normal((count, dimension))
+    return (latent @ basis + noise).astype(np.float32)
+
+
+async def benchmark_projection(args, vectors: np.ndarray, queries: np.ndarray, exact: LocalVectorStore):
+    """Report memory, latency and recall of a store holding projected vectors."""
+    start = time.perf_counter()
+    if args.projection == "pca":
+        projection = Projection.fit_pca(vectors, args.reduce_to, source_model="benchmark")
+    else:
+        projection = Projection.truncate(args.dimension, args.reduce_to, source_model="benchmark")
+    reduced_vectors = projection.apply(vectors)
+    reduced_queries = projection.apply(queries)
+    elapsed = time.perf_counter() - start
+    
+    variance = f", {projection.explained_variance:.2%} variance kept" if projection.explained_variance is not None else ""
+    print(f"📉 {args.projection} {args.dimension} → {args.reduce_to} dims in {elapsed:.2f}s{variance}")
+    
+    reduced = make_store(args)
+    await load(reduced, reduced_vectors)
+    print(f"💾 Reduced vector memory: {memory_mb(reduced):.1f}MB")
+    report("reduced query", await time_queries(reduced, reduced_queries, args.top_k))
+    print(f"🎯 reduced recall@{args.top_k}: {await recall(reduced, exact, queries, args.top_k, reduced_queries):.3f}")
+
+
+async def load(store: LocalVectorStore, vectors: np.ndarray) -> float:
+    """Store all vectors and return the elapsed time in seconds."""
+    items = (
+        {
+            "chapter_id": CHAPTER_ID,
+            "layer": LAYER,
+            "item_id": f"item-{i}",
+            "embedding": vector,
+            "metadata": {"type": "template" if i % 2 else "workflow"},
+        }
+        for i, vector in enumerate(vectors)
+    )
+    
+    start = time.perf_counter()
+    result = await store.store_items(items, batch_size=500)
+    elapsed = time.perf_counter() - start
+    
+    if result.failed:
+        print(f"❌ {len(result.failed)} items failed to store")
+    return elapsed
+
+
+async def time_queries(store: LocalVectorStore, queries: np.ndarray, top_k: int, filter=None) -> np.ndarray:
+    """Run every query and return per-query latencies in milliseconds."""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        await store.query(CHAPTER_ID, LAYER, query, filter=filter, top_k=top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def memory_mb(store: LocalVectorStore) -> float:
+    """Vector memory of the benchmark namespace in megabytes."""
+    index = store._get_index(store.get_namespace(CHAPTER_ID, LAYER))
+    return index.memory_bytes() / 2**20 if hasattr(index, "memory_bytes") else float("nan")
+
+
+def report(label: str, latencies: np.ndarray):
+    """Print latency percentiles."""
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"⏱️  {label}: p50={p50:.3f}ms p95={p95:.3f}ms p99={p99:.3f}ms")
+
+
+async def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    basis = None
+    if args.intrinsic_dimension:
+        basis = rng.standard_normal((args.intrinsic_dimension, args.dimension))
+    vectors = sample_vectors(rng, args.vectors, args.dimension, basis)
+    queries = sample_vectors(rng, args.queries, args.dimension, basis)
+    
+    print(f"📦 {args.vectors} vectors x {args.dimension} dims, {args.queries} queries, top_k={args.top_k}")
+    
+    store = make_store(args)
+    elapsed = await load(store, vectors)
+    print(f"📥 Stored {args.vectors} vectors in {elapsed:.2f}s ({args.vectors / elapsed:,.0f} items/sec)")
+    
+    print(f"💾 Vector memory: {memory_mb(store):.1f}MB")
+    
+    report("query", await time_queries(store, queries, args.top_k))
+    report("filtered query", await time_queries(store, queries, args.top_k, filter={"type": "template"}))
+    
+    if args.index != "flat" or args.quantization or args.reduce_to:
+        exact = LocalVectorStore()
+        exact.initialize()
+        await load(exact, vectors)
+        if args.index != "flat" or args.quantization:
+            print(f"🎯 recall@{args.top_k}: {await recall(store, exact, queries, args.top_k):.3f}")
+        if args.reduce_to:
+            await benchmark_projection(args, vectors, queries, exact)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Precompute embeddings of the canonical agent queries.
+
+Embeds every query in the registry with the configured embedding service
+and writes them to an artifact. Point QUERY_EMBEDDINGS_PATH at it so
+agents start with the embeddings instead of computing them on first use.
+
+Usage:
+    python scripts/build-query-embeddings.py data/query-embeddings.npz
+    python scripts/build-query-embeddings.py data/query-embeddings.npz --local
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.knowledge.embedding_service import EmbeddingService
+from src.knowledge.hashing_embedder import HashingEmbedder
+from src.knowledge.query_registry import QueryRegistry
+
+# Load environment variables
+load_dotenv()
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="Artifact (.npz) to write")
+    parser.add_argument("--local", action="store_true", help="Use the offline hashing embeddings")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    if args.local:
+        embedding_service = EmbeddingService(backend=HashingEmbedder())
+    else:
+        embedding_service = EmbeddingService(project_id=os.getenv("GOOGLE_CLOUD_PROJECT"))
+    
+    registry = QueryRegistry(embedding_service, path=args.output)
+    computed = await registry.warm_up()
+    registry.save(args.output)
+    
+    print(f"🧭 {len(registry.names)} queries for {embedding_service.model_id} ({computed} computed)")
+    print(f"💾 Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
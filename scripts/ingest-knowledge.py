@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Ingest documents into a knowledge layer.
+
+Streams Markdown, JSON and CSV files through the chunking and bulk
+ingestion pipeline and reports throughput. By default chunks go to the
+Pinecone index configured in the environment and are embedded with the
+configured embedding service; --local uses the in-process vector store and
+the offline hashing embedder instead, needing no credentials.
+
+Usage:
+    python scripts/ingest-knowledge.py docs/ --chapter gdg-providence --layer semantic
+    python scripts/ingest-knowledge.py recaps.jsonl --checkpoint .ingest-checkpoint.json
+    python scripts/ingest-knowledge.py docs/ --local --max-tokens 128 --overlap 16
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.knowledge.embedding_service import EmbeddingService
+from src.knowledge.hashing_embedder import HashingEmbedder
+from src.knowledge.ingestion import IngestionPipeline
+
+# Load environment variables
+load_dotenv()
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="Files or directories to ingest")
+    parser.add_argument("--chapter", default=os.getenv("CHAPTER_ID", "gdg-providence"), help="GDG chapter ID")
+    parser.add_argument("--layer", choices=["semantic", "kinetic", "dynamic"], default="semantic", help="Target layer")
+    parser.add_argument("--max-tokens", type=int, default=256, help="Most tokens per chunk")
+    parser.add_argument("--overlap", type=int, default=32, help="Tokens shared by consecutive chunks")
+    parser.add_argument("--embed-batch-size", type=int, default=64, help="Chunks per embedding call")
+    parser.add_argument("--upsert-batch-size", type=int, default=100, help="Vectors per upsert request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Upsert requests in flight")
+    parser.add_argument("--checkpoint", help="Checkpoint file for resuming interrupted runs")
+    parser.add_argument("--local", action="store_true", help="Use the in-process store and offline embeddings")
+    return parser.parse_args()
+
+
+def make_services(args):
+    """Create the vector store and embedding service."""
+    if args.local:
+        from src.knowledge.local_vector_store import LocalVectorStore
+        return LocalVectorStore(), EmbeddingService(backend=HashingEmbedder(), output_format="numpy")
+    
+    from src.knowledge.vector_store import VectorStore
+    vector_store = VectorStore(
+        api_key=os.getenv("PINECONE_API_KEY"),
+        index_name=os.getenv("PINECONE_INDEX_NAME", "gdg-memory-index"),
+    )
+    embedding_service = EmbeddingService(project_id=os.getenv("GOOGLE_CLOUD_PROJECT"), output_format="numpy")
+    return vector_store, embedding_service
+
+
+async def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    
+    vector_store, embedding_service = make_services(args)
+    pipeline = IngestionPipeline(
+        vector_store=vector_store,
+        embedding_service=embedding_service,
+        chapter_id=args.chapter,
+        layer=args.layer,
+        max_tokens=args.max_tokens,
+        overlap=args.overlap,
+        embed_batch_size=args.embed_batch_size,
+        upsert_batch_size=args.upsert_batch_size,
+        max_concurrency=args.concurrency,
+        checkpoint_path=args.checkpoint,
+    )
+    
+    print(f"📚 Ingesting into {vector_store.get_namespace(args.chapter, args.layer)}")
+    result = await pipeline.run(args.paths)
+    
+    print(f"📄 {result.files} files ({result.skipped_files} already ingested), {result.documents} documents")
+    print(f"📥 Stored {result.chunks} chunks in {result.elapsed:.2f}s ({result.items_per_second:,.0f} items/sec)")
+    if result.failed:
+        print(f"❌ {len(result.failed)} failures")
+        for failure in result.failed[:10]:
+            print(f"   {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -122,9 +122,9 @@ def test_vector_store():
     try:
         from src.knowledge.vector_store import VectorStore
         
-        # Initialize vector store
+        # Connect to the index (connections are otherwise made lazily)
         vs = VectorStore()
-        vs.initialize()
+        vs.connect()
         
         print("✅ VectorStore initialized successfully!")
         return True
@@ -7,6 +7,7 @@ from google.adk.tools import Tool
 # Import the knowledge management system
 from ..knowledge.vector_store import VectorStore
 from ..knowledge.embedding_service import EmbeddingService
+from ..knowledge.query_registry import QueryRegistry
 
 # Import the social media service
 from ..integrations.social_media_service import SocialMediaService
@@ -28,6 +29,7 @@ class ContentAgent:
         vector_store: Optional[VectorStore] = None,
         embedding_service: Optional[EmbeddingService] = None,
         social_media_service: Optional[SocialMediaService] = None,
+        query_registry: Optional[QueryRegistry] = None,
     ):
         """
         Initialize the content agent.
@@ -38,12 +40,16 @@ class ContentAgent:
             vector_store: Vector database for knowledge retrieval
             embedding_service: Service for generating text embeddings
             social_media_service: Service for posting to social media platforms
+            query_registry: Precomputed embeddings of the agent's fixed
+                queries; defaults to a registry over the embedding service
         """
         self.chapter_id = chapter_id
         self.model_name = model_name
         self.vector_store = vector_store or VectorStore()
         self.embedding_service = embedding_service or EmbeddingService()
         self.social_media_service = social_media_service or SocialMediaService()
+        self.queries = query_registry or QueryRegistry(self.embedding_service)
+        self.queries.warm_up_in_background()
         self._initialize_agent()
         
     def _initialize_agent(self):
@@ -95,6 +101,10 @@ class ContentAgent:
             tools=tools,
         )
     
+    def _embedding_service_for(self, layer: str):
+        """Get the embedding service whose model serves a layer of the chapter."""
+        return self.vector_store.router.embedding_service_for(self.chapter_id, layer, self.embedding_service)
+    
     async def _get_content_templates(self, template_type: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get content templates for the chapter from the knowledge store.
@@ -111,17 +121,27 @@ class ContentAgent:
             
         # Create a query to find templates
         query_text = f"content template {template_type if template_type else ''}"
-        query_embedding = await self.embedding_service.generate_embeddings(query_text)
+        query_name = "content_templates"
         
-        # Search the semantic layer for templates
+        # Search the semantic layer for templates; a current lexical index
+        # (local stores, or a built one) answers keyword matches without
+        # embedding, known template types have a precomputed embedding and
+        # other types go through the embedding cache
         filter_dict = {"type": "template"}
         if template_type:
             filter_dict["template_type"] = template_type
+            query_name = f"content_templates:{template_type}"
+        embedding_service = self._embedding_service_for("semantic")
+        if query_name in self.queries.names:
+            embed = self.queries.embedder(query_name, embedding_service)
+        else:
+            embed = embedding_service.generate_embeddings
             
-        results = await self.vector_store.query(
+        results = await self.vector_store.hybrid_query(
             chapter_id=self.chapter_id,
             layer="semantic",
-            query_embedding=query_embedding,
+            query_text=query_text,
+            embed=embed,
             filter=filter_dict,
             top_k=5
         )
@@ -162,15 +182,13 @@ class ContentAgent:
         if not self.vector_store._initialized:
             self.vector_store.initialize()
             
-        # Create a query to find brand voice guidelines
-        query_text = "brand voice guidelines tone style"
-        query_embedding = await self.embedding_service.generate_embeddings(query_text)
-        
-        # Search the semantic layer for brand guidelines
-        results = await self.vector_store.query(
+        # Search the semantic layer for brand guidelines with the
+        # precomputed query embedding
+        results = await self.vector_store.hybrid_query(
             chapter_id=self.chapter_id,
             layer="semantic",
-            query_embedding=query_embedding,
+            query_text=self.queries.text("brand_voice"),
+            embed=self.queries.embedder("brand_voice", self._embedding_service_for("semantic")),
             filter={"type": "brand_voice"},
             top_k=1
         )
@@ -203,7 +221,7 @@ class ContentAgent:
         """
         # Create a query to find similar content
         query_text = f"{platform} {' '.join(keywords)}"
-        query_embedding = await self.embedding_service.generate_embeddings(query_text)
+        query_embedding = await self._embedding_service_for("dynamic").generate_embeddings(query_text)
         
         # Search the dynamic layer for successful content
         results = await self.vector_store.query(
@@ -296,19 +314,29 @@ class ContentAgent:
         
         return post_content
     
-    async def _save_generated_content(self, content: Dict[str, Any], performance_data: Optional[Dict[str, Any]] = None) -> str:
+    async def _save_generated_content(
+        self,
+        content: Dict[str, Any],
+        performance_data: Optional[Dict[str, Any]] = None,
+        embedding: Optional[List[float]] = None,
+    ) -> str:
         """
         Save generated content to the knowledge store.
         
         Args:
             content: The generated content
             performance_data: Optional performance metrics if available
+            embedding: Optional precomputed embedding of the content
             
         Returns:
             ID of the saved content
         """
-        # Generate an embedding for the content
-        embedding = await self.embedding_service.generate_content_embeddings(content)
+        # Determine which layer to store in
+        layer = "dynamic" if performance_data else "kinetic"
+        
+        # Generate an embedding for the content unless it is already known
+        if embedding is None:
+            embedding = await self._embedding_service_for(layer).generate_content_embeddings(content)
         
         # Prepare metadata
         metadata = {
@@ -320,9 +348,6 @@ class ContentAgent:
         # Add performance data if available
         if performance_data:
             metadata["performance"] = performance_data
-            
-        # Determine which layer to store in
-        layer = "dynamic" if performance_data else "kinetic"
         
         # Generate a unique ID
         import uuid
@@ -494,24 +519,26 @@ class ContentAgent:
         performance_score = (engagement_rate + click_rate) / 2
         
         # Save the content with performance data to the dynamic layer
-        # Fetch the original content first
-        query_embedding = await self.embedding_service.generate_embeddings(f"content id:{content_id}")
-        results = await self.vector_store.query(
+        # Fetch the original content by ID first
+        items = await self.vector_store.fetch(
             chapter_id=self.chapter_id,
             layer="kinetic",
-            query_embedding=query_embedding,
-            filter={"type": "social_post", "id": content_id},
-            top_k=1
+            ids=[content_id],
         )
         
-        if results:
-            content = results[0]["metadata"]["content"]
+        item = items.get(content_id)
+        if item and item["metadata"].get("type") == "social_post":
+            content = item["metadata"]["content"]
             # Add performance data
             content["performance"] = performance_metrics
             content["performance_score"] = performance_score
             
-            # Save to the dynamic layer
-            await self._save_generated_content(content, performance_metrics)
+            # Save to the dynamic layer, reusing the stored embedding while
+            # both layers are served by the same embedding model
+            same_model = self._embedding_service_for("kinetic") is self._embedding_service_for("dynamic")
+            await self._save_generated_content(
+                content, performance_metrics, embedding=item["values"] if same_model else None
+            )
         
         # For metrics tracking purposes
         print(f"Recorded performance for content {content_id}: {performance_score}")
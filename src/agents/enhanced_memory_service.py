@@ -106,16 +106,57 @@ class EnhancedMemoryService:
         self.chapter_id = chapter_id
         self.namespace_prefix = namespace_prefix
         
-        # Initialize vector store
-        self.vector_store.initialize()
-        
-        # Memory namespaces
-        self.episodic_namespace = f"{namespace_prefix}_episodic_{chapter_id}"
-        self.semantic_namespace = f"{namespace_prefix}_semantic_{chapter_id}"
-        self.reflection_namespace = f"{namespace_prefix}_reflection_{chapter_id}"
+        # Memory layers and the vector store namespaces they map to
+        self.episodic_layer = f"{namespace_prefix}_episodic"
+        self.semantic_layer = f"{namespace_prefix}_semantic"
+        self.reflection_layer = f"{namespace_prefix}_reflection"
+        self.episodic_namespace = vector_store.get_namespace(chapter_id, self.episodic_layer)
+        self.semantic_namespace = vector_store.get_namespace(chapter_id, self.semantic_layer)
+        self.reflection_namespace = vector_store.get_namespace(chapter_id, self.reflection_layer)
         
         logger.info(f"Enhanced memory service initialized for chapter {chapter_id}")
     
+    def _metadata_text(self, text: str) -> str:
+        """
+        Prepare free text for memory metadata.
+        
+        With a document store, full text is kept out of line; otherwise it is
+        truncated to stay under vector metadata limits.
+        """
+        if getattr(self.vector_store, "document_store", None) is not None:
+            return text
+        return text[:500]
+    
+    def _embedding_service_for(self, layer: str):
+        """Get the embedding service whose model serves a memory layer."""
+        return self.vector_store.router.embedding_service_for(self.chapter_id, layer, self.embedding_service)
+    
+    @staticmethod
+    def memory_text(metadata: Dict[str, Any]) -> str:
+        """
+        Rebuild the text a stored memory was embedded from.
+        
+        Used as ``text_for`` when re-embedding memory layers after a model
+        change. Without a document store the stored text is truncated, so
+        re-embedded vectors cover the stored prefix only.
+        
+        Args:
+            metadata: Metadata of a stored memory
+            
+        Returns:
+            Text in the format used when the memory was stored
+        """
+        memory_type = metadata.get("type")
+        if memory_type == MemoryType.EPISODIC.value:
+            return f"User: {metadata.get('user_input', '')}\nAgent: {metadata.get('agent_response', '')}"
+        if memory_type == MemoryType.SEMANTIC.value:
+            return (
+                f"Domain: {metadata.get('domain', '')}\nConcept: {metadata.get('concept', '')}"
+                f"\nContent: {metadata.get('content', '')}"
+            )
+        insights = json.loads(metadata.get("insights") or "[]")
+        return f"Analysis: {metadata.get('analysis', '')}\nInsights: {'; '.join(insights)}"
+    
     async def store_episodic_memory(self, memory: EpisodicMemory) -> str:
         """
         Store an episodic memory with rich context.
@@ -129,7 +170,8 @@ class EnhancedMemoryService:
         try:
             # Generate embedding from user input and agent response
             text_content = f"User: {memory.user_input}\nAgent: {memory.agent_response}"
-            embedding = await self.embedding_service.embed_text(text_content)
+            embedding_service = self._embedding_service_for(self.episodic_layer)
+            embedding = await embedding_service.embed_text(text_content)
             
             # Prepare metadata
             metadata = {
@@ -137,21 +179,21 @@ class EnhancedMemoryService:
                 "session_id": memory.session_id,
                 "timestamp": memory.timestamp.isoformat(),
                 "agent_id": memory.agent_id,
-                "user_input": memory.user_input[:500],  # Truncate for metadata limits
-                "agent_response": memory.agent_response[:500],
+                "user_input": self._metadata_text(memory.user_input),
+                "agent_response": self._metadata_text(memory.agent_response),
                 "context": json.dumps(memory.context),
                 "chapter_id": self.chapter_id,
+                **embedding_service.model_metadata(embedding),
                 **memory.metadata
             }
             
             # Store in vector database
-            await self.vector_store.upsert_vectors(
-                vectors=[{
-                    "id": memory.memory_id,
-                    "values": embedding,
-                    "metadata": metadata
-                }],
-                namespace=self.episodic_namespace
+            await self.vector_store.store_item(
+                chapter_id=self.chapter_id,
+                layer=self.episodic_layer,
+                item_id=memory.memory_id,
+                embedding=embedding,
+                metadata=metadata
             )
             
             logger.info(f"Stored episodic memory {memory.memory_id}")
@@ -174,27 +216,28 @@ class EnhancedMemoryService:
         try:
             # Generate embedding from concept and content
             text_content = f"Domain: {memory.domain}\nConcept: {memory.concept}\nContent: {memory.content}"
-            embedding = await self.embedding_service.embed_text(text_content)
+            embedding_service = self._embedding_service_for(self.semantic_layer)
+            embedding = await embedding_service.embed_text(text_content)
             
             # Prepare metadata
             metadata = {
                 "type": MemoryType.SEMANTIC.value,
                 "domain": memory.domain,
                 "concept": memory.concept,
-                "content": memory.content[:500],  # Truncate for metadata limits
+                "content": self._metadata_text(memory.content),
                 "relationships": json.dumps(memory.relationships),
                 "chapter_id": self.chapter_id,
+                **embedding_service.model_metadata(embedding),
                 **memory.metadata
             }
             
             # Store in vector database
-            await self.vector_store.upsert_vectors(
-                vectors=[{
-                    "id": memory.memory_id,
-                    "values": embedding,
-                    "metadata": metadata
-                }],
-                namespace=self.semantic_namespace
+            await self.vector_store.store_item(
+                chapter_id=self.chapter_id,
+                layer=self.semantic_layer,
+                item_id=memory.memory_id,
+                embedding=embedding,
+                metadata=metadata
             )
             
             logger.info(f"Stored semantic memory {memory.memory_id}")
@@ -217,7 +260,8 @@ class EnhancedMemoryService:
         try:
             # Generate embedding from analysis and insights
             text_content = f"Analysis: {memory.analysis}\nInsights: {'; '.join(memory.insights)}"
-            embedding = await self.embedding_service.embed_text(text_content)
+            embedding_service = self._embedding_service_for(self.reflection_layer)
+            embedding = await embedding_service.embed_text(text_content)
             
             # Prepare metadata
             metadata = {
@@ -225,21 +269,21 @@ class EnhancedMemoryService:
                 "reflection_id": memory.reflection_id,
                 "session_id": memory.session_id,
                 "timestamp": memory.timestamp.isoformat(),
-                "analysis": memory.analysis[:500],  # Truncate for metadata limits
+                "analysis": self._metadata_text(memory.analysis),
                 "insights": json.dumps(memory.insights),
                 "recommendations": json.dumps(memory.recommendations),
                 "metrics": json.dumps(memory.metrics),
-                "chapter_id": self.chapter_id
+                "chapter_id": self.chapter_id,
+                **embedding_service.model_metadata(embedding)
             }
             
             # Store in vector database
-            await self.vector_store.upsert_vectors(
-                vectors=[{
-                    "id": memory.memory_id,
-                    "values": embedding,
-                    "metadata": metadata
-                }],
-                namespace=self.reflection_namespace
+            await self.vector_store.store_item(
+                chapter_id=self.chapter_id,
+                layer=self.reflection_layer,
+                item_id=memory.memory_id,
+                embedding=embedding,
+                metadata=metadata
             )
             
             logger.info(f"Stored reflection memory {memory.memory_id}")
@@ -254,7 +298,8 @@ class EnhancedMemoryService:
         query: str,
         memory_types: List[MemoryType],
         k: int = 5,
-        session_id: Optional[str] = None
+        session_id: Optional[str] = None,
+        query_embedding: Optional[List[float]] = None
     ) -> Dict[str, List[Dict]]:
         """
         Retrieve relevant memories across specified types.
@@ -264,24 +309,30 @@ class EnhancedMemoryService:
             memory_types: Types of memory to search
             k: Number of memories to retrieve per type
             session_id: Optional session filter
+            query_embedding: Precomputed embedding of the query by this
+                service's model, which skips embedding it for layers that
+                model serves
             
         Returns:
             Dictionary mapping memory types to lists of relevant memories
         """
         try:
-            # Generate embedding for query
-            query_embedding = await self.embedding_service.embed_text(query)
+            # Query embeddings by model; layers switched to another model
+            # by a migration are searched with that model's embedding
+            query_embeddings = {}
+            if query_embedding is not None:
+                query_embeddings[self.embedding_service.model_id] = query_embedding
             
             results = {}
             
             for memory_type in memory_types:
-                # Determine namespace
+                # Determine layer
                 if memory_type == MemoryType.EPISODIC:
-                    namespace = self.episodic_namespace
+                    layer = self.episodic_layer
                 elif memory_type == MemoryType.SEMANTIC:
-                    namespace = self.semantic_namespace
+                    layer = self.semantic_layer
                 elif memory_type == MemoryType.REFLECTION:
-                    namespace = self.reflection_namespace
+                    layer = self.reflection_layer
                 else:
                     continue
                 
@@ -290,18 +341,24 @@ class EnhancedMemoryService:
                 if session_id:
                     filter_dict["session_id"] = session_id
                 
+                # Embed the query with the model serving the layer
+                embedding_service = self._embedding_service_for(layer)
+                if embedding_service.model_id not in query_embeddings:
+                    query_embeddings[embedding_service.model_id] = await embedding_service.embed_text(query)
+                
                 # Search vector database
-                search_results = await self.vector_store.query_vectors(
-                    vector=query_embedding,
-                    top_k=k,
-                    namespace=namespace,
-                    filter_dict=filter_dict
+                search_results = await self.vector_store.query(
+                    chapter_id=self.chapter_id,
+                    layer=layer,
+                    query_embedding=query_embeddings[embedding_service.model_id],
+                    filter=filter_dict,
+                    top_k=k
                 )
                 
                 # Extract memories
                 memories = []
-                for match in search_results.get("matches", []):
-                    memory_data = match.get("metadata", {})
+                for match in search_results:
+                    memory_data = dict(match.get("metadata") or {})
                     memory_data["score"] = match.get("score", 0.0)
                     memories.append(memory_data)
                 
@@ -318,6 +375,10 @@ class EnhancedMemoryService:
         """
         Get all memories for a specific session.
         
+        Episodic memory IDs start with ``ep_{session_id}_``, so only the
+        session's IDs are listed and fetched, not the whole namespace.
+        Memories stored with a custom ``memory_id`` are not found.
+        
         Args:
             session_id: The session identifier
             
@@ -331,21 +392,16 @@ class EnhancedMemoryService:
                 "chapter_id": self.chapter_id
             }
             
-            # Query with a dummy vector (we just want filtered results)
-            dummy_query = await self.embedding_service.embed_text("session memories")
-            
-            search_results = await self.vector_store.query_vectors(
-                vector=dummy_query,
-                top_k=100,  # Get many results
-                namespace=self.episodic_namespace,
-                filter_dict=filter_dict
-            )
-            
-            # Extract and sort memories by timestamp
+            # List the session's IDs by prefix; the filter drops sessions
+            # whose ID merely starts with this one (e.g. "s1" and "s1_b")
             memories = []
-            for match in search_results.get("matches", []):
-                memory_data = match.get("metadata", {})
-                memories.append(memory_data)
+            async for item in self.vector_store.scan(
+                chapter_id=self.chapter_id,
+                layer=self.episodic_layer,
+                filter=filter_dict,
+                prefix=f"ep_{session_id}_"
+            ):
+                memories.append(item["metadata"])
             
             # Sort by timestamp
             memories.sort(key=lambda x: x.get("timestamp", ""))
@@ -361,6 +417,10 @@ class EnhancedMemoryService:
         """
         Clean up old memories beyond retention period.
         
+        Episodic and reflection memories older than the cutoff are deleted
+        in rate-limited batches; semantic memories carry no timestamp and
+        are kept.
+        
         Args:
             days_to_keep: Number of days to retain memories
             
@@ -371,13 +431,16 @@ class EnhancedMemoryService:
             cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_to_keep)
             cutoff_timestamp = cutoff_date.isoformat()
             
-            # This is a simplified implementation
-            # In production, you'd want to batch delete operations
-            
-            logger.info(f"Cleanup would remove memories older than {cutoff_timestamp}")
+            removed = 0
+            for layer in [self.episodic_layer, self.reflection_layer]:
+                removed += await self.vector_store.delete_where(
+                    chapter_id=self.chapter_id,
+                    layer=layer,
+                    filter={"timestamp": {"$lt": cutoff_timestamp}}
+                )
             
-            # For now, return 0 as actual cleanup requires more complex querying
-            return 0
+            logger.info(f"Removed {removed} memories older than {cutoff_timestamp}")
+            return removed
             
         except Exception as e:
             logger.error(f"Error cleaning up memories: {e}")
@@ -40,6 +40,9 @@ class KnowledgeAgent:
         self.model_name = model_name
         self.vector_store = vector_store or VectorStore()
         self.embedding_service = embedding_service or EmbeddingService()
+        self.vector_store.router.check_dimensions_in_background(
+            self.vector_store, self.chapter_id, ["semantic", "kinetic", "dynamic"], self.embedding_service
+        )
         self._initialize_agent()
         
     def _initialize_agent(self):
@@ -187,14 +190,16 @@ class KnowledgeAgent:
         layer = layer or "kinetic"
         content_type = content_type or "general"
         
-        # Generate an embedding for the content
-        embedding = await self.embedding_service.generate_content_embeddings(content)
+        # Generate an embedding for the content with the model serving the layer
+        embedding_service = self.vector_store.router.embedding_service_for(self.chapter_id, layer, self.embedding_service)
+        embedding = await embedding_service.generate_content_embeddings(content)
         
         # Prepare metadata
         metadata = {
             "type": content_type,
             "content": content,
             "created_at": "2025-05-14T12:00:00Z",  # Use actual datetime in production
+            **embedding_service.model_metadata(embedding),
         }
         
         # Generate a unique ID
@@ -235,8 +240,9 @@ class KnowledgeAgent:
         if not self.vector_store._initialized:
             self.vector_store.initialize()
             
-        # Generate embedding for the query
-        query_embedding = await self.embedding_service.generate_embeddings(query)
+        # Generate the query embedding once per model serving the layers
+        layers = [layer] if layer else ["semantic", "dynamic", "kinetic"]
+        query_embeddings = await self.vector_store.router.embed_query(self.chapter_id, layers, query, self.embedding_service)
         
         # Prepare filter
         filter_dict = {}
@@ -248,48 +254,20 @@ class KnowledgeAgent:
             results = await self.vector_store.query(
                 chapter_id=self.chapter_id,
                 layer=layer,
-                query_embedding=query_embedding,
+                query_embedding=query_embeddings[layer],
                 filter=filter_dict,
                 top_k=top_k
             )
             return results
             
-        # If no layer specified, search all layers in priority order
-        all_results = []
-        
-        # Semantic layer first (foundational knowledge)
-        semantic_results = await self.vector_store.query(
+        # If no layer specified, search all layers concurrently
+        return await self.vector_store.query_many(
             chapter_id=self.chapter_id,
-            layer="semantic",
-            query_embedding=query_embedding,
-            filter=filter_dict,
-            top_k=top_k
+            layers=layers,
+            query_embedding=query_embeddings,
+            top_k=top_k,
+            filter=filter_dict
         )
-        all_results.extend(semantic_results)
-        
-        # Dynamic layer next (learned patterns)
-        dynamic_results = await self.vector_store.query(
-            chapter_id=self.chapter_id,
-            layer="dynamic",
-            query_embedding=query_embedding,
-            filter=filter_dict,
-            top_k=top_k
-        )
-        all_results.extend(dynamic_results)
-        
-        # Kinetic layer last (process knowledge)
-        kinetic_results = await self.vector_store.query(
-            chapter_id=self.chapter_id,
-            layer="kinetic",
-            query_embedding=query_embedding,
-            filter=filter_dict,
-            top_k=top_k
-        )
-        all_results.extend(kinetic_results)
-        
-        # Sort by relevance score and return top_k
-        sorted_results = sorted(all_results, key=lambda x: x["score"], reverse=True)
-        return sorted_results[:top_k]
     
     async def _update_knowledge(
         self,
@@ -312,15 +290,30 @@ class KnowledgeAgent:
         if not self.vector_store._initialized:
             self.vector_store.initialize()
             
-        # Generate new embedding for the updated content
-        new_embedding = await self.embedding_service.generate_content_embeddings(updated_content)
+        # Fetch the existing item so its metadata is preserved
+        existing = (await self.vector_store.fetch(
+            chapter_id=self.chapter_id,
+            layer=layer,
+            ids=[item_id],
+        )).get(item_id)
+        
+        # Only re-embed when the content actually changed
+        embedding_service = self.vector_store.router.embedding_service_for(self.chapter_id, layer, self.embedding_service)
+        reembedded = not (existing and existing["metadata"].get("content") == updated_content)
+        if reembedded:
+            new_embedding = await embedding_service.generate_content_embeddings(updated_content)
+        else:
+            new_embedding = existing["values"]
         
         # Prepare updated metadata
-        metadata = {
-            "type": updated_content.get("type", "general"),
+        metadata = dict(existing["metadata"]) if existing else {}
+        if reembedded:
+            metadata.update(embedding_service.model_metadata(new_embedding))
+        metadata.update({
+            "type": updated_content.get("type", metadata.get("type", "general")),
             "content": updated_content,
             "updated_at": "2025-05-14T12:00:00Z",  # Use actual datetime in production
-        }
+        })
         
         # Store in the vector database (overwriting the existing item)
         await self.vector_store.store_item(
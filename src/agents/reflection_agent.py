@@ -18,6 +18,7 @@ from .enhanced_memory_service import (
     EpisodicMemory,
     MemoryType
 )
+from ..knowledge.query_registry import QueryRegistry
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -39,6 +40,7 @@ class ReflectionAgent:
         chapter_id: str,
         model_name: str = "gemini-2.0-flash-001",
         temperature: float = 0.1,  # Low temperature for analytical tasks
+        query_registry: Optional[QueryRegistry] = None,
     ):
         """
         Initialize the reflection agent.
@@ -48,11 +50,16 @@ class ReflectionAgent:
             chapter_id: GDG chapter identifier
             model_name: The Gemini model to use for analysis
             temperature: Model temperature (low for analytical consistency)
+            query_registry: Precomputed embeddings of the agent's fixed
+                queries; defaults to a registry over the memory service's
+                embedding service
         """
         self.memory_service = memory_service
         self.chapter_id = chapter_id
         self.model_name = model_name
         self.temperature = temperature
+        self.queries = query_registry or QueryRegistry(memory_service.embedding_service)
+        self.queries.warm_up_in_background()
         
         logger.info(f"Reflection agent initialized for chapter {chapter_id}")
     
@@ -355,11 +362,11 @@ Focus on actionable insights that can be implemented in future interactions."""
         """
         try:
             # Retrieve recent reflection memories
-            query = "reflection analysis insights recommendations"
             relevant_memories = await self.memory_service.retrieve_relevant_memories(
-                query=query,
+                query=self.queries.text("reflection_summary"),
                 memory_types=[MemoryType.REFLECTION],
-                k=20  # Get more reflections for trend analysis
+                k=20,  # Get more reflections for trend analysis
+                query_embedding=await self.queries.embedding("reflection_summary")
             )
             
             reflections = relevant_memories.get(MemoryType.REFLECTION.value, [])
@@ -0,0 +1,328 @@
+"""Streaming backup and restore of a chapter's knowledge layers.
+
+Backups are gzip-compressed NDJSON: a header line, then one line per item
+(layer, id, vector and metadata) in ``VectorStore.scan`` order, a summary
+line closing each layer and an end line. Items are written as they are
+scanned and restored as they are read, through bulk ``store_items``
+upserts, so memory stays bounded by a page of items whatever the chapter
+size. File I/O runs in worker threads, a chunk of lines at a time.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, AsyncIterable, AsyncIterator, Callable, Iterable, Tuple
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+BACKUP_FORMAT = "gdg-knowledge-ndjson"
+BACKUP_VERSION = 1
+
+# Lines buffered before a write, and bytes of lines per read
+_WRITE_CHUNK_LINES = 256
+_READ_CHUNK_BYTES = 1 << 20
+
+
+@dataclass
+class BackupResult:
+    """Outcome of a streaming backup or restore."""
+    chapter_id: str
+    path: str
+    counts: Dict[str, int] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    failed: List[Dict[str, Any]] = field(default_factory=list)
+    complete: bool = False
+    elapsed: float = 0.0
+    
+    @property
+    def total(self) -> int:
+        """Number of items backed up or restored."""
+        return sum(self.counts.values())
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize NumPy arrays and scalars found in vectors and metadata."""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+async def write_records(
+    path: str,
+    records: AsyncIterable[Dict[str, Any]],
+    compresslevel: int = 6,
+    commit: Optional[Callable[[], bool]] = None,
+) -> int:
+    """
+    Write records to a gzip-compressed NDJSON file.
+    
+    The file is written next to its destination and moved into place once
+    complete, so an interrupted write never replaces a previous backup.
+    
+    Args:
+        path: File to write
+        records: JSON-serializable records, consumed lazily
+        compresslevel: gzip compression level (1-9)
+        commit: Called once every record is written; if it returns False
+            the file is left at ``<path>.partial`` instead of replacing
+            ``path``
+    
+    Returns:
+        Number of records written
+    """
+    partial = f"{path}.partial"
+    handle = await asyncio.to_thread(gzip.open, partial, "wt", compresslevel=compresslevel, encoding="utf-8")
+    written, lines = 0, []
+    try:
+        async for record in records:
+            lines.append(json.dumps(record, default=_json_default) + "\n")
+            written += 1
+            if len(lines) >= _WRITE_CHUNK_LINES:
+                await asyncio.to_thread(handle.writelines, lines)
+                lines = []
+        if lines:
+            await asyncio.to_thread(handle.writelines, lines)
+    except BaseException:
+        await asyncio.to_thread(handle.close)
+        os.remove(partial)
+        raise
+    
+    await asyncio.to_thread(handle.close)
+    if commit is None or commit():
+        os.replace(partial, path)
+    return written
+
+
+def _read_lines(handle, size: int) -> Tuple[List[str], Optional[EOFError]]:
+    """Read lines totalling about ``size`` characters, keeping those read before a cut-off."""
+    lines, total = [], 0
+    try:
+        while total < size:
+            line = handle.readline()
+            if not line:
+                break
+            lines.append(line)
+            total += len(line)
+    except EOFError as e:
+        return lines, e
+    return lines, None
+
+
+async def read_records(path: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Read the records of a gzip-compressed NDJSON file.
+    
+    Args:
+        path: File to read
+    
+    Yields:
+        Records in file order; blank lines are skipped
+    
+    Raises:
+        EOFError: After the last complete record of a cut-off file
+    """
+    handle = await asyncio.to_thread(gzip.open, path, "rt", encoding="utf-8")
+    try:
+        while True:
+            lines, error = await asyncio.to_thread(_read_lines, handle, _READ_CHUNK_BYTES)
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+            if error:
+                raise error
+            if not lines:
+                return
+    finally:
+        await asyncio.to_thread(handle.close)
+
+
+async def export_records(
+    vector_store,
+    chapter_id: str,
+    layers: Iterable[str],
+    result: BackupResult,
+    page_size: int = 500,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream a chapter's layers as backup records.
+    
+    A layer whose scan fails is closed with its error and the backup moves
+    on to the next layer.
+    
+    Args:
+        vector_store: Store to read from
+        chapter_id: Chapter to back up
+        layers: Layers to back up
+        result: Result updated with per-layer counts and errors
+        page_size: Items listed and fetched per scan request
+    
+    Yields:
+        Header, item, layer summary and end records
+    """
+    layers = list(layers)
+    yield {
+        "type": "header",
+        "format": BACKUP_FORMAT,
+        "version": BACKUP_VERSION,
+        "chapter_id": chapter_id,
+        "backup_timestamp": datetime.now(timezone.utc).isoformat(),
+        "layers": layers,
+    }
+    
+    for layer in layers:
+        count, summary = 0, {"type": "layer", "layer": layer}
+        try:
+            async for item in vector_store.scan(chapter_id, layer, page_size=page_size):
+                yield {
+                    "type": "item",
+                    "layer": layer,
+                    "id": item["id"],
+                    "values": item["values"],
+                    "metadata": item.get("metadata") or {},
+                }
+                count += 1
+        except Exception as e:
+            logger.error(f"Failed to backup {layer} layer: {e}")
+            result.errors[layer] = summary["error"] = str(e)
+        result.counts[layer] = summary["count"] = count
+        yield summary
+    
+    yield {"type": "end", "counts": dict(result.counts)}
+
+
+async def backup_chapter(
+    vector_store,
+    chapter_id: str,
+    path: str,
+    layers: Iterable[str],
+    page_size: int = 500,
+    compresslevel: int = 6,
+) -> BackupResult:
+    """
+    Back up a chapter's layers to a gzip-compressed NDJSON file.
+    
+    A backup in which a layer failed does not replace a previous backup
+    at ``path``: it is kept at ``<path>.partial`` and ``path`` of the
+    result points there.
+    
+    Args:
+        vector_store: Store to read from
+        chapter_id: Chapter to back up
+        path: Backup file to write
+        layers: Layers to back up
+        page_size: Items listed and fetched per scan request
+        compresslevel: gzip compression level (1-9)
+    
+    Returns:
+        Per-layer item counts and errors; ``complete`` if every layer was
+        backed up in full
+    """
+    start = time.perf_counter()
+    result = BackupResult(chapter_id=chapter_id, path=path)
+    await write_records(
+        path,
+        export_records(vector_store, chapter_id, layers, result, page_size),
+        compresslevel,
+        commit=lambda: not result.errors,
+    )
+    result.complete = not result.errors
+    if not result.complete:
+        result.path = f"{path}.partial"
+        logger.warning(f"Backup of {chapter_id} is incomplete; kept it at {result.path} instead of replacing {path}")
+    result.elapsed = time.perf_counter() - start
+    logger.info(f"Backed up {result.total} knowledge items of {chapter_id} to {result.path} in {result.elapsed:.1f}s")
+    return result
+
+
+async def restore_chapter(
+    vector_store,
+    chapter_id: str,
+    path: str,
+    layers: Optional[Iterable[str]] = None,
+    batch_size: int = 100,
+    max_concurrency: int = 4,
+) -> BackupResult:
+    """
+    Restore a backup written by ``backup_chapter`` into a chapter.
+    
+    Items keep their stored vectors, so nothing is re-embedded. They are
+    upserted in batches while the file is still being read.
+    
+    Args:
+        vector_store: Store to write to
+        chapter_id: Chapter to restore into; a backup of another chapter
+            is restored with a warning
+        path: Backup file to read
+        layers: Layers to restore (defaults to every layer in the backup)
+        batch_size: Maximum number of vectors per upsert request
+        max_concurrency: Maximum number of upsert requests in flight
+    
+    Returns:
+        Per-layer restored counts, upsert failures and errors recorded in
+        the backup; ``complete`` if the backup file ended properly
+    
+    Raises:
+        ValueError: If the file is not a knowledge backup of a supported
+            version, is not gzip-compressed or ends before its header
+    """
+    start = time.perf_counter()
+    result = BackupResult(chapter_id=chapter_id, path=path)
+    records = read_records(path)
+    
+    try:
+        header = await records.__anext__()
+    except StopAsyncIteration:
+        header = None
+    except (EOFError, gzip.BadGzipFile) as e:
+        await records.aclose()
+        raise ValueError(f"{path} is not a readable knowledge backup: {e}") from e
+    if not header or header.get("type") != "header" or header.get("format") != BACKUP_FORMAT:
+        await records.aclose()
+        raise ValueError(f"{path} is not a knowledge backup")
+    if header.get("version") != BACKUP_VERSION:
+        await records.aclose()
+        raise ValueError(f"Unsupported knowledge backup version {header.get('version')} in {path}")
+    if header.get("chapter_id") != chapter_id:
+        logger.warning(f"Backup chapter ID mismatch: {header.get('chapter_id')} != {chapter_id}")
+    
+    layers = set(header.get("layers", []) if layers is None else layers)
+    result.counts = {layer: 0 for layer in header.get("layers", []) if layer in layers}
+    
+    async def items() -> AsyncIterator[Dict[str, Any]]:
+        try:
+            async for record in records:
+                kind = record.get("type")
+                if kind == "item" and record["layer"] in layers:
+                    result.counts[record["layer"]] = result.counts.get(record["layer"], 0) + 1
+                    yield {
+                        "chapter_id": chapter_id,
+                        "layer": record["layer"],
+                        "item_id": record["id"],
+                        "embedding": record["values"],
+                        "metadata": record.get("metadata") or {},
+                    }
+                elif kind == "layer" and record.get("error") and record["layer"] in layers:
+                    result.errors[record["layer"]] = record["error"]
+                elif kind == "end":
+                    result.complete = True
+        except (EOFError, ValueError, gzip.BadGzipFile) as e:
+            # A cut-off file ends mid-stream; keep what was read before it
+            logger.warning(f"Stopped reading knowledge backup {path}: {e}")
+    
+    written = await vector_store.store_items(items(), batch_size=batch_size, max_concurrency=max_concurrency)
+    for failure in written.failed:
+        logger.warning(f"Failed to restore {failure['layer']} item {failure['id']}: {failure['error']}")
+        if failure.get("layer") in result.counts:
+            result.counts[failure["layer"]] -= 1
+    result.failed = written.failed
+    
+    if not result.complete:
+        logger.warning(f"Knowledge backup {path} is truncated; restored the items it contains")
+    result.elapsed = time.perf_counter() - start
+    logger.info(f"Restored {result.total} knowledge items into {chapter_id} from {path} in {result.elapsed:.1f}s")
+    return result
@@ -0,0 +1,136 @@
+"""Out-of-line document storage for large knowledge payloads.
+
+Vector metadata is kept small and filterable; full item documents live in a
+side-car store keyed by namespace and item ID and are hydrated with one
+batched multi-get per query.
+"""
+
+import json
+import sqlite3
+import threading
+from typing import Dict, Any, Iterable
+
+# Longest string kept inline in vector metadata
+MAX_INLINE_STRING_LENGTH = 256
+
+# SQLite limits the number of bound parameters per statement
+_SQLITE_BATCH_SIZE = 500
+
+
+def compact_metadata(metadata: Dict[str, Any], max_string_length: int = MAX_INLINE_STRING_LENGTH) -> Dict[str, Any]:
+    """
+    Select the filterable subset of metadata to keep on the vector.
+    
+    Numbers, booleans, short strings and lists of short strings are kept;
+    nested objects and long text are left to the document store.
+    
+    Args:
+        metadata: Full item metadata
+        max_string_length: Longest string kept inline
+    
+    Returns:
+        Compact metadata
+    """
+    compact = {}
+    for key, value in metadata.items():
+        if isinstance(value, (bool, int, float)):
+            compact[key] = value
+        elif isinstance(value, str) and len(value) <= max_string_length:
+            compact[key] = value
+        elif isinstance(value, list) and all(
+            isinstance(entry, str) and len(entry) <= max_string_length for entry in value
+        ):
+            compact[key] = value
+    return compact
+
+
+class SQLiteDocumentStore:
+    """
+    Document store backed by a single SQLite table.
+    
+    Documents are JSON-encoded and keyed by ``(namespace, item_id)``. The
+    connection is shared across the vector store's worker threads behind a
+    lock.
+    """
+    
+    def __init__(self, path: str = ":memory:"):
+        """
+        Open (and create if needed) the document database.
+        
+        Args:
+            path: SQLite database file, or ":memory:" for a process-local store
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "namespace TEXT NOT NULL, item_id TEXT NOT NULL, document TEXT NOT NULL, "
+                "PRIMARY KEY (namespace, item_id))"
+            )
+    
+    def put_many(self, namespace: str, documents: Dict[str, Dict[str, Any]]):
+        """
+        Insert or replace documents.
+        
+        Args:
+            namespace: Vector store namespace
+            documents: Mapping of item ID to document
+        """
+        rows = [
+            (namespace, item_id, json.dumps(document, default=str))
+            for item_id, document in documents.items()
+        ]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO documents (namespace, item_id, document) VALUES (?, ?, ?)", rows
+            )
+    
+    def get_many(self, namespace: str, ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch documents by ID.
+        
+        Args:
+            namespace: Vector store namespace
+            ids: Item IDs
+        
+        Returns:
+            Mapping of item ID to document; missing IDs are omitted
+        """
+        ids = list(ids)
+        documents = {}
+        with self._lock:
+            for start in range(0, len(ids), _SQLITE_BATCH_SIZE):
+                batch = ids[start:start + _SQLITE_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                cursor = self._connection.execute(
+                    f"SELECT item_id, document FROM documents WHERE namespace = ? AND item_id IN ({placeholders})",
+                    [namespace, *batch],
+                )
+                documents.update((item_id, json.loads(document)) for item_id, document in cursor)
+        return documents
+    
+    def delete_many(self, namespace: str, ids: Iterable[str]):
+        """
+        Delete documents by ID.
+        
+        Args:
+            namespace: Vector store namespace
+            ids: Item IDs; unknown IDs are ignored
+        """
+        ids = list(ids)
+        with self._lock, self._connection:
+            for start in range(0, len(ids), _SQLITE_BATCH_SIZE):
+                batch = ids[start:start + _SQLITE_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                self._connection.execute(
+                    f"DELETE FROM documents WHERE namespace = ? AND item_id IN ({placeholders})",
+                    [namespace, *batch],
+                )
+    
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
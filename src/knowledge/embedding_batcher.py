@@ -0,0 +1,117 @@
+"""Request-coalescing micro-batcher for embedding calls.
+
+Agents embed single strings from many coroutines at nearly the same time
+(parallel platform generation, memory writes). The batcher holds those
+requests for a few milliseconds, sends them to the backend as one batched
+call, and resolves each caller's future with its own vector.
+"""
+
+import asyncio
+from typing import Dict, List, Any, Callable, Awaitable, Optional, Sequence, Set, Tuple
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embedding requests into batched backend calls.
+    
+    A batch is sent once ``max_batch_size`` texts are pending or
+    ``max_delay`` seconds after the first pending text arrived, whichever
+    comes first. Identical texts within a batch are embedded once.
+    """
+    
+    def __init__(
+        self,
+        embed: Callable[[List[str]], Awaitable[Sequence[Sequence[float]]]],
+        max_batch_size: int = 64,
+        max_delay: float = 0.005,
+    ):
+        """
+        Initialize the batcher.
+        
+        Args:
+            embed: Coroutine function embedding a list of texts in one call,
+                returning one vector (list or array row) per text
+            max_batch_size: Most texts sent to the backend per call
+            max_delay: Seconds a text may wait for others to join its batch
+        """
+        self._embed = embed
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_delay = max_delay
+        self.requests = 0
+        self.batches = 0
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sending: Set[asyncio.Task] = set()
+    
+    async def embed(self, texts: List[str]) -> List[Sequence[float]]:
+        """
+        Embed texts as part of the next batch(es).
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            One vector per text, in order, as returned by the backend;
+            callers that requested the same text may share a vector
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Pending work of a previous (closed) loop can never complete
+            self._loop, self._pending, self._timer = loop, [], None
+        
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._pending.append((text, future))
+            futures.append(future)
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+        
+        if self._pending and self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        
+        self.requests += len(texts)
+        return list(await asyncio.gather(*futures))
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get batching counters.
+        
+        Returns:
+            Texts requested, backend calls made and mean batch size
+        """
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+        }
+    
+    def _flush(self):
+        """Send every pending text as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+    
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Embed a batch and resolve the waiting futures."""
+        unique = list(dict.fromkeys(text for text, _ in batch))
+        self.batches += 1
+        try:
+            vectors = await self._embed(unique)
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        
+        by_text = dict(zip(unique, vectors))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
@@ -0,0 +1,242 @@
+"""Embedding cache for the knowledge management system.
+
+Embeddings are a pure function of the model and the text, so they are
+cached under a hash of the normalized text. A small in-memory LRU serves
+hot strings (constant agent queries, repeated memory lookups) and an
+optional SQLite file keeps vectors across restarts.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Iterable, Sequence, Tuple
+
+import numpy as np
+
+# Keys looked up per statement; each key binds two parameters and SQLite
+# limits the number of bound parameters per statement
+_SQLITE_BATCH_SIZE = 250
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so formatting-only differences share an entry."""
+    return " ".join(text.split())
+
+
+def text_key(model_id: str, text: str) -> Tuple[str, str]:
+    """
+    Build the cache key of a text.
+    
+    Args:
+        model_id: Embedding model identifier
+        text: Text to embed
+    
+    Returns:
+        ``(model_id, text hash)`` tuple
+    """
+    digest = hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=16).hexdigest()
+    return (model_id, digest)
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache: an in-memory LRU in front of an optional
+    on-disk SQLite store.
+    
+    Vectors are held as read-only float32 arrays. Both tiers are bounded.
+    The memory tier evicts the least recently used vector; the disk tier
+    evicts the least recently accessed rows once it grows past
+    ``max_disk_entries``. Disk hits are promoted into memory.
+    """
+    
+    def __init__(self, max_size: int = 4096, path: Optional[str] = None, max_disk_entries: int = 100000):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            max_size: Maximum number of vectors held in memory (0 disables
+                the memory tier)
+            path: SQLite database file for the disk tier, or None for
+                memory only
+            max_disk_entries: Maximum number of vectors kept on disk
+        """
+        self.max_size = max_size
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        # Upper bound on the disk rows; replacements are counted as inserts
+        # until the bound is exceeded and the rows are recounted
+        self._disk_count = 0
+        if path:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            with self._lock, self._connection:
+                self._connection.execute("PRAGMA journal_mode=WAL")
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    "model_id TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+                    "accessed REAL NOT NULL, PRIMARY KEY (model_id, text_hash))"
+                )
+                self._connection.execute("CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed)")
+                self._disk_count = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get_many(self, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], np.ndarray]:
+        """
+        Look up cached vectors.
+        
+        Args:
+            keys: Cache keys built with ``text_key``
+        
+        Returns:
+            Read-only float32 vectors by key; missing keys are omitted
+        """
+        found = {}
+        pending = []
+        for key in dict.fromkeys(keys):
+            vector = self._entries.get(key)
+            if vector is None:
+                pending.append(key)
+                continue
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+            found[key] = vector
+        
+        if pending and self._connection is not None:
+            stored = self._load(pending)
+            for key, vector in stored.items():
+                self._remember(key, vector)
+                self.disk_hits += 1
+                found[key] = vector
+            pending = [key for key in pending if key not in stored]
+        
+        self.misses += len(pending)
+        return found
+    
+    def put_many(self, vectors: Dict[Tuple[str, str], Sequence[float]]):
+        """
+        Cache vectors in both tiers.
+        
+        Args:
+            vectors: Vectors (lists or arrays) by cache key
+        """
+        vectors = {key: _frozen(vector) for key, vector in vectors.items()}
+        for key, vector in vectors.items():
+            self._remember(key, vector)
+        
+        if self._connection is not None and vectors:
+            now = time.time()
+            rows = [
+                (model_id, text_hash, vector.tobytes(), now)
+                for (model_id, text_hash), vector in vectors.items()
+            ]
+            with self._lock, self._connection:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model_id, text_hash, vector, accessed) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._disk_count += len(rows)
+                self._evict_disk()
+    
+    def clear(self):
+        """Drop every cached vector in both tiers and reset the counters."""
+        self._entries.clear()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self._connection is not None:
+            with self._lock, self._connection:
+                self._connection.execute("DELETE FROM embeddings")
+                self._disk_count = 0
+    
+    def close(self):
+        """Close the disk tier."""
+        if self._connection is not None:
+            with self._lock:
+                self._connection.close()
+            self._connection = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+        
+        Returns:
+            Hits per tier, misses, hit rate and the number of vectors in
+            memory and on disk
+        """
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        disk_size = 0
+        if self._connection is not None:
+            with self._lock:
+                disk_size = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "disk_size": disk_size,
+        }
+    
+    def _remember(self, key: Tuple[str, str], vector: np.ndarray):
+        """Add a vector to the memory tier, evicting the least recently used."""
+        if self.max_size <= 0:
+            return
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def _load(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], np.ndarray]:
+        """Read vectors from the disk tier and refresh their access time."""
+        found = {}
+        now = time.time()
+        with self._lock, self._connection:
+            for start in range(0, len(keys), _SQLITE_BATCH_SIZE):
+                chunk = keys[start:start + _SQLITE_BATCH_SIZE]
+                clause = " OR ".join(["(model_id = ? AND text_hash = ?)"] * len(chunk))
+                params = [part for key in chunk for part in key]
+                rows = self._connection.execute(
+                    f"SELECT model_id, text_hash, vector FROM embeddings WHERE {clause}", params
+                ).fetchall()
+                for model_id, text_hash, blob in rows:
+                    # frombuffer views the immutable blob, so the array is read-only
+                    found[(model_id, text_hash)] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                self._connection.executemany(
+                    "UPDATE embeddings SET accessed = ? WHERE model_id = ? AND text_hash = ?",
+                    [(now, model_id, text_hash) for model_id, text_hash in found],
+                )
+        return found
+    
+    def _evict_disk(self):
+        """Delete the least recently accessed rows beyond the disk bound."""
+        if self._disk_count <= self.max_disk_entries:
+            return
+        
+        # The running count may include replaced rows; recount before deleting
+        self._disk_count = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = self._disk_count - self.max_disk_entries
+        if excess > 0:
+            self._connection.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY accessed LIMIT ?)",
+                (excess,),
+            )
+            self._disk_count -= excess
+
+
+def _frozen(vector: Sequence[float]) -> np.ndarray:
+    """Copy a vector into a read-only float32 array safe to share."""
+    array = np.array(vector, dtype=np.float32)
+    array.flags.writeable = False
+    return array
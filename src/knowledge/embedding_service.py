@@ -1,8 +1,36 @@
 """Embedding service for the knowledge management system."""
 
-from typing import List, Union, Dict, Any
-from google.cloud import aiplatform
-from vertexai.generative_models import GenerativeModel
+import os
+from typing import List, Union, Dict, Any, Optional
+
+import numpy as np
+
+from .embedding_batcher import EmbeddingBatcher
+from .embedding_cache import EmbeddingCache, text_key
+from .hashing_embedder import HashingEmbedder
+from .projection import Projection
+
+
+def content_text(content: Dict[str, Any]) -> str:
+    """
+    Convert structured content to the text that is embedded for it.
+    
+    Args:
+        content: Dictionary containing structured content
+        
+    Returns:
+        Title or name with the description, the text field, or the
+        serialized dictionary as a fallback
+    """
+    if "title" in content and "description" in content:
+        return f"{content['title']}\n{content['description']}"
+    if "name" in content and "description" in content:
+        return f"{content['name']}\n{content['description']}"
+    if "text" in content:
+        return content["text"]
+    # Fallback to serializing the entire dictionary
+    return str(content)
+
 
 class EmbeddingService:
     """
@@ -16,6 +44,14 @@ class EmbeddingService:
         self,
         project_id: str = None,
         location: str = "us-central1",
+        model_id: str = "text-embedding-004",
+        cache: Optional[EmbeddingCache] = None,
+        max_batch_size: int = 64,
+        batch_delay: float = 0.005,
+        backend: Optional[Any] = None,
+        output_format: str = "list",
+        projection: Optional[Projection] = None,
+        projection_path: Optional[str] = None,
     ):
         """
         Initialize the embedding service.
@@ -23,46 +59,231 @@ class EmbeddingService:
         Args:
             project_id: Google Cloud project ID
             location: Google Cloud region
+            model_id: Embedding model identifier; part of every cache key
+            cache: Embedding cache; defaults to an in-memory LRU, backed by
+                the SQLite file named by ``EMBEDDING_CACHE_PATH`` when set
+            max_batch_size: Most texts sent to the model per call
+            batch_delay: Seconds concurrent requests are held to share a
+                model call
+            backend: Embedding backend exposing ``model_id`` and an async
+                ``embed(texts)``, such as ``HashingEmbedder``. Defaults to
+                Vertex AI, or to the offline hashing backend when
+                ``EMBEDDING_BACKEND=hashing``
+            output_format: "list" returns Python float lists; "numpy" returns
+                float32 arrays (one contiguous 2-D array per batch call),
+                which the vector stores accept without conversion
+            projection: Dimensionality reduction applied to every model
+                embedding before it is cached or returned. Give it to the
+                target service of a ``ReembeddingJob`` (see ``projected``)
+                rather than to a service serving full-size layers
+            projection_path: Directory of saved projections; ``for_model``
+                rebuilds the projected service of a layer switched to one
+                of them. Defaults to ``EMBEDDING_PROJECTION_PATH`` when set
         """
+        if output_format not in ("list", "numpy"):
+            raise ValueError(f"Unsupported embedding output format: {output_format}")
+        
         self.project_id = project_id
         self.location = location
+        if backend is None and os.getenv("EMBEDDING_BACKEND") == "hashing":
+            backend = HashingEmbedder()
+        self.backend = backend
+        self.base_model_id = backend.model_id if backend is not None else model_id
+        self.projection_path = projection_path or os.getenv("EMBEDDING_PROJECTION_PATH")
+        self._projected: Dict[str, "EmbeddingService"] = {}
+        self.projection = None
+        self.model_id = self.base_model_id
+        if projection is not None:
+            self.set_projection(projection)
+        self.output_format = output_format
+        self.max_batch_size = max_batch_size
+        self.batch_delay = batch_delay
+        if cache is None:
+            cache = EmbeddingCache(path=os.getenv("EMBEDDING_CACHE_PATH") or None)
+        self.cache = cache
+        self.batcher = EmbeddingBatcher(self._embed, max_batch_size=max_batch_size, max_delay=batch_delay)
         self._initialized = False
         
     def initialize(self):
         """Initialize the embedding service."""
         if not self._initialized:
-            # Initialize Vertex AI with project details
-            aiplatform.init(project=self.project_id, location=self.location)
+            if self.backend is None:
+                # Initialize Vertex AI with project details
+                from google.cloud import aiplatform
+                aiplatform.init(project=self.project_id, location=self.location)
             self._initialized = True
     
-    async def generate_embeddings(self, text: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
+    async def generate_embeddings(
+        self,
+        text: Union[str, List[str]],
+    ) -> Union[List[float], List[List[float]], np.ndarray]:
         """
-        Generate embeddings for text using Vertex AI.
+        Generate embeddings for text with the configured backend.
+        
+        Texts already in the embedding cache are not sent to the model.
+        The remaining texts join the micro-batcher, so concurrent callers
+        share batched model calls.
         
         Args:
             text: Text or list of texts to generate embeddings for
             
         Returns:
-            Vector embedding(s) for the input text(s)
+            Vector embedding(s) for the input text(s); with the "numpy"
+            output format a 1-D array for a single text and a 2-D array
+            with one row per text otherwise
+        """
+        texts = [text] if isinstance(text, str) else list(text)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32) if self.output_format == "numpy" else []
+        
+        keys = [text_key(self.model_id, entry) for entry in texts]
+        
+        vectors = self.cache.get_many(keys)
+        missing = {key: entry for key, entry in zip(keys, texts) if key not in vectors}
+        if missing:
+            computed = dict(zip(missing, await self.batcher.embed(list(missing.values()))))
+            self.cache.put_many(computed)
+            vectors.update(computed)
+        
+        matrix = np.empty((len(keys), len(vectors[keys[0]])), dtype=np.float32)
+        for row, key in enumerate(keys):
+            matrix[row] = vectors[key]
+        
+        if self.output_format == "list":
+            matrix = matrix.tolist()
+        
+        # Return a single embedding vector for a single text
+        if isinstance(text, str):
+            return matrix[0]
+        
+        # Return the embedding vectors for multiple texts
+        return matrix
+    
+    async def embed_text(self, text: str) -> Union[List[float], np.ndarray]:
+        """
+        Generate the embedding of a single text.
+        
+        Args:
+            text: Text to generate an embedding for
+            
+        Returns:
+            Vector embedding for the text
+        """
+        return await self.generate_embeddings(text)
+    
+    def set_projection(self, projection: Optional[Projection]):
+        """
+        Reduce embeddings with a projection from now on.
+        
+        The model ID becomes the projection's, so cached full-dimension
+        vectors are not reused and items written before the change are
+        stale for ``ReembeddingJob``. A service serving layers that still
+        hold full-size vectors should keep its model; migrate them with
+        a ``projected`` service instead.
+        
+        Args:
+            projection: Projection fitted for this service's model, or
+                None to return full model embeddings
+        """
+        if projection is not None and projection.source_model != self.base_model_id:
+            raise ValueError(
+                f"Projection fitted for {projection.source_model} cannot reduce {self.base_model_id} embeddings"
+            )
+        self.projection = projection
+        self.model_id = projection.model_id if projection is not None else self.base_model_id
+    
+    def projected(self, projection: Projection) -> "EmbeddingService":
+        """
+        Get a service embedding with this service's model reduced by a projection.
+        
+        The new service shares the backend and the cache, so full model
+        embeddings are not recomputed. It is the target service of a
+        migration to a projected shadow layer; this service keeps serving
+        full-size layers.
+        
+        Args:
+            projection: Projection fitted for this service's model
+        
+        Returns:
+            Service whose model ID is the projection's
+        """
+        service = self._projected.get(projection.model_id)
+        if service is None:
+            service = EmbeddingService(
+                project_id=self.project_id,
+                location=self.location,
+                model_id=self.base_model_id,
+                cache=self.cache,
+                max_batch_size=self.max_batch_size,
+                batch_delay=self.batch_delay,
+                backend=self.backend,
+                output_format=self.output_format,
+                projection=projection,
+                projection_path=self.projection_path,
+            )
+            self._projected[projection.model_id] = service
+        return service
+    
+    def for_model(self, model_id: str) -> Optional["EmbeddingService"]:
+        """
+        Get a service producing a model's embeddings, if this one can.
+        
+        Used by ``LayerRouter.embedding_service_for`` for layers switched
+        to a projection of this service's model saved under
+        ``projection_path`` (one version per chapter fit).
+        
+        Args:
+            model_id: Model ID recorded for a layer
+        
+        Returns:
+            This service, a projected sibling, or None
+        """
+        if model_id == self.model_id:
+            return self
+        if model_id in self._projected:
+            return self._projected[model_id]
+        if not self.projection_path or not model_id.startswith(f"{self.base_model_id}+"):
+            return None
+        try:
+            projection = Projection.load(self.projection_path, model_id.rsplit("-", 1)[-1])
+        except (OSError, ValueError):
+            return None
+        if projection.model_id != model_id:
+            return None
+        return self.projected(projection)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Get embedding cache counters.
+        
+        Returns:
+            Hits per tier, misses, hit rate and cache sizes
         """
+        return self.cache.stats()
+    
+    async def _embed(self, texts: List[str]) -> np.ndarray:
+        """Compute a float32 matrix of embeddings, projected if configured, bypassing the cache."""
+        matrix = await self._embed_model(texts)
+        if self.projection is not None:
+            matrix = self.projection.apply(matrix)
+        return matrix
+    
+    async def _embed_model(self, texts: List[str]) -> np.ndarray:
+        """Compute a float32 matrix of full model embeddings."""
         if not self._initialized:
             self.initialize()
+        
+        if self.backend is not None:
+            return np.asarray(await self.backend.embed(texts), dtype=np.float32)
             
         # For simplicity, using the Vertex AI Embeddings API
         # In a real implementation, you'd use the specific embedding model API
         
         # Mock implementation - in a real system, this would call the Vertex AI Embeddings API
         # This is just a placeholder that returns random vectors of the right dimension
-        import random
-        
-        # Return a single embedding vector for a single text
-        if isinstance(text, str):
-            return [random.uniform(-1, 1) for _ in range(768)]
-        
-        # Return a list of embedding vectors for multiple texts
-        return [[random.uniform(-1, 1) for _ in range(768)] for _ in text]
+        return np.random.default_rng().uniform(-1, 1, (len(texts), 768)).astype(np.float32)
     
-    async def generate_content_embeddings(self, content: Dict[str, Any]) -> List[float]:
+    async def generate_content_embeddings(self, content: Dict[str, Any]) -> Union[List[float], np.ndarray]:
         """
         Generate embeddings for structured content.
         
@@ -72,16 +293,20 @@ class EmbeddingService:
         Returns:
             Vector embedding for the content
         """
-        # Convert structured content to text for embedding
-        if "title" in content and "description" in content:
-            text = f"{content['title']}\n{content['description']}"
-        elif "name" in content and "description" in content:
-            text = f"{content['name']}\n{content['description']}"
-        elif "text" in content:
-            text = content["text"]
-        else:
-            # Fallback to serializing the entire dictionary
-            text = str(content)
-            
         # Generate and return the embedding
-        return await self.generate_embeddings(text)
+        return await self.generate_embeddings(content_text(content))
+    
+    def model_metadata(self, embedding: Union[List[float], np.ndarray]) -> Dict[str, Any]:
+        """
+        Describe the model that produced an embedding.
+        
+        Stored with every item so vectors made stale by a model or
+        dimension change can be found and re-embedded.
+        
+        Args:
+            embedding: Vector produced by this service
+            
+        Returns:
+            Metadata fields naming the model and the vector dimension
+        """
+        return {"embedding_model": self.model_id, "embedding_dimension": len(embedding)}
@@ -0,0 +1,84 @@
+"""Metadata filter evaluation for local knowledge backends.
+
+Implements the subset of the Pinecone metadata filter language used across
+the agents, so in-process indexes answer the same ``filter`` dicts that are
+sent to Pinecone:
+
+- ``{"type": "template"}`` (implicit ``$eq``)
+- ``{"performance": {"$gt": 0.7}}`` and the other comparison operators
+- ``{"platform": {"$in": ["linkedin", "bluesky"]}}``
+- ``{"$and": [...]}`` / ``{"$or": [...]}``
+"""
+
+from typing import Any, Dict, Optional
+
+
+def _compare(operator: str, value: Any, operand: Any) -> bool:
+    """Apply a single comparison operator to a metadata value."""
+    if operator == "$eq":
+        return value == operand
+    if operator == "$ne":
+        return value != operand
+    if operator == "$in":
+        return value in operand
+    if operator == "$nin":
+        return value not in operand
+    
+    try:
+        if operator == "$gt":
+            return value > operand
+        if operator == "$gte":
+            return value >= operand
+        if operator == "$lt":
+            return value < operand
+        if operator == "$lte":
+            return value <= operand
+    except TypeError:
+        # Mismatched types (e.g. a string compared to a number) never match
+        return False
+    
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """
+    Check whether item metadata satisfies a Pinecone-style filter.
+    
+    Args:
+        metadata: Metadata of a stored item
+        filter: Filter dict; ``None`` or ``{}`` matches everything
+    
+    Returns:
+        True if the metadata matches every condition of the filter
+    """
+    if not filter:
+        return True
+    
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+        
+        present = key in metadata
+        value = metadata.get(key)
+        
+        if isinstance(condition, dict) and condition and all(op.startswith("$") for op in condition):
+            for operator, operand in condition.items():
+                if operator == "$exists":
+                    if present != bool(operand):
+                        return False
+                elif not present:
+                    # Only negative operators match a missing field
+                    if operator not in ("$ne", "$nin"):
+                        return False
+                elif not _compare(operator, value, operand):
+                    return False
+        elif not present or value != condition:
+            return False
+    
+    return True
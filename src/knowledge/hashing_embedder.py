@@ -0,0 +1,117 @@
+"""Deterministic offline embedding backend.
+
+Embeds text by feature hashing: word unigrams, word bigrams and character
+n-grams are hashed into a fixed number of signed buckets, weighted by
+sublinear term frequency and L2-normalized. Texts sharing vocabulary or
+spelling end up close in cosine space, which makes local retrieval and
+benchmarks meaningful and reproducible without Vertex AI.
+"""
+
+import math
+import zlib
+from collections import Counter
+from typing import List, Iterable, Tuple
+
+import numpy as np
+
+from .lexical_index import tokenize
+
+# Guards normalization of texts without any features
+_EPSILON = 1e-12
+
+
+class HashingEmbedder:
+    """
+    Embedding backend using signed feature hashing.
+    
+    Hashes are CRC32 based, so vectors are identical across processes and
+    platforms (unlike Python's salted ``hash``).
+    """
+    
+    def __init__(
+        self,
+        dimension: int = 768,
+        char_ngrams: Tuple[int, int] = (3, 5),
+        word_bigrams: bool = True,
+    ):
+        """
+        Initialize the embedder.
+        
+        Args:
+            dimension: Output vector dimension
+            char_ngrams: Inclusive range of character n-gram lengths taken
+                from each word (padded with boundary markers)
+            word_bigrams: Whether adjacent word pairs are features
+        """
+        if dimension <= 0:
+            raise ValueError(f"Invalid embedding dimension: {dimension}")
+        
+        self.dimension = dimension
+        self.char_ngrams = char_ngrams
+        self.word_bigrams = word_bigrams
+    
+    @property
+    def model_id(self) -> str:
+        """Identifier of the feature configuration, used in cache keys."""
+        low, high = self.char_ngrams
+        return f"hashing-{self.dimension}-c{low}{high}{'-b' if self.word_bigrams else ''}"
+    
+    def features(self, text: str) -> Counter:
+        """
+        Count the hashed features of a text.
+        
+        Args:
+            text: Text to featurize
+        
+        Returns:
+            Feature strings with their term frequencies
+        """
+        words = tokenize(text)
+        counts = Counter(f"w:{word}" for word in words)
+        if self.word_bigrams:
+            counts.update(f"b:{first} {second}" for first, second in zip(words, words[1:]))
+        
+        low, high = self.char_ngrams
+        for word in words:
+            padded = f"<{word}>"
+            for size in range(low, high + 1):
+                counts.update(f"c:{padded[i:i + size]}" for i in range(len(padded) - size + 1))
+        return counts
+    
+    def encode(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        Embed texts synchronously.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            float32 matrix with one L2-normalized row per text
+        """
+        texts = list(texts)
+        rows, columns, weights = [], [], []
+        for row, text in enumerate(texts):
+            for feature, count in self.features(text).items():
+                digest = zlib.crc32(feature.encode("utf-8"))
+                rows.append(row)
+                columns.append(digest % self.dimension)
+                # A hash-derived sign makes colliding features cancel on average
+                sign = -1.0 if digest & 0x80000000 else 1.0
+                weights.append(sign * (1.0 + math.log(count)))
+        
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        np.add.at(matrix, (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)), weights)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), _EPSILON)
+        return matrix
+    
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            float32 matrix with one row per text
+        """
+        return self.encode(texts)
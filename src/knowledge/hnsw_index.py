@@ -0,0 +1,521 @@
+"""Approximate nearest-neighbour index for large local namespaces.
+
+Implements a Hierarchical Navigable Small World (HNSW) graph in NumPy. It is
+a drop-in alternative to ``FlatIndex`` for ``LocalVectorStore`` namespaces
+that grow without bound, such as episodic memory, where exact search cost
+grows linearly with the number of stored items.
+"""
+
+import bisect
+import heapq
+import json
+import math
+import os
+import random
+from typing import Dict, List, Optional, Any, Sequence, Tuple
+
+import numpy as np
+
+from .filters import matches_filter
+
+# Guards cosine similarity against zero-length vectors
+_EPSILON = 1e-12
+
+
+class HNSWIndex:
+    """
+    HNSW graph index with incremental inserts and tombstone deletes.
+    
+    Each node is assigned a random top level; upper levels form a sparse
+    navigation graph and level 0 links every node to its ``2 * M`` closest
+    neighbours. Deleted items stay in the graph as tombstones so links remain
+    navigable, but are never returned from ``search``. Once tombstones make
+    up ``rebuild_threshold`` of the nodes, the graph is rebuilt from the
+    live items so deletes and vector updates do not grow it without bound.
+    Every node keeps the position it was appended at, which paging uses as
+    its offset, so a rebuild never shifts a scan.
+    """
+    
+    def __init__(
+        self,
+        dimension: int,
+        metric: str = "cosine",
+        M: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        seed: Optional[int] = None,
+        rebuild_threshold: float = 0.25,
+    ):
+        """
+        Initialize an empty index.
+        
+        Args:
+            dimension: Dimension of the stored vectors
+            metric: Similarity metric ("cosine" or "dotproduct")
+            M: Maximum links per node on upper levels (level 0 allows 2 * M)
+            ef_construction: Candidate list size while inserting
+            ef_search: Candidate list size while querying (raised to top_k)
+            seed: Optional seed for reproducible level assignment
+            rebuild_threshold: Fraction of tombstoned nodes that triggers a
+                rebuild (0 disables)
+        """
+        if metric not in ("cosine", "dotproduct"):
+            raise ValueError(f"Unsupported metric: {metric}")
+        if M < 2:
+            raise ValueError("M must be at least 2")
+        
+        self.dimension = dimension
+        self.metric = metric
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.rebuild_threshold = rebuild_threshold
+        self._level_mult = 1 / math.log(M)
+        self._random = random.Random(seed)
+        
+        # Node-indexed storage; a node's ID is None once it is deleted
+        self._node_ids: List[Optional[str]] = []
+        self._metadata: List[Optional[Dict[str, Any]]] = []
+        self._positions: List[int] = []
+        self._next_position = 0
+        self._graph: List[List[List[int]]] = []
+        self._vectors = np.empty((0, dimension), dtype=np.float32)
+        self._norms = np.empty(0, dtype=np.float32)
+        self._rows: Dict[str, int] = {}
+        self._entry: Optional[int] = None
+        self._max_level = -1
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    @property
+    def ids(self) -> List[str]:
+        """IDs of live items."""
+        return list(self._rows)
+    
+    @property
+    def dead_rows(self) -> int:
+        """Number of tombstoned nodes awaiting a rebuild."""
+        return len(self._node_ids) - len(self._rows)
+    
+    def _as_matrix(self, vectors: Sequence[Sequence[float]]) -> np.ndarray:
+        """Convert vectors to a 2-D float32 matrix of the index dimension."""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if matrix.shape[1] != self.dimension:
+            raise ValueError(
+                f"Vector dimension {matrix.shape[1]} does not match index dimension {self.dimension}"
+            )
+        return matrix
+    
+    def _reserve(self, count: int):
+        """Grow the backing matrix so ``count`` nodes fit, doubling capacity."""
+        capacity = self._vectors.shape[0]
+        if count <= capacity:
+            return
+        
+        size = len(self._node_ids)
+        new_capacity = max(count, 2 * capacity, 64)
+        vectors = np.empty((new_capacity, self.dimension), dtype=np.float32)
+        vectors[:size] = self._vectors[:size]
+        norms = np.empty(new_capacity, dtype=np.float32)
+        norms[:size] = self._norms[:size]
+        self._vectors, self._norms = vectors, norms
+    
+    def _similarities(self, query: np.ndarray, query_norm: float, nodes: List[int]) -> np.ndarray:
+        """Similarity between a query vector and a list of nodes."""
+        scores = self._vectors[nodes] @ query
+        if self.metric == "cosine":
+            scores /= np.maximum(self._norms[nodes] * query_norm, _EPSILON)
+        return scores
+    
+    def _search_level(
+        self,
+        query: np.ndarray,
+        query_norm: float,
+        entry_points: List[int],
+        ef: int,
+        level: int,
+    ) -> List[Tuple[float, int]]:
+        """
+        Best-first search of one graph level.
+        
+        Returns:
+            Up to ``ef`` ``(similarity, node)`` pairs, unordered
+        """
+        visited = set(entry_points)
+        scores = self._similarities(query, query_norm, entry_points).tolist()
+        candidates = [(-score, node) for score, node in zip(scores, entry_points)]
+        results = [(score, node) for score, node in zip(scores, entry_points)]
+        heapq.heapify(candidates)
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+        
+        while candidates:
+            negative_score, node = heapq.heappop(candidates)
+            if -negative_score < results[0][0] and len(results) >= ef:
+                break
+            
+            neighbours = [n for n in self._graph[node][level] if n not in visited]
+            if not neighbours:
+                continue
+            visited.update(neighbours)
+            
+            for score, neighbour in zip(self._similarities(query, query_norm, neighbours).tolist(), neighbours):
+                if len(results) < ef or score > results[0][0]:
+                    heapq.heappush(candidates, (-score, neighbour))
+                    heapq.heappush(results, (score, neighbour))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        
+        return results
+    
+    def _select_neighbours(self, node: int, candidates: List[Tuple[float, int]], limit: int) -> List[int]:
+        """
+        Pick up to ``limit`` diverse neighbours with the HNSW heuristic.
+        
+        A candidate is kept only if it is closer to ``node`` than to every
+        neighbour already kept, which preserves links into other clusters.
+        Remaining slots are filled with the closest discarded candidates.
+        """
+        ordered = [(score, candidate) for score, candidate in sorted(candidates, reverse=True) if candidate != node]
+        if len(ordered) <= limit:
+            return [candidate for _, candidate in ordered]
+        
+        # Pairwise similarities between all candidates in one product
+        nodes = [candidate for _, candidate in ordered]
+        vectors = self._vectors[nodes]
+        pairwise = vectors @ vectors.T
+        if self.metric == "cosine":
+            norms = self._norms[nodes]
+            pairwise /= np.maximum(np.outer(norms, norms), _EPSILON)
+        pairwise = pairwise.tolist()
+        
+        selected: List[int] = []
+        discarded: List[int] = []
+        for position, (score, _) in enumerate(ordered):
+            if len(selected) >= limit:
+                break
+            row = pairwise[position]
+            if any(row[kept] >= score for kept in selected):
+                discarded.append(position)
+            else:
+                selected.append(position)
+        
+        for position in discarded:
+            if len(selected) >= limit:
+                break
+            selected.append(position)
+        
+        return [nodes[position] for position in selected]
+    
+    def _insert(self, vector: np.ndarray, norm: float) -> int:
+        """Add a node to the graph and return its node number."""
+        node = len(self._node_ids)
+        level = int(-math.log(1.0 - self._random.random()) * self._level_mult)
+        
+        self._reserve(node + 1)
+        self._vectors[node] = vector
+        self._norms[node] = norm
+        self._graph.append([[] for _ in range(level + 1)])
+        
+        if self._entry is None:
+            self._entry, self._max_level = node, level
+            return node
+        
+        # Greedy descent through the levels above the new node
+        entry_points = [self._entry]
+        for current in range(self._max_level, level, -1):
+            nearest = max(self._search_level(vector, norm, entry_points, 1, current))
+            entry_points = [nearest[1]]
+        
+        for current in range(min(level, self._max_level), -1, -1):
+            candidates = self._search_level(vector, norm, entry_points, self.ef_construction, current)
+            limit = 2 * self.M if current == 0 else self.M
+            neighbours = self._select_neighbours(node, candidates, self.M)
+            self._graph[node][current] = neighbours
+            
+            for neighbour in neighbours:
+                links = self._graph[neighbour][current]
+                links.append(node)
+                if len(links) > limit:
+                    scores = self._similarities(self._vectors[neighbour], float(self._norms[neighbour]), links)
+                    self._graph[neighbour][current] = self._select_neighbours(
+                        neighbour, list(zip(scores.tolist(), links)), limit
+                    )
+            
+            entry_points = [candidate for _, candidate in candidates]
+        
+        if level > self._max_level:
+            self._entry, self._max_level = node, level
+        
+        return node
+    
+    def upsert(
+        self,
+        ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        metadata: Sequence[Dict[str, Any]],
+    ):
+        """
+        Insert or overwrite items.
+        
+        Overwriting an item whose vector changed tombstones the old node and
+        inserts a new one; metadata-only updates are applied in place.
+        Rebuilds the graph if tombstones passed the rebuild threshold.
+        
+        Args:
+            ids: Item IDs
+            vectors: One vector per item
+            metadata: One metadata dict per item
+        """
+        matrix = self._as_matrix(vectors)
+        norms = np.linalg.norm(matrix, axis=1)
+        
+        for item_id, vector, norm, item_metadata in zip(ids, matrix, norms, metadata):
+            existing = self._rows.get(item_id)
+            if existing is not None:
+                if np.array_equal(self._vectors[existing], vector):
+                    self._metadata[existing] = dict(item_metadata)
+                    continue
+                self._tombstone(existing)
+            
+            self._append(item_id, vector, float(norm), dict(item_metadata), self._next_position)
+            self._next_position += 1
+        
+        self._rebuild_if_needed()
+    
+    def _append(self, item_id: str, vector: np.ndarray, norm: float, metadata: Dict[str, Any], position: int):
+        """Insert a live node with its append position."""
+        node = self._insert(vector, norm)
+        self._node_ids.append(item_id)
+        self._metadata.append(metadata)
+        self._positions.append(position)
+        self._rows[item_id] = node
+    
+    def _tombstone(self, node: int):
+        """Hide a node from results while keeping its links for navigation."""
+        del self._rows[self._node_ids[node]]
+        self._node_ids[node] = None
+        self._metadata[node] = None
+    
+    def delete(self, ids: Sequence[str]) -> int:
+        """
+        Delete items by ID.
+        
+        Rebuilds the graph if tombstones passed the rebuild threshold.
+        
+        Args:
+            ids: IDs to delete; unknown IDs are ignored
+        
+        Returns:
+            Number of items deleted
+        """
+        deleted = 0
+        for item_id in ids:
+            node = self._rows.get(item_id)
+            if node is not None:
+                self._tombstone(node)
+                deleted += 1
+        self._rebuild_if_needed()
+        return deleted
+    
+    def _rebuild_if_needed(self):
+        """Rebuild once tombstones make up ``rebuild_threshold`` of the nodes."""
+        dead = self.dead_rows
+        if self.rebuild_threshold > 0 and dead and dead >= self.rebuild_threshold * len(self._node_ids):
+            self.compact()
+    
+    def compact(self) -> int:
+        """
+        Rebuild the graph from the live items, dropping tombstones.
+        
+        Items are re-inserted in node order and keep their append
+        positions, so scans paging through the index meanwhile are
+        unaffected.
+        
+        Returns:
+            Number of tombstoned nodes removed
+        """
+        removed = self.dead_rows
+        if not removed:
+            return 0
+        
+        live = [node for node, item_id in enumerate(self._node_ids) if item_id is not None]
+        vectors, norms = self._vectors[live], self._norms[live]
+        items = [(self._node_ids[node], self._metadata[node], self._positions[node]) for node in live]
+        
+        self._node_ids, self._metadata, self._positions, self._graph = [], [], [], []
+        self._vectors = np.empty((0, self.dimension), dtype=np.float32)
+        self._norms = np.empty(0, dtype=np.float32)
+        self._rows = {}
+        self._entry, self._max_level = None, -1
+        self._reserve(len(items))
+        
+        for (item_id, metadata, position), vector, norm in zip(items, vectors, norms):
+            self._append(item_id, vector, float(norm), metadata, position)
+        return removed
+    
+    def ids_page(self, offset: int, limit: int) -> Tuple[List[str], Optional[int]]:
+        """
+        Return the live IDs among ``limit`` nodes in insertion order from ``offset``.
+        
+        Offsets are append positions rather than node numbers, so they stay
+        valid when the graph is rebuilt between pages.
+        
+        Returns:
+            The IDs and the offset of the next page (``None`` at the end)
+        """
+        first = bisect.bisect_left(self._positions, offset)
+        end = first + limit
+        ids = [item_id for item_id in self._node_ids[first:end] if item_id is not None]
+        return ids, self._positions[end - 1] + 1 if end < len(self._node_ids) else None
+    
+    def get(self, item_id: str) -> Optional[Tuple[np.ndarray, Dict[str, Any]]]:
+        """Return the stored vector and metadata for an ID, if present."""
+        node = self._rows.get(item_id)
+        if node is None:
+            return None
+        return self._vectors[node], self._metadata[node]
+    
+    def search(
+        self,
+        query: Sequence[float],
+        top_k: int,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Find approximately the most similar items.
+        
+        Tombstones and items rejected by the filter are skipped; if too few
+        items survive, the candidate list is widened until ``top_k`` results
+        are found or the whole graph has been considered.
+        
+        Args:
+            query: Query vector
+            top_k: Number of results to return
+            filter: Optional metadata filter
+        
+        Returns:
+            ``(id, score, metadata)`` tuples ordered by descending score
+        """
+        if top_k <= 0 or not len(self):
+            return []
+        
+        query_vector = self._as_matrix(query)[0]
+        query_norm = float(np.linalg.norm(query_vector))
+        
+        entry_points = [self._entry]
+        for level in range(self._max_level, 0, -1):
+            nearest = max(self._search_level(query_vector, query_norm, entry_points, 1, level))
+            entry_points = [nearest[1]]
+        
+        ef = max(self.ef_search, top_k)
+        while True:
+            candidates = sorted(
+                self._search_level(query_vector, query_norm, entry_points, ef, 0), reverse=True
+            )
+            results = []
+            for score, node in candidates:
+                metadata = self._metadata[node]
+                if metadata is None or (filter and not matches_filter(metadata, filter)):
+                    continue
+                results.append((self._node_ids[node], score, metadata))
+                if len(results) == top_k:
+                    return results
+            
+            if ef >= len(self._node_ids):
+                return results
+            ef *= 2
+    
+    def save(self, path: str):
+        """
+        Write the index to a directory.
+        
+        Args:
+            path: Directory to write; created if missing
+        """
+        os.makedirs(path, exist_ok=True)
+        size = len(self._node_ids)
+        
+        np.save(os.path.join(path, "vectors.npy"), self._vectors[:size])
+        np.save(os.path.join(path, "norms.npy"), self._norms[:size])
+        
+        # Flatten each level's adjacency lists into neighbours + offsets arrays
+        graph = {}
+        for level in range(self._max_level + 1):
+            offsets = [0]
+            neighbours: List[int] = []
+            for links in self._graph:
+                if level < len(links):
+                    neighbours.extend(links[level])
+                offsets.append(len(neighbours))
+            graph[f"neighbours_{level}"] = np.asarray(neighbours, dtype=np.int64)
+            graph[f"offsets_{level}"] = np.asarray(offsets, dtype=np.int64)
+        graph["levels"] = np.asarray([len(links) - 1 for links in self._graph], dtype=np.int64)
+        np.savez(os.path.join(path, "graph.npz"), **graph)
+        
+        with open(os.path.join(path, "index.json"), "w") as f:
+            json.dump({
+                "dimension": self.dimension,
+                "metric": self.metric,
+                "M": self.M,
+                "ef_construction": self.ef_construction,
+                "ef_search": self.ef_search,
+                "rebuild_threshold": self.rebuild_threshold,
+                "entry": self._entry,
+                "max_level": self._max_level,
+                "ids": self._node_ids,
+                "metadata": self._metadata,
+                "positions": self._positions,
+                "next_position": self._next_position,
+            }, f)
+    
+    @classmethod
+    def load(cls, path: str, seed: Optional[int] = None) -> "HNSWIndex":
+        """
+        Read an index written by ``save``.
+        
+        Args:
+            path: Directory written by ``save``
+            seed: Optional seed for levels of items inserted after loading
+        
+        Returns:
+            The restored index
+        """
+        with open(os.path.join(path, "index.json")) as f:
+            header = json.load(f)
+        
+        index = cls(
+            dimension=header["dimension"],
+            metric=header["metric"],
+            M=header["M"],
+            ef_construction=header["ef_construction"],
+            ef_search=header["ef_search"],
+            seed=seed,
+            rebuild_threshold=header.get("rebuild_threshold", 0.25),
+        )
+        index._vectors = np.load(os.path.join(path, "vectors.npy"))
+        index._norms = np.load(os.path.join(path, "norms.npy"))
+        index._node_ids = header["ids"]
+        index._metadata = header["metadata"]
+        # Indexes saved before positions were recorded page by node number
+        index._positions = header.get("positions", list(range(len(index._node_ids))))
+        index._next_position = header.get("next_position", len(index._node_ids))
+        index._rows = {item_id: node for node, item_id in enumerate(index._node_ids) if item_id is not None}
+        index._entry = header["entry"]
+        index._max_level = header["max_level"]
+        
+        with np.load(os.path.join(path, "graph.npz")) as graph:
+            levels = graph["levels"].tolist()
+            index._graph = [[[] for _ in range(level + 1)] for level in levels]
+            for level in range(index._max_level + 1):
+                neighbours = graph[f"neighbours_{level}"].tolist()
+                offsets = graph[f"offsets_{level}"].tolist()
+                for node, node_level in enumerate(levels):
+                    if level <= node_level:
+                        index._graph[node][level] = neighbours[offsets[node]:offsets[node + 1]]
+        
+        return index
@@ -0,0 +1,424 @@
+"""Streaming document ingestion for the knowledge layers.
+
+Reads Markdown, JSON and CSV files lazily, splits their text into
+overlapping token-bounded chunks, embeds the chunks in batches and upserts
+them in bulk through ``VectorStore.store_items``. Completed files are
+recorded in a checkpoint file so an interrupted run resumes where it left
+off.
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Any, AsyncIterator, Iterable, Iterator, Set, Union
+
+from .lexical_index import item_text
+
+logger = logging.getLogger(__name__)
+
+MARKDOWN_SUFFIXES = {".md", ".markdown", ".txt"}
+JSON_SUFFIXES = {".json", ".jsonl", ".ndjson"}
+CSV_SUFFIXES = {".csv"}
+SUPPORTED_SUFFIXES = MARKDOWN_SUFFIXES | JSON_SUFFIXES | CSV_SUFFIXES
+
+# Fields used, in order, as the text of JSON records and CSV rows
+_TEXT_FIELDS = ("title", "name", "description", "text", "content", "body")
+
+
+@dataclass
+class Document:
+    """A unit of source text with the metadata its chunks inherit."""
+    source: str
+    key: str
+    text: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class IngestionResult:
+    """Outcome of an ingestion run."""
+    files: int = 0
+    skipped_files: int = 0
+    documents: int = 0
+    chunks: int = 0
+    removed_chunks: int = 0
+    failed: List[Dict[str, Any]] = field(default_factory=list)
+    elapsed: float = 0.0
+    
+    @property
+    def items_per_second(self) -> float:
+        """Stored chunks per second of wall-clock time."""
+        return self.chunks / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def chunk_text(text: str, max_tokens: int = 256, overlap: int = 32) -> Iterator[str]:
+    """
+    Split text into overlapping windows of whitespace-delimited tokens.
+    
+    Args:
+        text: Text to split
+        max_tokens: Most tokens per chunk
+        overlap: Tokens repeated at the start of the next chunk, so
+            sentences cut at a boundary stay retrievable
+    
+    Yields:
+        Chunk strings; nothing for blank text
+    """
+    if max_tokens <= 0 or not 0 <= overlap < max_tokens:
+        raise ValueError(f"Invalid chunk size {max_tokens} with overlap {overlap}")
+    
+    tokens = text.split()
+    step = max_tokens - overlap
+    for start in range(0, len(tokens), step):
+        yield " ".join(tokens[start:start + max_tokens])
+        if start + max_tokens >= len(tokens):
+            break
+
+
+def iter_files(paths: Iterable[Union[str, Path]]) -> Iterator[Path]:
+    """Expand files and directories into supported files, in sorted order."""
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from sorted(p for p in path.rglob("*") if p.is_file() and p.suffix.lower() in SUPPORTED_SUFFIXES)
+        elif path.suffix.lower() in SUPPORTED_SUFFIXES:
+            yield path
+        else:
+            logger.warning(f"Skipping unsupported file: {path}")
+
+
+def read_documents(path: Union[str, Path]) -> Iterator[Document]:
+    """
+    Lazily read the documents of a file.
+    
+    Markdown is split into sections at headings and CSV into rows, both
+    while streaming the file. JSON Lines files are read a record at a
+    time; a ``.json`` file is parsed whole and may hold one object or a
+    list of objects.
+    
+    Args:
+        path: Markdown, JSON or CSV file
+    
+    Yields:
+        Documents of the file
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix in MARKDOWN_SUFFIXES:
+        yield from _read_markdown(path)
+    elif suffix in JSON_SUFFIXES:
+        yield from _read_json(path)
+    elif suffix in CSV_SUFFIXES:
+        yield from _read_csv(path)
+    else:
+        raise ValueError(f"Unsupported document type: {path}")
+
+
+def _read_markdown(path: Path) -> Iterator[Document]:
+    """Yield one document per heading-delimited section."""
+    section, lines, index = None, [], 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#"):
+                if "".join(lines).strip():
+                    yield _section_document(path, index, lines, section)
+                    index += 1
+                section, lines = line.lstrip("#").strip(), [line]
+            else:
+                lines.append(line)
+    if "".join(lines).strip():
+        yield _section_document(path, index, lines, section)
+
+
+def _section_document(path: Path, index: int, lines: List[str], section: Optional[str]) -> Document:
+    """Build a Markdown section's document; text before the first heading has no section."""
+    # Pinecone rejects null metadata values
+    metadata = {"section": section} if section is not None else {}
+    return Document(str(path), f"section-{index}", "".join(lines), metadata)
+
+
+def _read_json(path: Path) -> Iterator[Document]:
+    """Yield one document per JSON object."""
+    with open(path, encoding="utf-8") as f:
+        if path.suffix.lower() == ".json":
+            data = json.load(f)
+            records = data if isinstance(data, list) else [data]
+        else:
+            records = (json.loads(line) for line in f if line.strip())
+        for index, record in enumerate(records):
+            yield _record_document(path, f"record-{index}", record)
+
+
+def _read_csv(path: Path) -> Iterator[Document]:
+    """Yield one document per CSV row."""
+    with open(path, encoding="utf-8", newline="") as f:
+        for index, row in enumerate(csv.DictReader(f)):
+            yield _record_document(path, f"row-{index}", row)
+
+
+def _record_document(path: Path, key: str, record: Any) -> Document:
+    """Build a document from a JSON object or CSV row."""
+    if not isinstance(record, dict):
+        return Document(str(path), key, str(record))
+    
+    parts = [str(record[name]) for name in _TEXT_FIELDS if record.get(name)]
+    text = "\n".join(parts) if parts else item_text(record)
+    metadata = {
+        name: value for name, value in record.items()
+        if isinstance(value, (str, int, float, bool)) and name not in _TEXT_FIELDS
+    }
+    return Document(str(path), key, text, metadata)
+
+
+class IngestionPipeline:
+    """
+    Bulk ingestion of document files into one knowledge layer.
+    
+    Chunks are embedded ``embed_batch_size`` at a time and streamed into
+    ``VectorStore.store_items``, so embedding the next batch overlaps with
+    upserts of the previous ones while memory stays bounded. Chunk IDs are
+    derived from the file's source key and the chunk's position, making
+    re-runs idempotent, and share a per-file prefix, so chunks a changed
+    file no longer produces are listed and deleted after it is re-ingested.
+    The source key is the file's resolved path, relative to ``root`` when
+    one is given, so the same file gets the same IDs and checkpoint entry
+    whatever working directory or relative path it was ingested from.
+    """
+    
+    def __init__(
+        self,
+        vector_store,
+        embedding_service,
+        chapter_id: str,
+        layer: str = "semantic",
+        max_tokens: int = 256,
+        overlap: int = 32,
+        embed_batch_size: int = 64,
+        upsert_batch_size: int = 100,
+        max_concurrency: int = 4,
+        checkpoint_path: Optional[str] = None,
+        root: Optional[Union[str, Path]] = None,
+    ):
+        """
+        Initialize the pipeline.
+        
+        Args:
+            vector_store: Vector store receiving the chunks
+            embedding_service: Service embedding chunk text in batches
+            chapter_id: The ID of the GDG chapter
+            layer: Target knowledge layer
+            max_tokens: Most tokens per chunk
+            overlap: Tokens shared by consecutive chunks
+            embed_batch_size: Chunks per embedding call
+            upsert_batch_size: Vectors per upsert request
+            max_concurrency: Upsert requests in flight
+            checkpoint_path: JSON file recording completed files; None
+                disables resuming
+            root: Directory source keys are relative to, keeping chunk IDs
+                and checkpoints valid when the tree is moved; files outside
+                it are keyed on their absolute path
+        """
+        if max_tokens <= 0 or not 0 <= overlap < max_tokens:
+            raise ValueError(f"Invalid chunk size {max_tokens} with overlap {overlap}")
+        
+        self.vector_store = vector_store
+        self.embedding_service = embedding_service
+        self.chapter_id = chapter_id
+        self.layer = layer
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.upsert_batch_size = upsert_batch_size
+        self.max_concurrency = max_concurrency
+        self.checkpoint_path = checkpoint_path
+        self.root = Path(root).resolve() if root is not None else None
+        self._completed = self._load_checkpoint()
+    
+    async def run(self, paths: Iterable[Union[str, Path]]) -> IngestionResult:
+        """
+        Ingest files and directories.
+        
+        Files already recorded in the checkpoint with the same size and
+        modification time are skipped. A file is recorded once all of its
+        chunks were stored and its leftover chunks from earlier runs were
+        deleted.
+        
+        Args:
+            paths: Files and directories to ingest
+        
+        Returns:
+            Counts of files, documents and stored chunks, failures and
+            elapsed time
+        """
+        result = IngestionResult()
+        start = time.perf_counter()
+        
+        checkpoint = Path(self.checkpoint_path).resolve() if self.checkpoint_path else None
+        for path in iter_files(paths):
+            if path.resolve() == checkpoint:
+                continue
+            source = self.source_key(path)
+            signature = self._signature(path)
+            if self._completed.get(source) == signature:
+                result.skipped_files += 1
+                continue
+            
+            counts, chunk_ids = {"documents": 0}, set()
+            try:
+                written = await self.vector_store.store_items(
+                    self._items(path, source, counts, chunk_ids),
+                    batch_size=self.upsert_batch_size,
+                    max_concurrency=self.max_concurrency,
+                )
+                # Keep old chunks while some new ones are missing; the file is retried
+                if not written.failed:
+                    result.removed_chunks += await self._remove_stale_chunks(source, chunk_ids)
+            except Exception as e:
+                logger.error(f"Failed to ingest {path}: {e}")
+                result.failed.append({"source": source, "error": str(e)})
+                continue
+            
+            result.files += 1
+            result.documents += counts["documents"]
+            result.chunks += written.succeeded
+            result.failed.extend({"source": source, **failure} for failure in written.failed)
+            if not written.failed:
+                self._completed[source] = signature
+                self._save_checkpoint()
+        
+        result.elapsed = time.perf_counter() - start
+        logger.info(
+            f"Ingested {result.chunks} chunks from {result.files} files "
+            f"({result.items_per_second:.1f} items/sec)"
+        )
+        return result
+    
+    def source_key(self, path: Union[str, Path]) -> str:
+        """
+        Identify a file in chunk IDs, chunk metadata and the checkpoint.
+        
+        Args:
+            path: An ingested file
+        
+        Returns:
+            The file's resolved path, relative to ``root`` when it is inside it
+        """
+        path = Path(path).resolve()
+        if self.root is not None:
+            try:
+                return path.relative_to(self.root).as_posix()
+            except ValueError:
+                pass
+        return path.as_posix()
+    
+    async def _items(
+        self,
+        path: Path,
+        source: str,
+        counts: Dict[str, int],
+        chunk_ids: Set[str],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield embedded ``store_items`` entries for the chunks of a file, recording their IDs."""
+        created_at = datetime.now(timezone.utc).isoformat()
+        batch = []
+        for document in read_documents(path):
+            counts["documents"] += 1
+            for index, chunk in enumerate(chunk_text(document.text, self.max_tokens, self.overlap)):
+                batch.append((document, index, chunk))
+                if len(batch) >= self.embed_batch_size:
+                    for item in await self._embed_batch(batch, source, created_at):
+                        chunk_ids.add(item["item_id"])
+                        yield item
+                    batch = []
+        if batch:
+            for item in await self._embed_batch(batch, source, created_at):
+                chunk_ids.add(item["item_id"])
+                yield item
+    
+    async def _remove_stale_chunks(self, source: str, chunk_ids: Set[str]) -> int:
+        """
+        Delete chunks of a file that its latest ingestion did not write.
+        
+        Only the IDs under the file's prefix are listed; no chunk is fetched.
+        
+        Args:
+            source: Source key of the ingested file
+            chunk_ids: IDs of the chunks just written
+        
+        Returns:
+            Number of chunks deleted
+        """
+        stale = [
+            item_id
+            async for item_id in self.vector_store.list_ids(self.chapter_id, self.layer, prefix=self._file_prefix(source))
+            if item_id not in chunk_ids
+        ]
+        if not stale:
+            return 0
+        return await self.vector_store.delete(self.chapter_id, self.layer, stale)
+    
+    async def _embed_batch(self, batch: List[tuple], source: str, created_at: str) -> List[Dict[str, Any]]:
+        """Embed a batch of chunks with one call and build their items."""
+        embedding_service = self.vector_store.router.embedding_service_for(self.chapter_id, self.layer, self.embedding_service)
+        embeddings = await embedding_service.generate_embeddings([chunk for _, _, chunk in batch])
+        return [
+            {
+                "chapter_id": self.chapter_id,
+                "layer": self.layer,
+                "item_id": self._chunk_id(source, document, index),
+                "embedding": embedding,
+                "metadata": {
+                    **document.metadata,
+                    "type": "document_chunk",
+                    "source": source,
+                    "document_key": document.key,
+                    "chunk_index": index,
+                    "text": chunk,
+                    "chapter_id": self.chapter_id,
+                    "created_at": created_at,
+                    **embedding_service.model_metadata(embedding),
+                },
+            }
+            for (document, index, chunk), embedding in zip(batch, embeddings)
+        ]
+    
+    def _file_prefix(self, source: str) -> str:
+        """ID prefix shared by every chunk of a source file."""
+        digest = hashlib.blake2b(source.encode("utf-8"), digest_size=8).hexdigest()
+        return f"{self.layer}_doc_{digest}_"
+    
+    def _chunk_id(self, source: str, document: Document, index: int) -> str:
+        """Stable ID of a chunk derived from its source key and position."""
+        digest = hashlib.blake2b(document.key.encode("utf-8"), digest_size=4).hexdigest()
+        return f"{self._file_prefix(source)}{digest}_{index}"
+    
+    @staticmethod
+    def _signature(path: Path) -> Dict[str, Any]:
+        """Size and modification time identifying a file's contents."""
+        stat = path.stat()
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+    
+    def _load_checkpoint(self) -> Dict[str, Dict[str, Any]]:
+        """Read completed files from the checkpoint, if any."""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if (checkpoint.get("chapter_id"), checkpoint.get("layer")) != (self.chapter_id, self.layer):
+            logger.warning(f"Ignoring checkpoint {self.checkpoint_path} written for another chapter or layer")
+            return {}
+        return checkpoint.get("completed", {})
+    
+    def _save_checkpoint(self):
+        """Atomically rewrite the checkpoint file."""
+        if not self.checkpoint_path:
+            return
+        temporary = f"{self.checkpoint_path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"chapter_id": self.chapter_id, "layer": self.layer, "completed": self._completed}, f)
+        os.replace(temporary, self.checkpoint_path)
@@ -4,12 +4,16 @@ This service provides unified access to the Semantic, Kinetic, and Dynamic layer
 of the GDG Community knowledge system.
 """
 
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Awaitable, Union
 from datetime import datetime, timezone
 
 from .vector_store import VectorStore
 from .embedding_service import EmbeddingService
+from .backup import BackupResult, backup_chapter, restore_chapter
+from .ingestion import IngestionPipeline, IngestionResult
+from .ranking import merge_rankings, mmr_rerank
 from .semantic_layer import SemanticLayer
 from .kinetic_layer import KineticLayer
 from .dynamic_layer import DynamicLayer
@@ -17,6 +21,19 @@ from .dynamic_layer import DynamicLayer
 # Set up logging
 logger = logging.getLogger(__name__)
 
+KNOWLEDGE_LAYERS = ("semantic", "kinetic", "dynamic")
+
+# Seconds a single layer search may take before it is given up
+LAYER_SEARCH_TIMEOUT = 2.0
+
+# Category buckets of contextual knowledge recommendations
+RECOMMENDATION_BUCKETS = {
+    "template": "templates",
+    "workflow": "workflows",
+    "pattern": "patterns",
+    "insight": "insights",
+}
+
 class KnowledgeService:
     """
     Core service for accessing knowledge across all three layers.
@@ -45,9 +62,6 @@ class KnowledgeService:
         self.vector_store = vector_store or VectorStore()
         self.embedding_service = embedding_service or EmbeddingService()
         
-        # Initialize vector store
-        self.vector_store.initialize()
-        
         # Initialize the three layers
         self.semantic = SemanticLayer(
             chapter_id=chapter_id,
@@ -69,57 +83,201 @@ class KnowledgeService:
         
         logger.info(f"Knowledge service initialized for chapter: {chapter_id}")
     
+    async def start(self):
+        """
+        Check the knowledge layers before serving traffic.
+        
+        Raises:
+            ValueError: If a layer's index dimension does not match the
+                embedding model serving it
+        """
+        await self.vector_store.router.check_dimensions(
+            self.vector_store, self.chapter_id, KNOWLEDGE_LAYERS, self.embedding_service
+        )
+    
     async def search_across_layers(
         self,
         query: str,
         layers: Optional[List[str]] = None,
-        limit: int = 10
+        limit: int = 10,
+        timeout: Optional[float] = LAYER_SEARCH_TIMEOUT
     ) -> Dict[str, List[Dict[str, Any]]]:
         """
         Search for knowledge across multiple layers.
         
+        Each layer's ``search`` runs concurrently with the others. A layer
+        that fails or exceeds the timeout contributes no results instead
+        of failing or stalling the whole search. For one ranked list
+        searched with a shared query embedding, use ``retrieve``.
+        
         Args:
             query: Search query
             layers: List of layers to search ("semantic", "kinetic", "dynamic")
             limit: Maximum results per layer
+            timeout: Seconds each layer search may take (None waits)
             
         Returns:
             Dictionary mapping layer names to search results
         """
         if layers is None:
-            layers = ["semantic", "kinetic", "dynamic"]
+            layers = list(KNOWLEDGE_LAYERS)
+        layers = [layer for layer in KNOWLEDGE_LAYERS if layer in layers]
         
-        results = {}
+        searches = await asyncio.gather(*[
+            self._bounded_search(layer, getattr(self, layer).search(query, limit=limit), timeout)
+            for layer in layers
+        ])
+        results = dict(zip(layers, searches))
         
-        # Search semantic layer
-        if "semantic" in layers:
-            try:
-                semantic_results = await self.semantic.search(query, limit=limit)
-                results["semantic"] = semantic_results
-            except Exception as e:
-                logger.warning(f"Semantic layer search failed: {e}")
-                results["semantic"] = []
+        logger.info(f"Cross-layer search for '{query}' returned {sum(len(r) for r in results.values())} results")
+        return results
+    
+    async def _search_layer(
+        self,
+        layer: str,
+        query_embedding: Any,
+        limit: int,
+        timeout: Optional[float],
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search one layer's namespace with a precomputed query embedding.
         
-        # Search kinetic layer
-        if "kinetic" in layers:
-            try:
-                kinetic_results = await self.kinetic.search(query, limit=limit)
-                results["kinetic"] = kinetic_results
-            except Exception as e:
-                logger.warning(f"Kinetic layer search failed: {e}")
-                results["kinetic"] = []
+        Args:
+            layer: Layer to search
+            query_embedding: Embedding of the query
+            limit: Maximum results
+            timeout: Seconds the search may take (None waits)
+            filter: Optional metadata filter
         
-        # Search dynamic layer
-        if "dynamic" in layers:
+        Returns:
+            Matches (id, score, metadata); empty if the search failed or
+            timed out
+        """
+        return await self._bounded_search(
+            layer,
+            self.vector_store.query(
+                chapter_id=self.chapter_id,
+                layer=layer,
+                query_embedding=query_embedding,
+                filter=filter,
+                top_k=limit
+            ),
+            timeout
+        )
+    
+    @staticmethod
+    async def _bounded_search(layer: str, search: Awaitable[List[Dict[str, Any]]], timeout: Optional[float]) -> List[Dict[str, Any]]:
+        """
+        Await one layer's search, giving up on failure or timeout.
+        
+        On timeout the caller stops waiting, but a store call already
+        running on the vector store's thread pool finishes in the
+        background and holds its pending slot until it does.
+        
+        Args:
+            layer: Layer searched, for logging
+            search: The layer's search
+            timeout: Seconds the search may take (None waits)
+        
+        Returns:
+            The search results; empty if the search failed or timed out
+        """
+        try:
+            return await asyncio.wait_for(search, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{layer.capitalize()} layer search timed out after {timeout}s")
+            return []
+        except Exception as e:
+            logger.warning(f"{layer.capitalize()} layer search failed: {e}")
+            return []
+    
+    @staticmethod
+    def _as_item(layer: str, match: Dict[str, Any]) -> Dict[str, Any]:
+        """Flatten a match into its metadata with ID, score and layer."""
+        item = {**(match.get("metadata") or {}), "id": match["id"], "score": match["score"], "layer": layer}
+        if "raw_score" in match:
+            item["raw_score"] = match["raw_score"]
+        return item
+    
+    async def retrieve(
+        self,
+        query: str,
+        top_k: int = 10,
+        layers: Optional[List[str]] = None,
+        layer_weights: Optional[Dict[str, float]] = None,
+        diversity: float = 0.3,
+        candidates_per_layer: Optional[int] = None,
+        filter: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = LAYER_SEARCH_TIMEOUT
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve one ranked list of knowledge from several layers.
+        
+        The layers are searched concurrently, embedding the query once per
+        model serving them.
+        Layers are merged on their scores scaled by the layer's weight
+        (calibrated per model when a migration left them on different
+        embedding models, see ``merge_rankings``), duplicates (same item ID or same content) are dropped, and
+        the candidates are re-ranked with maximal marginal relevance so
+        near-identical items do not fill the top-k.
+        
+        Args:
+            query: Search query
+            top_k: Number of results to return
+            layers: Layers to search (defaults to all three)
+            layer_weights: Multiplier of each layer's raw scores
+                (default 1.0)
+            diversity: MMR redundancy penalty between 0 and 1; 0 ranks by
+                score alone and skips fetching item vectors
+            candidates_per_layer: Candidates taken from each layer
+                (defaults to ``top_k``)
+            filter: Optional metadata filter applied in every layer
+            timeout: Seconds each layer search may take (None waits)
+        
+        Returns:
+            Up to ``top_k`` items with their metadata, ID, weighted
+            ``score``, unweighted ``raw_score`` and layer
+        """
+        if layers is None:
+            layers = list(KNOWLEDGE_LAYERS)
+        layers = [layer for layer in KNOWLEDGE_LAYERS if layer in layers]
+        
+        try:
+            query_embeddings = await self.vector_store.router.embed_query(
+                self.chapter_id, layers, query, self.embedding_service
+            )
+        except Exception as e:
+            logger.warning(f"Embedding query for ranked retrieval failed: {e}")
+            return []
+        
+        searches = await asyncio.gather(*[
+            self._search_layer(layer, query_embeddings[layer], candidates_per_layer or top_k, timeout, filter)
+            for layer in layers
+        ])
+        candidates = merge_rankings(
+            dict(zip(layers, searches)),
+            layer_weights,
+            models={layer: self.vector_store.router.model_id(self.chapter_id, layer) for layer in layers},
+            calibrator=self.vector_store.score_calibrator,
+        )
+        
+        if diversity > 0 and len(candidates) > 1:
+            vectors = {}
             try:
-                dynamic_results = await self.dynamic.search(query, limit=limit)
-                results["dynamic"] = dynamic_results
+                fetched = await self.vector_store.fetch_many(
+                    (self.chapter_id, layer, [c["id"] for c in candidates if c["layer"] == layer])
+                    for layer in layers
+                )
+                for items in fetched.values():
+                    vectors.update((item_id, item["values"]) for item_id, item in items.items())
             except Exception as e:
-                logger.warning(f"Dynamic layer search failed: {e}")
-                results["dynamic"] = []
+                logger.warning(f"Fetching vectors for diversity re-ranking failed: {e}")
+            ranked = mmr_rerank(candidates, vectors, top_k, diversity) if vectors else candidates[:top_k]
+        else:
+            ranked = candidates[:top_k]
         
-        logger.info(f"Cross-layer search for '{query}' returned {sum(len(r) for r in results.values())} results")
-        return results
+        return [self._as_item(match["layer"], match) for match in ranked]
     
     async def get_contextual_knowledge(
         self,
@@ -133,43 +291,32 @@ class KnowledgeService:
         Args:
             context: Context description (e.g., "creating Flutter event")
             knowledge_type: Specific type to focus on (template, workflow, pattern)
-            limit: Maximum results per layer
+            limit: Maximum results per layer; the ranked list shares a
+                budget of ``limit`` times the number of layers
             
         Returns:
-            Structured knowledge response with recommendations
+            Structured knowledge response with recommendations, each
+            layer's own search results under ``search_results`` and one
+            ranked, deduplicated list across the layers under ``results``
         """
-        # Search across layers based on context
-        search_results = await self.search_across_layers(context, limit=limit)
+        search_results, ranked = await asyncio.gather(
+            self.search_across_layers(context, limit=limit),
+            self.retrieve(context, top_k=limit * len(KNOWLEDGE_LAYERS))
+        )
         
         # Organize results by relevance and type
         knowledge = {
             "context": context,
-            "recommendations": {
-                "templates": [],
-                "workflows": [],
-                "patterns": [],
-                "insights": []
-            },
+            "recommendations": {bucket: [] for bucket in RECOMMENDATION_BUCKETS.values()},
             "search_results": search_results,
+            "results": ranked,
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
         
-        # Extract templates from semantic layer
-        for item in search_results.get("semantic", []):
-            if item.get("category") == "template":
-                knowledge["recommendations"]["templates"].append(item)
-        
-        # Extract workflows from kinetic layer
-        for item in search_results.get("kinetic", []):
-            if item.get("category") == "workflow":
-                knowledge["recommendations"]["workflows"].append(item)
-        
-        # Extract patterns and insights from dynamic layer
-        for item in search_results.get("dynamic", []):
-            if item.get("category") == "pattern":
-                knowledge["recommendations"]["patterns"].append(item)
-            elif item.get("category") == "insight":
-                knowledge["recommendations"]["insights"].append(item)
+        for item in ranked:
+            bucket = RECOMMENDATION_BUCKETS.get(item.get("category"))
+            if bucket:
+                knowledge["recommendations"][bucket].append(item)
         
         return knowledge
     
@@ -206,6 +353,39 @@ class KnowledgeService:
         else:
             raise ValueError(f"Unknown layer: {layer}")
     
+    async def ingest_documents(
+        self,
+        paths: List[str],
+        layer: str = "semantic",
+        checkpoint_path: Optional[str] = None,
+        **options: Any
+    ) -> IngestionResult:
+        """
+        Ingest Markdown, JSON and CSV documents into a layer as chunks.
+        
+        Args:
+            paths: Files and directories to ingest
+            layer: Target layer ("semantic", "kinetic", "dynamic")
+            checkpoint_path: Optional file for resuming interrupted runs
+            **options: Further ``IngestionPipeline`` options (chunk size,
+                overlap, batch sizes, concurrency)
+            
+        Returns:
+            Ingestion counts, failures and throughput
+        """
+        if layer not in KNOWLEDGE_LAYERS:
+            raise ValueError(f"Unknown layer: {layer}")
+        
+        pipeline = IngestionPipeline(
+            vector_store=self.vector_store,
+            embedding_service=self.embedding_service,
+            chapter_id=self.chapter_id,
+            layer=layer,
+            checkpoint_path=checkpoint_path,
+            **options
+        )
+        return await pipeline.run(paths)
+    
     async def get_layer_statistics(self) -> Dict[str, Any]:
         """
         Get statistics about knowledge stored in each layer.
@@ -276,6 +456,10 @@ class KnowledgeService:
         """
         Create a backup of all knowledge in all layers.
         
+        Each layer exports its own data, without vectors. For a backup of
+        every item with its vector, use ``backup_knowledge_to``, which
+        streams to a file instead of building the backup in memory.
+        
         Returns:
             Backup data structure
         """
@@ -298,6 +482,45 @@ class KnowledgeService:
         
         return backup
     
+    async def backup_knowledge_to(self, path: str, page_size: int = 500) -> BackupResult:
+        """
+        Stream a backup of all knowledge in all layers to a file.
+        
+        Items are written to gzip-compressed NDJSON as each layer is
+        scanned, so memory use does not grow with the chapter.
+        
+        Args:
+            path: Backup file to write
+            page_size: Items fetched per scan request
+        
+        Returns:
+            Item counts and errors per layer
+        """
+        return await backup_chapter(self.vector_store, self.chapter_id, path, KNOWLEDGE_LAYERS, page_size=page_size)
+    
+    async def restore_knowledge_from(
+        self,
+        path: str,
+        layers: Optional[List[str]] = None,
+        batch_size: int = 100
+    ) -> BackupResult:
+        """
+        Restore knowledge from a file written by ``backup_knowledge_to``.
+        
+        Items are upserted in bulk with their stored vectors while the file
+        is read.
+        
+        Args:
+            path: Backup file to read
+            layers: Layers to restore (defaults to all in the backup)
+            batch_size: Maximum number of vectors per upsert request
+        
+        Returns:
+            Item counts per layer, upsert failures and whether the backup
+            file was complete
+        """
+        return await restore_chapter(self.vector_store, self.chapter_id, path, layers=layers, batch_size=batch_size)
+    
     async def restore_knowledge(self, backup_data: Dict[str, Any]) -> Dict[str, int]:
         """
         Restore knowledge from backup data.
@@ -319,7 +542,12 @@ class KnowledgeService:
                 try:
                     layer = getattr(self, layer_name)
                     layer_data = backup_data["layers"][layer_name]
-                    restored_count = await layer.import_data(layer_data)
+                    items = layer_data.get("items", [])
+                    if items and all("values" in item for item in items):
+                        # Items carry their vectors, so upsert them in bulk
+                        restored_count = await self._bulk_restore_layer(layer_name, items)
+                    else:
+                        restored_count = await layer.import_data(layer_data)
                     results[layer_name] = restored_count
                 except Exception as e:
                     logger.error(f"Failed to restore {layer_name} layer: {e}")
@@ -330,4 +558,31 @@ class KnowledgeService:
         total_restored = sum(results.values())
         logger.info(f"Restored {total_restored} knowledge items across all layers")
         
-        return results
\ No newline at end of file
+        return results
+    
+    async def _bulk_restore_layer(self, layer_name: str, items: List[Dict[str, Any]]) -> int:
+        """
+        Restore exported items of one layer with batched upserts.
+        
+        Args:
+            layer_name: Target layer
+            items: Exported items with "id", "values" and "metadata" keys
+            
+        Returns:
+            Number of items restored
+        """
+        result = await self.vector_store.store_items(
+            {
+                "chapter_id": self.chapter_id,
+                "layer": layer_name,
+                "item_id": item["id"],
+                "embedding": item["values"],
+                "metadata": item.get("metadata", {}),
+            }
+            for item in items
+        )
+        
+        for failure in result.failed:
+            logger.warning(f"Failed to restore {layer_name} item {failure['id']}: {failure['error']}")
+        
+        return result.succeeded
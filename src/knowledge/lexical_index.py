@@ -0,0 +1,201 @@
+"""Lexical (BM25) retrieval for the knowledge management system.
+
+Keeps an incrementally updated inverted index over the text of stored
+items, so keyword-style lookups such as ``"brand voice guidelines"`` can be
+answered without an embedding call and fused with vector results.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Any, Iterable, Sequence, Tuple
+
+from .filters import matches_filter
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Words too common to help ranking
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in",
+    "is", "it", "of", "on", "or", "the", "to", "with",
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric terms, dropping stopwords."""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def item_text(metadata: Dict[str, Any]) -> str:
+    """
+    Collect the searchable text of an item's metadata.
+    
+    String values are gathered recursively together with the keys of
+    nested content (``{"tone": ...}`` makes the item match "tone"), so
+    the item type and structured content are both searchable.
+    """
+    parts: List[str] = []
+    
+    def collect(value: Any):
+        if isinstance(value, str):
+            parts.append(value)
+        elif isinstance(value, dict):
+            for key, nested in value.items():
+                parts.append(str(key))
+                collect(nested)
+        elif isinstance(value, (list, tuple)):
+            for nested in value:
+                collect(nested)
+    
+    collect(metadata)
+    return " ".join(parts)
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[str]], k: int = 60) -> Dict[str, float]:
+    """
+    Fuse ranked ID lists with reciprocal rank fusion.
+    
+    Args:
+        rankings: ID lists, each ordered best first
+        k: Rank offset damping the weight of top positions
+    
+    Returns:
+        Mapping of ID to fused score (higher is better)
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] += 1.0 / (k + rank)
+    return scores
+
+
+class BM25Index:
+    """
+    Incrementally updated Okapi BM25 index.
+    
+    Postings map each term to the term frequency per document; document
+    lengths and the corpus length are maintained on every upsert and
+    removal, so no rebuild is needed. With ``max_documents``, the least
+    recently written documents are dropped once the index is full.
+    
+    ``version`` counts the writes and deletes applied to the index and
+    ``synced_at`` records when it last loaded every item of its namespace;
+    ``VectorStore`` compares both with its own write bookkeeping to decide
+    whether the index can answer a query on its own.
+    """
+    
+    def __init__(self, k1: float = 1.5, b: float = 0.75, max_documents: Optional[int] = None):
+        """
+        Initialize an empty index.
+        
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization strength
+            max_documents: Maximum number of indexed documents (None for
+                no limit)
+        """
+        self.k1 = k1
+        self.b = b
+        self.max_documents = max_documents
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._lengths: Dict[str, int] = {}
+        self._terms: Dict[str, Tuple[str, ...]] = {}
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        self._total_length = 0
+        self.version = 0
+        self.synced_at: Optional[float] = None
+    
+    def __len__(self) -> int:
+        return len(self._lengths)
+    
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._lengths
+    
+    def upsert(self, item_id: str, text: str, metadata: Dict[str, Any]):
+        """
+        Index or re-index a document.
+        
+        Args:
+            item_id: Document ID
+            text: Searchable text
+            metadata: Metadata used for filtering and returned with results
+        """
+        self.remove(item_id)
+        
+        counts = Counter(tokenize(text))
+        for term, count in counts.items():
+            self._postings[term][item_id] = count
+        length = sum(counts.values())
+        self._lengths[item_id] = length
+        self._terms[item_id] = tuple(counts)
+        self._metadata[item_id] = metadata
+        self._total_length += length
+        
+        # Lengths are kept in write order, oldest first
+        if self.max_documents is not None:
+            while len(self) > self.max_documents:
+                self.remove(next(iter(self._lengths)))
+    
+    def remove(self, item_id: str):
+        """Remove a document if it is indexed."""
+        if item_id not in self._lengths:
+            return
+        
+        for term in self._terms.pop(item_id):
+            postings = self._postings[term]
+            postings.pop(item_id, None)
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(item_id)
+        del self._metadata[item_id]
+    
+    def _idf(self, term: str) -> float:
+        frequency = len(self._postings.get(term, ()))
+        return math.log(1 + (len(self) - frequency + 0.5) / (frequency + 0.5))
+    
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[str, float, float, Dict[str, Any]]]:
+        """
+        Rank documents against a keyword query.
+        
+        Args:
+            query: Query text
+            top_k: Number of results to return
+            filter: Optional metadata filter
+        
+        Returns:
+            ``(id, score, coverage, metadata)`` tuples ordered by descending
+            BM25 score. ``coverage`` is the IDF-weighted fraction of query
+            terms the document contains (1.0 means all of them).
+        """
+        terms = set(tokenize(query))
+        if top_k <= 0 or not terms or not len(self):
+            return []
+        
+        average_length = self._total_length / len(self) or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+        matched: Dict[str, float] = defaultdict(float)
+        total_idf = 0.0
+        
+        for term in terms:
+            idf = self._idf(term)
+            total_idf += idf
+            for item_id, frequency in self._postings.get(term, {}).items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[item_id] / average_length)
+                scores[item_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+                matched[item_id] += idf
+        
+        ranked = sorted(scores.items(), key=lambda entry: (-entry[1], entry[0]))
+        results = []
+        for item_id, score in ranked:
+            metadata = self._metadata[item_id]
+            if filter and not matches_filter(metadata, filter):
+                continue
+            results.append((item_id, score, matched[item_id] / total_idf, metadata))
+            if len(results) == top_k:
+                break
+        return results
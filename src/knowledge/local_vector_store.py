@@ -0,0 +1,542 @@
+"""In-process vector store backend for the knowledge management system.
+
+Keeps every namespace in a contiguous float32 NumPy matrix, in memory or as
+memory-mapped segment files, so small chapters, tests and benchmarks can run
+without Pinecone.
+"""
+
+import asyncio
+import bisect
+import os
+from typing import Dict, List, Optional, Any, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from .document_store import SQLiteDocumentStore
+from .route_store import LayerRouter
+from .filters import matches_filter
+from .hnsw_index import HNSWIndex
+from .segment_store import SegmentedNamespace
+from .vector_store import VectorStore
+
+# Guards cosine similarity against zero-length vectors
+_EPSILON = 1e-12
+
+
+class FlatIndex:
+    """
+    Exact nearest-neighbour index over a contiguous float32 matrix.
+    
+    Rows are stored in insertion order; a query scores every (filtered) row
+    with a single matrix-vector product and selects the top-k with
+    ``argpartition``. Deleted rows are tombstoned and dropped by
+    ``compact``. Every row also keeps the position it was appended at,
+    which paging uses as its offset, so compaction never shifts a scan.
+    """
+    
+    def __init__(self, dimension: int, metric: str = "cosine"):
+        """
+        Initialize an empty index.
+        
+        Args:
+            dimension: Dimension of the stored vectors
+            metric: Similarity metric ("cosine" or "dotproduct")
+        """
+        if metric not in ("cosine", "dotproduct"):
+            raise ValueError(f"Unsupported metric: {metric}")
+        
+        self.dimension = dimension
+        self.metric = metric
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self._positions: List[int] = []
+        self._next_position = 0
+        self._rows: Dict[str, int] = {}
+        self._vectors = np.empty((0, dimension), dtype=np.float32)
+        self._norms = np.empty(0, dtype=np.float32)
+        self._dead: Set[int] = set()
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def _as_matrix(self, vectors: Sequence[Sequence[float]]) -> np.ndarray:
+        """Convert vectors to a 2-D float32 matrix of the index dimension."""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if matrix.shape[1] != self.dimension:
+            raise ValueError(
+                f"Vector dimension {matrix.shape[1]} does not match index dimension {self.dimension}"
+            )
+        return matrix
+    
+    def _reserve(self, count: int):
+        """Grow the backing matrix so ``count`` rows fit, doubling capacity."""
+        capacity = self._vectors.shape[0]
+        if count <= capacity:
+            return
+        
+        new_capacity = max(count, 2 * capacity, 64)
+        vectors = np.empty((new_capacity, self.dimension), dtype=np.float32)
+        vectors[:len(self)] = self._vectors[:len(self)]
+        norms = np.empty(new_capacity, dtype=np.float32)
+        norms[:len(self)] = self._norms[:len(self)]
+        self._vectors, self._norms = vectors, norms
+    
+    def upsert(
+        self,
+        ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        metadata: Sequence[Dict[str, Any]],
+    ):
+        """
+        Insert or overwrite items.
+        
+        Args:
+            ids: Item IDs
+            vectors: One vector per item
+            metadata: One metadata dict per item
+        """
+        matrix = self._as_matrix(vectors)
+        norms = np.linalg.norm(matrix, axis=1)
+        self._reserve(len(self) + len(ids))
+        
+        rows = []
+        for item_id, item_metadata in zip(ids, metadata):
+            row = self._rows.get(item_id)
+            if row is None:
+                row = len(self)
+                self._rows[item_id] = row
+                self.ids.append(item_id)
+                self.metadata.append(dict(item_metadata))
+                self._positions.append(self._next_position)
+                self._next_position += 1
+            else:
+                self.metadata[row] = dict(item_metadata)
+            rows.append(row)
+        
+        self._write(np.asarray(rows, dtype=np.intp), matrix, norms)
+    
+    def _write(self, rows: np.ndarray, matrix: np.ndarray, norms: np.ndarray):
+        """Store vectors and their norms at the given rows."""
+        self._vectors[rows] = matrix
+        self._norms[rows] = norms
+    
+    def _vector(self, row: int) -> np.ndarray:
+        """Return the stored vector of a row."""
+        return self._vectors[row]
+    
+    def _scores(self, rows: Optional[np.ndarray], query_vector: np.ndarray) -> np.ndarray:
+        """Similarity of the query to the given rows (all rows if ``None``)."""
+        if rows is None:
+            vectors, norms = self._vectors[:len(self)], self._norms[:len(self)]
+        else:
+            vectors, norms = self._vectors[rows], self._norms[rows]
+        
+        scores = vectors @ query_vector
+        if self.metric == "cosine":
+            scores /= np.maximum(norms * np.linalg.norm(query_vector), _EPSILON)
+        return scores
+    
+    def get(self, item_id: str) -> Optional[Tuple[np.ndarray, Dict[str, Any]]]:
+        """Return the stored vector and metadata for an ID, if present."""
+        row = self._rows.get(item_id)
+        if row is None:
+            return None
+        return self._vector(row), self.metadata[row]
+    
+    def delete(self, ids: Sequence[str]) -> int:
+        """
+        Delete items by ID, tombstoning their rows.
+        
+        Args:
+            ids: IDs to delete; unknown IDs are ignored
+        
+        Returns:
+            Number of items deleted
+        """
+        deleted = 0
+        for item_id in ids:
+            row = self._rows.pop(item_id, None)
+            if row is not None:
+                self._dead.add(row)
+                self.metadata[row] = {}
+                deleted += 1
+        return deleted
+    
+    @property
+    def dead_rows(self) -> int:
+        """Number of tombstoned rows awaiting compaction."""
+        return len(self._dead)
+    
+    def compact(self) -> int:
+        """
+        Drop tombstoned rows and release their storage.
+        
+        Rows are renumbered but keep their append positions, so scans
+        paging through the index meanwhile are unaffected.
+        
+        Returns:
+            Number of rows removed
+        """
+        if not self._dead:
+            return 0
+        
+        keep = np.flatnonzero(self._alive_mask())
+        self._take(keep)
+        self.ids = [self.ids[row] for row in keep]
+        self.metadata = [self.metadata[row] for row in keep]
+        self._positions = [self._positions[row] for row in keep]
+        self._rows = {item_id: row for row, item_id in enumerate(self.ids)}
+        
+        removed = len(self._dead)
+        self._dead = set()
+        return removed
+    
+    def _take(self, rows: np.ndarray):
+        """Keep only the given rows of the backing storage, in order."""
+        self._vectors = self._vectors[rows]
+        self._norms = self._norms[rows]
+    
+    def _alive_mask(self) -> np.ndarray:
+        """Boolean mask of rows that are not tombstoned."""
+        alive = np.ones(len(self), dtype=bool)
+        alive[list(self._dead)] = False
+        return alive
+    
+    def ids_page(self, offset: int, limit: int) -> Tuple[List[str], Optional[int]]:
+        """
+        Return the live IDs among ``limit`` rows in insertion order from ``offset``.
+        
+        Offsets are append positions rather than row numbers, so they stay
+        valid when ``compact`` runs between pages.
+        
+        Returns:
+            The IDs and the offset of the next page (``None`` at the end)
+        """
+        first = bisect.bisect_left(self._positions, offset)
+        end = first + limit
+        ids = [
+            item_id for row, item_id in enumerate(self.ids[first:end], start=first)
+            if row not in self._dead
+        ]
+        return ids, self._positions[end - 1] + 1 if end < len(self) else None
+    
+    def memory_bytes(self) -> int:
+        """Bytes used by stored vectors and norms."""
+        return self._vectors[:len(self)].nbytes + self._norms[:len(self)].nbytes
+    
+    def search(
+        self,
+        query: Sequence[float],
+        top_k: int,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Find the most similar items.
+        
+        Args:
+            query: Query vector
+            top_k: Number of results to return
+            filter: Optional metadata filter
+        
+        Returns:
+            ``(id, score, metadata)`` tuples ordered by descending score
+        """
+        if top_k <= 0 or not len(self):
+            return []
+        
+        query_vector = self._as_matrix(query)[0]
+        
+        if filter:
+            rows = np.fromiter(
+                (row for row, item_metadata in enumerate(self.metadata)
+                 if row not in self._dead and matches_filter(item_metadata, filter)),
+                dtype=np.intp,
+            )
+        elif self._dead:
+            rows = np.flatnonzero(self._alive_mask())
+        else:
+            rows = None
+        if rows is not None and not rows.size:
+            return []
+        
+        scores = self._scores(rows, query_vector)
+        
+        k = min(top_k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        
+        results = []
+        for position in top:
+            row = int(rows[position]) if rows is not None else int(position)
+            results.append((self.ids[row], float(scores[position]), self.metadata[row]))
+        return results
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process ``VectorStore`` backend built on NumPy.
+    
+    Each namespace (``get_namespace(chapter_id, layer)``) is held in its own
+    index: an exact ``FlatIndex`` by default, or an approximate
+    ``HNSWIndex`` for namespaces that grow large. With a ``data_dir``,
+    namespaces are persisted as memory-mapped segments instead, so a
+    restarted process reopens them lazily on first use. Queries use the same
+    metadata filter syntax as Pinecone and return results in the same
+    format, so the agents and knowledge service can use this store as a
+    drop-in replacement.
+    """
+    
+    def __init__(
+        self,
+        namespace_prefix: str = "gdg",
+        metric: str = "cosine",
+        index_type: str = "flat",
+        index_options: Optional[Dict[str, Any]] = None,
+        data_dir: Optional[str] = None,
+        segment_size: int = 10000,
+        max_segments: int = 8,
+        quantization: Optional[str] = None,
+        rescore: int = 0,
+        query_cache_size: int = 1024,
+        query_cache_ttl: float = 300.0,
+        lexical_index: bool = True,
+        lexical_index_ttl: Optional[float] = None,
+        document_store: Optional[SQLiteDocumentStore] = None,
+        router: Optional[LayerRouter] = None,
+    ):
+        """
+        Initialize the local vector store.
+        
+        Args:
+            namespace_prefix: Prefix for namespaces
+            metric: Similarity metric ("cosine" or "dotproduct")
+            index_type: Index used for new namespaces ("flat" or "hnsw")
+            index_options: Extra index arguments, e.g. ``{"M": 16, "ef_search": 64}``
+                for HNSW
+            data_dir: Optional directory for persisted namespace segments
+            segment_size: Maximum rows per persisted segment
+            max_segments: Sealed segments per namespace before background compaction
+            quantization: Optional code type for flat in-memory namespaces
+                ("int8" or "float16")
+            rescore: With quantization, rescore the top ``top_k * rescore``
+                candidates against full-precision vectors kept in a
+                memory-mapped file (0 disables; ``index_options`` may set
+                its ``rescore_dir``)
+            query_cache_size: Maximum number of cached query results
+                (0 disables the query cache)
+            query_cache_ttl: Seconds a cached query result stays valid
+            lexical_index: Maintain a BM25 index over item text for
+                ``hybrid_query``
+            lexical_index_ttl: Seconds a scanned lexical index stays
+                decisive; None (the default) trusts it indefinitely, as
+                only this process writes to its namespaces
+            document_store: Optional side-car store for full item metadata
+            router: Optional routes of layers switched by embedding migrations
+        """
+        if index_type not in ("flat", "hnsw"):
+            raise ValueError(f"Unsupported index type: {index_type}")
+        if data_dir and index_type != "flat":
+            raise ValueError("Persisted segments support only the flat index type")
+        if quantization and (data_dir or index_type != "flat"):
+            raise ValueError("Quantization is supported only for in-memory flat indexes")
+        
+        super().__init__(
+            namespace_prefix=namespace_prefix,
+            query_cache_size=query_cache_size,
+            query_cache_ttl=query_cache_ttl,
+            lexical_index=lexical_index,
+            # Every item lives in this process anyway, so the index is unbounded
+            lexical_index_size=None,
+            lexical_index_ttl=lexical_index_ttl,
+            document_store=document_store,
+            router=router,
+        )
+        self.metric = metric
+        self.index_type = index_type
+        self.index_options = index_options or {}
+        self.data_dir = data_dir
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        self.quantization = quantization
+        self.rescore = rescore
+        self._namespaces: Dict[str, Any] = {}
+    
+    def initialize(self):
+        """
+        Mark the store ready; there is no remote index to connect to.
+        
+        Persisted namespaces are not read here; each one is opened on first
+        access, so start-up cost does not grow with the data on disk.
+        """
+        if self.data_dir:
+            os.makedirs(self.data_dir, exist_ok=True)
+        self._initialized = True
+    
+    def close(self):
+        """Wait for background compactions and release the thread pool."""
+        for index in self._namespaces.values():
+            if isinstance(index, SegmentedNamespace):
+                index.wait_for_compaction()
+        super().close()
+    
+    async def compact(self) -> int:
+        """
+        Merge the sealed segments of every open persisted namespace.
+        
+        Runs on a worker thread so queries keep being served meanwhile.
+        
+        Returns:
+            Number of segments merged
+        """
+        loop = asyncio.get_running_loop()
+        merged = 0
+        for index in list(self._namespaces.values()):
+            if isinstance(index, SegmentedNamespace):
+                merged += await loop.run_in_executor(None, index.compact)
+        return merged
+    
+    def _get_index(self, namespace: str):
+        """Return a namespace's index, opening persisted namespaces lazily."""
+        index = self._namespaces.get(namespace)
+        if index is None and self.data_dir and os.path.isdir(os.path.join(self.data_dir, namespace)):
+            index = self._create_index(namespace, dimension=None)
+            self._namespaces[namespace] = index
+        return index
+    
+    def _create_index(self, namespace: str, dimension: Optional[int]):
+        """Create an empty index for a new namespace."""
+        if self.data_dir:
+            return SegmentedNamespace(
+                path=os.path.join(self.data_dir, namespace),
+                metric=self.metric,
+                segment_size=self.segment_size,
+                max_segments=self.max_segments,
+            )
+        if self.index_type == "hnsw":
+            return HNSWIndex(dimension=dimension, metric=self.metric, **self.index_options)
+        if self.quantization:
+            from .quantization import QuantizedFlatIndex
+            
+            return QuantizedFlatIndex(
+                dimension=dimension,
+                metric=self.metric,
+                quantization=self.quantization,
+                rescore=self.rescore,
+                **self.index_options,
+            )
+        return FlatIndex(dimension=dimension, metric=self.metric)
+    
+    def save_index(self, chapter_id: str, layer: str, path: str):
+        """
+        Save a namespace's HNSW index to disk.
+        
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layer: The knowledge layer
+            path: Directory to write the index to
+        """
+        index = self._namespaces.get(self.get_namespace(chapter_id, layer))
+        if not isinstance(index, HNSWIndex):
+            raise ValueError(f"No HNSW index for chapter {chapter_id} layer {layer}")
+        index.save(path)
+    
+    def load_index(self, chapter_id: str, layer: str, path: str):
+        """
+        Load a namespace's HNSW index from disk, replacing any current index.
+        
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layer: The knowledge layer
+            path: Directory written by ``save_index``
+        """
+        namespace = self.get_namespace(chapter_id, layer)
+        self._namespaces[namespace] = HNSWIndex.load(path)
+        self.query_cache.invalidate(namespace)
+        # The loaded items were not written through this store
+        self._lexical.pop(namespace, None)
+    
+    async def _run(self, func, *args, **kwargs):
+        # In-process operations are short and CPU-bound, so run them inline
+        return func(*args, **kwargs)
+    
+    def _upsert(self, namespace: str, vectors: List[tuple]):
+        """Upsert ``(id, embedding, metadata)`` tuples into a namespace."""
+        ids, embeddings, metadata = zip(*vectors)
+        index = self._get_index(namespace)
+        if index is None:
+            index = self._create_index(namespace, len(embeddings[0]))
+            self._namespaces[namespace] = index
+        index.upsert(ids, embeddings, metadata)
+    
+    def _delete(self, namespace: str, ids: List[str]):
+        """Delete vectors by ID from a namespace."""
+        index = self._get_index(namespace)
+        if index is not None:
+            index.delete(ids)
+    
+    def _dimension(self, namespace: str) -> Optional[int]:
+        """Dimension of a namespace's index; None until its first write."""
+        index = self._get_index(namespace)
+        if index is None:
+            return None
+        # Sizing a persisted namespace opens it, which reads its dimension
+        len(index)
+        return index.dimension
+    
+    def _reclaim(self, namespace: str):
+        """Compact a namespace once deletes have left enough dead rows."""
+        index = self._get_index(namespace)
+        if isinstance(index, SegmentedNamespace):
+            index.compact(background=True)
+        elif isinstance(index, FlatIndex) and index.dead_rows * 4 >= len(index):
+            index.compact()
+    
+    def _list_ids(
+        self,
+        namespace: str,
+        limit: int,
+        token: Optional[str],
+        prefix: Optional[str] = None,
+    ) -> Tuple[List[str], Optional[str]]:
+        """List one page of a namespace's IDs; the token is a row offset."""
+        index = self._get_index(namespace)
+        if index is None:
+            return [], None
+        
+        ids, next_offset = index.ids_page(int(token or 0), limit)
+        if prefix:
+            ids = [item_id for item_id in ids if item_id.startswith(prefix)]
+        return ids, str(next_offset) if next_offset is not None else None
+    
+    def _fetch(self, namespace: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch vectors by ID from a namespace and format them."""
+        index = self._get_index(namespace)
+        if index is None:
+            return {}
+        
+        items = {}
+        for item_id in ids:
+            stored = index.get(item_id)
+            if stored is not None:
+                vector, metadata = stored
+                items[item_id] = {"id": item_id, "values": vector.tolist(), "metadata": dict(metadata)}
+        return items
+    
+    def _query(
+        self,
+        namespace: str,
+        query_embedding: Union[List[float], np.ndarray],
+        filter: Optional[Dict[str, Any]],
+        top_k: int,
+    ) -> List[Dict[str, Any]]:
+        """Run a similarity query against a namespace and format the matches."""
+        index = self._get_index(namespace)
+        if index is None:
+            return []
+        
+        return [
+            {"id": item_id, "score": score, "metadata": dict(metadata)}
+            for item_id, score, metadata in index.search(query_embedding, top_k, filter)
+        ]
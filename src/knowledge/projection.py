@@ -0,0 +1,306 @@
+"""Dimensionality reduction for stored embeddings.
+
+A projection maps full model embeddings to fewer dimensions before they
+are cached, stored and queried, so index memory and distance computation
+shrink proportionally. Two kinds are supported: PCA fitted over a
+chapter's existing vectors, and prefix truncation for Matryoshka-style
+models whose leading dimensions carry most of the signal.
+
+Projections are identified by a content hash. They are saved under a
+directory holding one subdirectory per version and a ``current`` pointer,
+so a new fit never overwrites the matrix existing vectors were made with.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any, Iterable, Sequence, Union
+
+import numpy as np
+
+# Guards normalization of vectors projected to zero
+_EPSILON = 1e-12
+
+PROJECTION_KINDS = ("pca", "truncate")
+
+
+class Projection:
+    """
+    Linear projection of embeddings to a lower dimension.
+    
+    Projected vectors are L2-normalized, which keeps cosine scores
+    comparable and is required for truncated Matryoshka embeddings.
+    """
+    
+    def __init__(
+        self,
+        kind: str,
+        source_model: str,
+        source_dimension: int,
+        dimension: int,
+        components: Optional[np.ndarray] = None,
+        mean: Optional[np.ndarray] = None,
+        explained_variance: Optional[float] = None,
+        fitted_at: Optional[str] = None,
+    ):
+        """
+        Initialize a projection.
+        
+        Args:
+            kind: "pca" or "truncate"
+            source_model: Model ID of the embeddings being projected
+            source_dimension: Dimension of the model embeddings
+            dimension: Dimension of the projected vectors
+            components: ``source_dimension x dimension`` matrix (PCA only)
+            mean: Mean subtracted before projecting (PCA only)
+            explained_variance: Fraction of the fitted variance kept
+            fitted_at: ISO timestamp of the fit
+        """
+        if kind not in PROJECTION_KINDS:
+            raise ValueError(f"Unsupported projection kind: {kind}")
+        if not 0 < dimension <= source_dimension:
+            raise ValueError(f"Invalid projection from {source_dimension} to {dimension} dimensions")
+        if kind == "pca" and (components is None or components.shape != (source_dimension, dimension)):
+            raise ValueError("PCA projection needs a source_dimension x dimension components matrix")
+        
+        self.kind = kind
+        self.source_model = source_model
+        self.source_dimension = source_dimension
+        self.dimension = dimension
+        self.components = None if components is None else np.ascontiguousarray(components, dtype=np.float32)
+        self.mean = None if mean is None else np.ascontiguousarray(mean, dtype=np.float32)
+        self.explained_variance = explained_variance
+        self.fitted_at = fitted_at or datetime.now(timezone.utc).isoformat()
+        self.version = self._digest()
+    
+    @property
+    def model_id(self) -> str:
+        """Identifier of the projected embeddings, used in cache keys and item metadata."""
+        return f"{self.source_model}+{self.kind}{self.dimension}-{self.version}"
+    
+    @classmethod
+    def fit_pca(cls, vectors: Sequence[Sequence[float]], dimension: int, source_model: str) -> "Projection":
+        """
+        Fit a PCA projection over sample embeddings.
+        
+        Args:
+            vectors: Sample embeddings of the source model, one per row
+            dimension: Dimension of the projected vectors
+            source_model: Model ID of the sample embeddings
+        
+        Returns:
+            Projection onto the top principal components
+        """
+        matrix = np.asarray(vectors, dtype=np.float64)
+        if matrix.ndim != 2 or len(matrix) < 2:
+            raise ValueError("PCA needs at least two sample vectors")
+        
+        mean = matrix.mean(axis=0)
+        centered = matrix - mean
+        # Eigenvectors of the d x d covariance are cheaper than an SVD of
+        # the samples whenever there are more samples than dimensions
+        eigenvalues, eigenvectors = np.linalg.eigh(centered.T @ centered)
+        order = np.argsort(eigenvalues)[::-1][:dimension]
+        total = float(eigenvalues.clip(min=0).sum())
+        kept = float(eigenvalues[order].clip(min=0).sum())
+        
+        return cls(
+            kind="pca",
+            source_model=source_model,
+            source_dimension=matrix.shape[1],
+            dimension=dimension,
+            components=eigenvectors[:, order],
+            mean=mean,
+            explained_variance=kept / total if total > 0 else 1.0,
+        )
+    
+    @classmethod
+    def truncate(cls, source_dimension: int, dimension: int, source_model: str) -> "Projection":
+        """
+        Build a prefix-truncation projection for Matryoshka-style models.
+        
+        Args:
+            source_dimension: Dimension of the model embeddings
+            dimension: Number of leading dimensions kept
+            source_model: Model ID of the embeddings
+        
+        Returns:
+            Projection keeping the first ``dimension`` coordinates
+        """
+        return cls(kind="truncate", source_model=source_model, source_dimension=source_dimension, dimension=dimension)
+    
+    def apply(self, vectors: Union[Sequence[float], Sequence[Sequence[float]], np.ndarray]) -> np.ndarray:
+        """
+        Project embeddings.
+        
+        Args:
+            vectors: One embedding or a matrix with one embedding per row
+        
+        Returns:
+            float32 L2-normalized vector or matrix of the projected dimension
+        """
+        matrix = np.asarray(vectors, dtype=np.float32)
+        single = matrix.ndim == 1
+        matrix = np.atleast_2d(matrix)
+        if matrix.shape[1] != self.source_dimension:
+            raise ValueError(
+                f"Vector dimension {matrix.shape[1]} does not match projection source dimension {self.source_dimension}"
+            )
+        
+        if self.kind == "pca":
+            reduced = (matrix - self.mean) @ self.components
+        else:
+            reduced = np.array(matrix[:, :self.dimension])
+        reduced /= np.maximum(np.linalg.norm(reduced, axis=1, keepdims=True), _EPSILON)
+        return reduced[0] if single else reduced
+    
+    def save(self, root: str) -> str:
+        """
+        Save the projection as a new version and make it current.
+        
+        Args:
+            root: Directory holding projection versions; created if missing
+        
+        Returns:
+            Directory the version was written to
+        """
+        path = os.path.join(root, self.version)
+        os.makedirs(path, exist_ok=True)
+        if self.kind == "pca":
+            np.savez(os.path.join(path, "projection.npz"), components=self.components, mean=self.mean)
+        with open(os.path.join(path, "projection.json"), "w") as f:
+            json.dump(self._header(), f)
+        
+        # Switch the pointer atomically so readers never see a partial version
+        temporary = os.path.join(root, "current.tmp")
+        with open(temporary, "w") as f:
+            f.write(self.version)
+        os.replace(temporary, os.path.join(root, "current"))
+        return path
+    
+    @classmethod
+    def load(cls, root: str, version: Optional[str] = None) -> "Projection":
+        """
+        Load a saved projection.
+        
+        Args:
+            root: Directory passed to ``save``
+            version: Version to load; defaults to the current one
+        
+        Returns:
+            The restored projection
+        """
+        if version is None:
+            with open(os.path.join(root, "current")) as f:
+                version = f.read().strip()
+        path = os.path.join(root, version)
+        with open(os.path.join(path, "projection.json")) as f:
+            header = json.load(f)
+        
+        components = mean = None
+        if header["kind"] == "pca":
+            with np.load(os.path.join(path, "projection.npz")) as arrays:
+                components, mean = arrays["components"], arrays["mean"]
+        
+        projection = cls(
+            kind=header["kind"],
+            source_model=header["source_model"],
+            source_dimension=header["source_dimension"],
+            dimension=header["dimension"],
+            components=components,
+            mean=mean,
+            explained_variance=header.get("explained_variance"),
+            fitted_at=header.get("fitted_at"),
+        )
+        if projection.version != version:
+            raise ValueError(f"Projection {path} does not match its version {version}")
+        return projection
+    
+    @staticmethod
+    def versions(root: str) -> List[str]:
+        """
+        List the saved versions of a projection directory.
+        
+        Args:
+            root: Directory passed to ``save``
+        
+        Returns:
+            Version names, oldest fit first
+        """
+        if not os.path.isdir(root):
+            return []
+        headers = []
+        for name in os.listdir(root):
+            header_path = os.path.join(root, name, "projection.json")
+            if os.path.isfile(header_path):
+                with open(header_path) as f:
+                    headers.append((json.load(f).get("fitted_at", ""), name))
+        return [name for _, name in sorted(headers)]
+    
+    def _header(self) -> Dict[str, Any]:
+        """Describe the projection without its arrays."""
+        return {
+            "kind": self.kind,
+            "source_model": self.source_model,
+            "source_dimension": self.source_dimension,
+            "dimension": self.dimension,
+            "explained_variance": self.explained_variance,
+            "fitted_at": self.fitted_at,
+            "version": self.version,
+        }
+    
+    def _digest(self) -> str:
+        """Content hash of the projection's definition and arrays."""
+        digest = hashlib.blake2b(digest_size=6)
+        digest.update(f"{self.kind}\0{self.source_model}\0{self.source_dimension}\0{self.dimension}".encode("utf-8"))
+        for array in (self.components, self.mean):
+            if array is not None:
+                digest.update(array.tobytes())
+        return digest.hexdigest()
+
+
+async def fit_chapter_projection(
+    vector_store,
+    chapter_id: str,
+    layers: Iterable[str],
+    dimension: int,
+    source_model: str,
+    max_samples: int = 20000,
+    page_size: int = 500,
+) -> Projection:
+    """
+    Fit a PCA projection over a chapter's stored embeddings.
+    
+    Only vectors recorded as made by ``source_model`` are sampled, so a
+    chapter partly migrated to another model still fits cleanly.
+    
+    Args:
+        vector_store: Vector store holding the chapter's layers
+        chapter_id: The ID of the GDG chapter
+        layers: Knowledge layers to sample
+        dimension: Dimension of the projected vectors
+        source_model: Model ID of the embeddings to fit on
+        max_samples: Most vectors read across all layers
+        page_size: Items listed and fetched per scan request
+    
+    Returns:
+        The fitted projection
+    """
+    samples: List[Sequence[float]] = []
+    for layer in layers:
+        async for item in vector_store.scan(chapter_id, layer, page_size=page_size):
+            if item["metadata"].get("embedding_model") != source_model:
+                continue
+            samples.append(item["values"])
+            if len(samples) >= max_samples:
+                break
+        if len(samples) >= max_samples:
+            break
+    
+    if len(samples) < dimension:
+        raise ValueError(
+            f"Found {len(samples)} {source_model} vectors for chapter {chapter_id}; "
+            f"PCA to {dimension} dimensions needs at least as many samples"
+        )
+    return Projection.fit_pca(samples, dimension, source_model)
@@ -0,0 +1,350 @@
+"""Scalar quantization for local vector namespaces.
+
+Stores vectors as float16 or calibrated int8 codes instead of float32, which
+cuts namespace memory by 2x or 4x (and by far more compared with the Python
+float lists produced by ``EmbeddingService``). Similarity is computed
+directly on the codes; the best candidates can optionally be rescored
+against full-precision vectors to recover recall. Those vectors are kept
+in a memory-mapped file rather than in memory, and only the rows of the
+rescore candidates are read back.
+"""
+
+import tempfile
+from typing import Dict, List, Optional, Any, Sequence, Tuple
+
+import numpy as np
+
+from .local_vector_store import FlatIndex
+
+# Guards cosine similarity against zero-length vectors
+_EPSILON = 1e-12
+
+# Rows decoded per step while scoring, bounding temporary float32 memory
+_SCORE_CHUNK_ROWS = 16384
+
+_FLOAT16_MAX = float(np.finfo(np.float16).max)
+
+
+class ScalarQuantizer:
+    """
+    Per-dimension scalar quantizer.
+    
+    ``int8`` maps each dimension's calibrated [low, high] range onto 256
+    levels; values outside the range are clipped. ``float16`` needs no
+    calibration and only clips values beyond the float16 range.
+    """
+    
+    def __init__(self, dtype: str = "int8", percentile: float = 99.9):
+        """
+        Initialize an unfitted quantizer.
+        
+        Args:
+            dtype: Code type ("int8" or "float16")
+            percentile: Upper percentile of each dimension used as its int8
+                range (the lower bound mirrors it); trims outliers
+        """
+        if dtype not in ("int8", "float16"):
+            raise ValueError(f"Unsupported quantization type: {dtype}")
+        
+        self.dtype = dtype
+        self.percentile = percentile
+        self.low: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+    
+    @property
+    def fitted(self) -> bool:
+        return self.dtype == "float16" or self.scale is not None
+    
+    def fit(self, sample: np.ndarray):
+        """
+        Calibrate the int8 range of every dimension.
+        
+        Args:
+            sample: Representative float32 vectors, one per row
+        """
+        if self.dtype == "float16":
+            return
+        
+        low = np.percentile(sample, 100 - self.percentile, axis=0)
+        high = np.percentile(sample, self.percentile, axis=0)
+        self.low = low.astype(np.float32)
+        self.scale = np.maximum((high - low) / 255, _EPSILON).astype(np.float32)
+    
+    def encode(self, matrix: np.ndarray) -> np.ndarray:
+        """Quantize float32 vectors to codes."""
+        if self.dtype == "float16":
+            return np.clip(matrix, -_FLOAT16_MAX, _FLOAT16_MAX).astype(np.float16)
+        
+        levels = np.rint((matrix - self.low) / self.scale)
+        return (np.clip(levels, 0, 255) - 128).astype(np.int8)
+    
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Reconstruct approximate float32 vectors from codes."""
+        if self.dtype == "float16":
+            return codes.astype(np.float32)
+        return (codes.astype(np.float32) + 128) * self.scale + self.low
+    
+    def inner_products(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """
+        Dot products between a float32 query and every row of codes.
+        
+        For int8 the affine decoding is folded into the query
+        (``x = c * scale + (128 * scale + low)``), so codes are only cast,
+        never fully decoded.
+        """
+        if self.dtype == "float16":
+            weights, bias = query, 0.0
+        else:
+            weights = query * self.scale
+            bias = float(query @ (128 * self.scale + self.low))
+        
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], _SCORE_CHUNK_ROWS):
+            chunk = codes[start:start + _SCORE_CHUNK_ROWS]
+            scores[start:start + chunk.shape[0]] = chunk.astype(np.float32) @ weights + bias
+        return scores
+
+
+class _DiskMatrix:
+    """
+    Growable float32 matrix in a memory-mapped temporary file.
+    
+    Pages are loaded by the OS only when rows are read, and are file-backed
+    so they can be reclaimed under memory pressure, unlike an in-memory
+    array of the same size.
+    """
+    
+    def __init__(self, dimension: int, directory: Optional[str] = None):
+        self.dimension = dimension
+        self._file = tempfile.TemporaryFile(dir=directory)
+        self._map: Optional[np.memmap] = None
+        self.capacity = 0
+    
+    def reserve(self, capacity: int):
+        """Grow the file so ``capacity`` rows fit."""
+        if capacity <= self.capacity:
+            return
+        if self._map is not None:
+            self._map.flush()
+            self._map = None
+        self._file.truncate(capacity * self.dimension * 4)
+        self._map = np.memmap(self._file, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+        self.capacity = capacity
+    
+    def write(self, rows: np.ndarray, matrix: np.ndarray):
+        """Store vectors at the given rows."""
+        self._map[rows] = matrix
+    
+    def read(self, rows) -> np.ndarray:
+        """Read the given rows into memory."""
+        return np.array(self._map[rows])
+    
+    def take(self, rows: np.ndarray, chunk_rows: int = _SCORE_CHUNK_ROWS):
+        """
+        Keep only the given rows, in order.
+        
+        ``rows`` is ascending, so each row moves to the same or a lower
+        position and the copy can run in place, a chunk at a time.
+        """
+        for start in range(0, len(rows), chunk_rows):
+            chunk = rows[start:start + chunk_rows]
+            self._map[start:start + len(chunk)] = self._map[chunk]
+    
+    def close(self):
+        """Release the mapping and delete the file."""
+        self._map = None
+        self._file.close()
+
+
+class QuantizedFlatIndex(FlatIndex):
+    """
+    ``FlatIndex`` that stores vectors as quantized codes.
+    
+    Rows are kept in float32 until ``calibration_size`` vectors have been
+    seen; the namespace's quantizer is then fitted on them and every row is
+    encoded. With ``rescore`` > 0, full-precision vectors are kept as well,
+    on disk, and the top ``top_k * rescore`` code-space candidates are
+    re-ranked exactly.
+    """
+    
+    def __init__(
+        self,
+        dimension: int,
+        metric: str = "cosine",
+        quantization: str = "int8",
+        rescore: int = 0,
+        calibration_size: int = 1024,
+        rescore_dir: Optional[str] = None,
+    ):
+        """
+        Initialize an empty quantized index.
+        
+        Args:
+            dimension: Dimension of the stored vectors
+            metric: Similarity metric ("cosine" or "dotproduct")
+            quantization: Code type ("int8" or "float16")
+            rescore: Candidate oversampling factor for exact rescoring
+                (0 disables rescoring and drops full-precision vectors)
+            calibration_size: Vectors collected before fitting the quantizer
+            rescore_dir: Directory for the memory-mapped full-precision
+                vectors (defaults to the system temporary directory)
+        """
+        super().__init__(dimension=dimension, metric=metric)
+        self.quantizer = ScalarQuantizer(quantization)
+        self.rescore = rescore
+        self.calibration_size = calibration_size
+        self.rescore_dir = rescore_dir
+        code_type = np.int8 if quantization == "int8" else np.float16
+        self._codes = np.empty((0, dimension), dtype=code_type)
+        # Full-precision vectors for rescoring, once codes are in use
+        self._full: Optional[_DiskMatrix] = None
+        if self.quantizer.fitted:
+            self._vectors = None
+            if rescore > 0:
+                self._full = _DiskMatrix(dimension, rescore_dir)
+    
+    @property
+    def _calibrated(self) -> bool:
+        return self.quantizer.fitted
+    
+    def _reserve(self, count: int):
+        """Grow codes, norms and float32 storage (in memory or on disk)."""
+        capacity = self._norms.shape[0]
+        if count <= capacity:
+            return
+        
+        size = len(self)
+        new_capacity = max(count, 2 * capacity, 64)
+        
+        def grow(array: Optional[np.ndarray]) -> Optional[np.ndarray]:
+            if array is None:
+                return None
+            grown = np.empty((new_capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:size] = array[:size]
+            return grown
+        
+        self._norms = grow(self._norms)
+        self._vectors = grow(self._vectors)
+        if self._calibrated:
+            self._codes = grow(self._codes)
+        if self._full is not None:
+            self._full.reserve(new_capacity)
+    
+    def _write(self, rows: np.ndarray, matrix: np.ndarray, norms: np.ndarray):
+        """Store vectors as codes once calibrated, float32 before that."""
+        self._norms[rows] = norms
+        if self._vectors is not None:
+            self._vectors[rows] = matrix
+        if self._full is not None:
+            self._full.write(rows, matrix)
+        if self._calibrated:
+            self._codes[rows] = self.quantizer.encode(matrix)
+        elif len(self) >= self.calibration_size:
+            self.calibrate()
+    
+    def _take(self, rows: np.ndarray):
+        """Keep only the given rows of codes, norms and float32 storage."""
+        self._norms = self._norms[rows]
+        if self._vectors is not None:
+            self._vectors = self._vectors[rows]
+        if self._full is not None:
+            self._full.take(rows)
+        if self._calibrated:
+            self._codes = self._codes[rows]
+    
+    def _full_vectors(self, size: int) -> np.ndarray:
+        """Full-precision rows in memory, or decoded codes if they were dropped."""
+        if self._vectors is not None:
+            return self._vectors[:size]
+        if self._full is not None:
+            return self._full.read(slice(0, size))
+        return self.quantizer.decode(self._codes[:size])
+    
+    def calibrate(self, sample: Optional[np.ndarray] = None):
+        """
+        Fit the quantizer and re-encode every row.
+        
+        Args:
+            sample: Optional calibration vectors; defaults to the stored
+                full-precision vectors (or decoded codes if they were dropped)
+        """
+        size = len(self)
+        full = self._full_vectors(size)
+        if sample is None:
+            sample = full
+        
+        self.quantizer.fit(sample)
+        capacity = self._norms.shape[0]
+        self._codes = np.empty((capacity, self.dimension), dtype=self._codes.dtype)
+        self._codes[:size] = self.quantizer.encode(full)
+        if self.rescore > 0 and self._full is None:
+            # Move the full-precision vectors out of memory
+            self._full = _DiskMatrix(self.dimension, self.rescore_dir)
+            self._full.reserve(capacity)
+            self._full.write(slice(0, size), full)
+        self._vectors = None
+    
+    def _vector(self, row: int) -> np.ndarray:
+        """Return the stored vector of a row (decoded if only codes remain)."""
+        if self._vectors is not None:
+            return self._vectors[row]
+        if self._full is not None:
+            return self._full.read(row)
+        return self.quantizer.decode(self._codes[row:row + 1])[0]
+    
+    def _scores(self, rows: Optional[np.ndarray], query_vector: np.ndarray) -> np.ndarray:
+        """Similarity computed on codes (or float32 rows before calibration)."""
+        if not self._calibrated:
+            return super()._scores(rows, query_vector)
+        
+        if rows is None:
+            codes, norms = self._codes[:len(self)], self._norms[:len(self)]
+        else:
+            codes, norms = self._codes[rows], self._norms[rows]
+        
+        scores = self.quantizer.inner_products(codes, query_vector)
+        if self.metric == "cosine":
+            scores /= np.maximum(norms * np.linalg.norm(query_vector), _EPSILON)
+        return scores
+    
+    def search(
+        self,
+        query: Sequence[float],
+        top_k: int,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Find the most similar items, rescoring candidates when enabled.
+        
+        Args:
+            query: Query vector
+            top_k: Number of results to return
+            filter: Optional metadata filter
+        
+        Returns:
+            ``(id, score, metadata)`` tuples ordered by descending score
+        """
+        if not (self.rescore and self._calibrated):
+            return super().search(query, top_k, filter)
+        
+        candidates = super().search(query, top_k * self.rescore, filter)
+        if not candidates:
+            return []
+        
+        query_vector = self._as_matrix(query)[0]
+        rows = np.asarray([self._rows[item_id] for item_id, _, _ in candidates], dtype=np.intp)
+        exact = self._full.read(rows) @ query_vector
+        if self.metric == "cosine":
+            exact /= np.maximum(self._norms[rows] * np.linalg.norm(query_vector), _EPSILON)
+        order = np.argsort(-exact, kind="stable")[:top_k]
+        return [(candidates[i][0], float(exact[i]), candidates[i][2]) for i in order]
+    
+    def memory_bytes(self) -> int:
+        """Bytes held in memory by codes, norms and uncalibrated vectors."""
+        size = len(self)
+        total = self._norms[:size].nbytes
+        if self._calibrated:
+            total += self._codes[:size].nbytes
+        if self._vectors is not None:
+            total += self._vectors[:size].nbytes
+        return total
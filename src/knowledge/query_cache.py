@@ -0,0 +1,123 @@
+"""Query result cache for the knowledge management system."""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Any, Sequence, Tuple
+
+import numpy as np
+
+# Query vectors are rounded to this many decimals before hashing, so
+# embeddings that differ only by float noise share a cache entry
+VECTOR_HASH_DECIMALS = 4
+
+
+class QueryCache:
+    """
+    LRU cache of vector query results with a time-to-live.
+    
+    Entries are keyed on the namespace, a hash of the quantized query
+    vector, the filter and ``top_k``. Each namespace carries a version
+    counter that writes bump; the version is part of the key, so a write
+    invalidates every cached query of its namespace at once and the stale
+    entries age out of the LRU.
+    """
+    
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            max_size: Maximum number of cached queries (0 disables caching)
+            ttl: Seconds a cached result stays valid
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._versions: Dict[str, int] = defaultdict(int)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+    
+    def key(
+        self,
+        namespace: str,
+        query_embedding: Sequence[float],
+        filter: Optional[Dict[str, Any]],
+        top_k: int,
+    ) -> tuple:
+        """
+        Build the cache key for a query at the namespace's current version.
+        
+        Take the key before running the query: if a write lands meanwhile,
+        the result is stored under the old version and never served.
+        """
+        vector = np.round(np.asarray(query_embedding, dtype=np.float32), VECTOR_HASH_DECIMALS)
+        # Normalise -0.0 so it hashes like 0.0
+        vector_hash = hashlib.blake2b((vector + 0.0).tobytes(), digest_size=16).hexdigest()
+        filter_key = json.dumps(filter, sort_keys=True, default=str) if filter else None
+        return (namespace, self._versions[namespace], vector_hash, filter_key, top_k)
+    
+    def get(self, key: tuple) -> Optional[List[Dict[str, Any]]]:
+        """Return a copy of the cached result for a key, if fresh."""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return _copy_matches(entry[1])
+    
+    def put(self, key: tuple, matches: List[Dict[str, Any]]):
+        """Cache a query result, evicting the least recently used entries."""
+        if key[1] != self._versions[key[0]]:
+            # The namespace was written while the query ran
+            return
+        
+        self._entries[key] = (time.monotonic(), _copy_matches(matches))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, namespace: str):
+        """Invalidate every cached query of a namespace."""
+        self._versions[namespace] += 1
+    
+    def clear(self):
+        """Drop every cached entry and reset the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+        
+        Returns:
+            Hits, misses, hit rate and current number of entries
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+        }
+
+
+def _copy_matches(matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copy matches so callers cannot mutate cached results."""
+    return [
+        {**match, "metadata": dict(match["metadata"]) if match.get("metadata") else match.get("metadata")}
+        for match in matches
+    ]
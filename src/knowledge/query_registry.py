@@ -0,0 +1,229 @@
+"""Precomputed embeddings of the fixed queries agents issue.
+
+Several agent lookups search with constant strings ("brand voice
+guidelines tone style", ...). The registry names those canonical queries
+and embeds them once, at warm-up or on first use, or loads them from an
+artifact saved by a previous run, so hot paths skip the embedding
+round-trip. Vectors are tied to the embedding model that produced them and
+are recomputed when the service's model changes.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional, Any, Awaitable, Callable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Template types with a canonical query of their own; other types are
+# embedded on demand through the embedding cache
+TEMPLATE_TYPES = ("event-announcement", "event-recap")
+
+# Canonical queries by name
+CANONICAL_QUERIES = {
+    "brand_voice": "brand voice guidelines tone style",
+    "content_templates": "content template",
+    **{f"content_templates:{template_type}": f"content template {template_type}" for template_type in TEMPLATE_TYPES},
+    "reflection_summary": "reflection analysis insights recommendations",
+}
+
+
+class QueryRegistry:
+    """
+    Named canonical queries with their embeddings.
+    
+    Works with any embedding service exposing ``model_id`` and an async
+    ``generate_embeddings`` accepting a list of texts.
+    """
+    
+    def __init__(
+        self,
+        embedding_service,
+        queries: Optional[Dict[str, str]] = None,
+        path: Optional[str] = None,
+    ):
+        """
+        Initialize the registry.
+        
+        Args:
+            embedding_service: Service embedding the query texts
+            queries: Query texts by name; defaults to ``CANONICAL_QUERIES``
+            path: Artifact written by ``save`` to load precomputed
+                embeddings from; defaults to ``QUERY_EMBEDDINGS_PATH``
+                when set
+        """
+        self.embedding_service = embedding_service
+        self._texts: Dict[str, str] = dict(CANONICAL_QUERIES if queries is None else queries)
+        self._vectors: Dict[str, Any] = {}
+        self._model_id: Optional[str] = None
+        self._warm_up_task: Optional[asyncio.Task] = None
+        
+        path = path or os.getenv("QUERY_EMBEDDINGS_PATH")
+        if path and os.path.exists(path):
+            self.load(path)
+    
+    @property
+    def names(self) -> List[str]:
+        """Names of the registered queries."""
+        return list(self._texts)
+    
+    def text(self, name: str) -> str:
+        """
+        Get the text of a registered query.
+        
+        Args:
+            name: Query name
+        
+        Returns:
+            The query text
+        """
+        return self._texts[name]
+    
+    def register(self, name: str, text: str) -> str:
+        """
+        Register a query, replacing any query of the same name.
+        
+        Args:
+            name: Query name
+            text: Query text
+        
+        Returns:
+            The name, for use at the call site
+        """
+        if self._texts.get(name) != text:
+            self._texts[name] = text
+            self._vectors.pop(name, None)
+        return name
+    
+    async def warm_up(self) -> int:
+        """
+        Embed every registered query that has no embedding yet, in one call.
+        
+        Returns:
+            Number of queries embedded
+        """
+        self._check_model()
+        missing = [name for name in self._texts if name not in self._vectors]
+        if missing:
+            embeddings = await self.embedding_service.generate_embeddings([self._texts[name] for name in missing])
+            self._vectors.update(zip(missing, embeddings))
+        return len(missing)
+    
+    def warm_up_in_background(self) -> Optional[asyncio.Task]:
+        """
+        Start ``warm_up`` on the running event loop, for agent constructors.
+        
+        Returns:
+            The warm-up task, or None outside an event loop, where queries
+            are embedded on first use instead
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        
+        self._warm_up_task = loop.create_task(self.warm_up())
+        self._warm_up_task.add_done_callback(_log_warm_up_failure)
+        return self._warm_up_task
+    
+    async def embedding(self, name: str):
+        """
+        Get the embedding of a registered query.
+        
+        Args:
+            name: Query name
+        
+        Returns:
+            The query's vector in the service's output format
+        """
+        self._check_model()
+        vector = self._vectors.get(name)
+        if vector is None:
+            vector = await self.embedding_service.generate_embeddings(self._texts[name])
+            self._vectors[name] = vector
+        return vector
+    
+    def embedder(self, name: str, embedding_service=None) -> Callable[[str], Awaitable[Any]]:
+        """
+        Get an ``embed`` callable for ``VectorStore.hybrid_query`` that
+        returns a registered query's embedding.
+        
+        Args:
+            name: Query name
+            embedding_service: Service serving the searched layer; when
+                its model is not the registry's, the query is embedded
+                with it instead (see ``LayerRouter.embedding_service_for``)
+        
+        Returns:
+            Coroutine function ignoring its text argument
+        """
+        if embedding_service is not None and embedding_service.model_id != self.embedding_service.model_id:
+            async def embed_with_layer_model(_text: str):
+                return await embedding_service.generate_embeddings(self._texts[name])
+            return embed_with_layer_model
+        
+        async def embed(_text: str):
+            return await self.embedding(name)
+        return embed
+    
+    def save(self, path: str):
+        """
+        Write the computed embeddings to an artifact.
+        
+        Args:
+            path: ``.npz`` file to write
+        """
+        names = [name for name in self._texts if name in self._vectors]
+        np.savez(
+            path,
+            model_id=np.array(self._model_id or ""),
+            names=np.array(names),
+            texts=np.array([self._texts[name] for name in names]),
+            vectors=np.asarray([self._vectors[name] for name in names], dtype=np.float32),
+        )
+    
+    def load(self, path: str) -> int:
+        """
+        Load embeddings saved by ``save``.
+        
+        Embeddings from another model, and those of queries whose text
+        changed since, are ignored.
+        
+        Args:
+            path: ``.npz`` file to read
+        
+        Returns:
+            Number of embeddings loaded
+        """
+        with np.load(path) as artifact:
+            model_id = str(artifact["model_id"])
+            if model_id != self.embedding_service.model_id:
+                logger.warning(f"Ignoring query embeddings in {path} computed with {model_id}")
+                return 0
+            
+            self._check_model()
+            as_arrays = getattr(self.embedding_service, "output_format", "list") == "numpy"
+            loaded = 0
+            for name, text, vector in zip(artifact["names"], artifact["texts"], artifact["vectors"]):
+                name, text = str(name), str(text)
+                if self._texts.get(name, text) != text:
+                    continue
+                self._texts[name] = text
+                self._vectors[name] = vector if as_arrays else vector.tolist()
+                loaded += 1
+        return loaded
+    
+    def _check_model(self):
+        """Drop embeddings made by a model the service no longer uses."""
+        model_id = self.embedding_service.model_id
+        if model_id != self._model_id:
+            self._vectors.clear()
+            self._model_id = model_id
+
+
+def _log_warm_up_failure(task: asyncio.Task):
+    """Log a failed background warm-up; lookups then embed on first use."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Warming up query embeddings failed: {task.exception()}")
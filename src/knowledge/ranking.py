@@ -0,0 +1,248 @@
+"""Ranking helpers for merged retrieval across knowledge layers.
+
+Layers are merged on their similarity scores, optionally weighted per
+layer, so a weak match stays weak whatever else its layer returned.
+Scores of layers served by different embedding models are calibrated
+against each model's score distribution first.
+Merged candidates are deduplicated by ID and content, and optionally
+re-ranked with maximal marginal relevance (MMR) so near-duplicate items
+do not crowd the top-k.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Dict, List, Optional, Any, Iterable, Sequence, Tuple
+
+import numpy as np
+
+from .embedding_cache import normalize_text
+
+# Guards cosine similarity of zero vectors
+_EPSILON = 1e-12
+
+
+def content_hash(metadata: Dict[str, Any]) -> Optional[str]:
+    """
+    Hash the content of an item, ignoring formatting-only differences.
+    
+    Only the item's ``content`` (or, without one, its ``text``) is hashed,
+    so bookkeeping metadata such as timestamps or the source does not
+    keep copies apart. Structured content is hashed as canonical JSON.
+    
+    Args:
+        metadata: Item metadata
+    
+    Returns:
+        Hex digest identifying the item's content, or None if it has none
+    """
+    content = metadata.get("content")
+    if content is None or content == "":
+        content = metadata.get("text")
+    if isinstance(content, (dict, list)):
+        text = json.dumps(content, sort_keys=True, default=str) if content else ""
+    else:
+        text = normalize_text(str(content)) if content is not None else ""
+    if not text:
+        return None
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ScoreCalibrator:
+    """
+    Running score distribution of each embedding model.
+    
+    Similarities of different models live on different scales (one
+    model's weak match can score higher than another's strong one), so
+    they are only compared after calibration: a score is turned into its
+    z-score against its model's distribution and mapped onto a reference
+    model's scale. The distributions are estimated from the scores of the
+    matches observed so far, so a weak match stays weak however strong the
+    rest of its ranking is.
+    """
+    
+    def __init__(self, min_samples: int = 20, min_std: float = 0.01):
+        """
+        Initialize the calibrator.
+        
+        Args:
+            min_samples: Scores observed for a model before its distribution
+                is trusted; until then scores are left uncalibrated
+            min_std: Lower bound of a model's standard deviation, keeping
+                models with near-constant scores from exploding z-scores
+        """
+        self.min_samples = min_samples
+        self.min_std = min_std
+        self._lock = threading.Lock()
+        # Model ID -> (count, mean, sum of squared deviations)
+        self._stats: Dict[Optional[str], Tuple[int, float, float]] = {}
+    
+    def observe(self, model_id: Optional[str], scores: Iterable[float]):
+        """
+        Add match scores to a model's distribution.
+        
+        Args:
+            model_id: Embedding model that scored the matches (None for
+                the default model)
+            scores: Similarity scores
+        """
+        with self._lock:
+            count, mean, m2 = self._stats.get(model_id, (0, 0.0, 0.0))
+            for score in scores:
+                count += 1
+                delta = score - mean
+                mean += delta / count
+                m2 += delta * (score - mean)
+            self._stats[model_id] = (count, mean, m2)
+    
+    def distribution(self, model_id: Optional[str]) -> Optional[Tuple[float, float]]:
+        """
+        Get a model's score mean and standard deviation.
+        
+        Args:
+            model_id: Embedding model
+        
+        Returns:
+            Mean and standard deviation, or None until ``min_samples``
+            scores were observed
+        """
+        with self._lock:
+            count, mean, m2 = self._stats.get(model_id, (0, 0.0, 0.0))
+        if count < max(self.min_samples, 2):
+            return None
+        return mean, max((m2 / (count - 1)) ** 0.5, self.min_std)
+    
+    def transforms(self, model_ids: Iterable[Optional[str]]) -> Optional[Dict[Optional[str], Tuple[float, float]]]:
+        """
+        Get the affine map of each model's scores onto a common scale.
+        
+        Args:
+            model_ids: Models whose scores are compared; the first one is
+                the reference whose scale is kept
+        
+        Returns:
+            ``(scale, shift)`` per model, calibrating a score as
+            ``scale * score + shift``; None when any model's distribution
+            is not known yet
+        """
+        model_ids = list(dict.fromkeys(model_ids))
+        distributions = {model_id: self.distribution(model_id) for model_id in model_ids}
+        if not model_ids or any(distribution is None for distribution in distributions.values()):
+            return None
+        reference_mean, reference_std = distributions[model_ids[0]]
+        transforms = {}
+        for model_id, (mean, std) in distributions.items():
+            scale = reference_std / std
+            transforms[model_id] = (scale, reference_mean - scale * mean)
+        return transforms
+
+
+def merge_rankings(
+    rankings: Dict[str, Sequence[Dict[str, Any]]],
+    weights: Optional[Dict[str, float]] = None,
+    models: Optional[Dict[str, Optional[str]]] = None,
+    calibrator: Optional[ScoreCalibrator] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Merge per-layer rankings into one deduplicated candidate list.
+    
+    Layers served by one embedding model are merged on their raw scores.
+    When ``models`` names more than one model, each layer's scores are
+    mapped onto a common scale with the calibrator's per-model
+    distributions (raw scores are kept until every model's distribution is
+    known).
+    
+    Args:
+        rankings: Matches (id, score, metadata) by layer
+        weights: Multiplier of each layer's scores (default 1.0)
+        models: Embedding model serving each layer (default: one model)
+        calibrator: Score distributions of the models; the rankings'
+            scores are added to them
+    
+    Returns:
+        Candidates ordered by weighted score; each carries its ``layer``
+        and original ``raw_score``. Of items sharing an ID or content,
+        only the best scored is kept; items without content are
+        deduplicated by ID only.
+    """
+    weights = weights or {}
+    models = models or {}
+    transforms = None
+    if calibrator is not None:
+        for layer, matches in rankings.items():
+            calibrator.observe(models.get(layer), [match["score"] for match in matches])
+        if len({models.get(layer) for layer in rankings}) > 1:
+            transforms = calibrator.transforms(models.get(layer) for layer in rankings)
+    
+    candidates = []
+    for layer, matches in rankings.items():
+        weight = weights.get(layer, 1.0)
+        scale, shift = transforms[models.get(layer)] if transforms else (1.0, 0.0)
+        for match in matches:
+            candidates.append({
+                **match,
+                "score": weight * (scale * match["score"] + shift),
+                "raw_score": match["score"],
+                "layer": layer,
+            })
+    candidates.sort(key=lambda candidate: (candidate["score"], candidate["raw_score"]), reverse=True)
+    
+    seen_ids, seen_content, merged = set(), set(), []
+    for candidate in candidates:
+        digest = content_hash(candidate.get("metadata") or {})
+        if candidate["id"] in seen_ids or (digest is not None and digest in seen_content):
+            continue
+        seen_ids.add(candidate["id"])
+        if digest is not None:
+            seen_content.add(digest)
+        merged.append(candidate)
+    return merged
+
+
+def mmr_rerank(
+    candidates: Sequence[Dict[str, Any]],
+    vectors: Dict[str, Sequence[float]],
+    top_k: int,
+    diversity: float = 0.3,
+) -> List[Dict[str, Any]]:
+    """
+    Select candidates by maximal marginal relevance.
+    
+    Each step picks the candidate maximizing
+    ``(1 - diversity) * score - diversity * max similarity to those picked``,
+    using cosine similarity between item vectors. Candidates without a
+    vector are treated as dissimilar to everything.
+    
+    Args:
+        candidates: Candidates with a relevance ``score``, best first
+        vectors: Item vectors by candidate ID
+        top_k: Number of candidates to select
+        diversity: Weight of the redundancy penalty (0 keeps score order)
+    
+    Returns:
+        Up to ``top_k`` candidates in selection order
+    """
+    candidates = list(candidates)
+    if diversity <= 0 or len(candidates) <= 1:
+        return candidates[:top_k]
+    
+    dimension = next((len(vector) for vector in vectors.values()), 0)
+    matrix = np.zeros((len(candidates), dimension), dtype=np.float32)
+    for row, candidate in enumerate(candidates):
+        vector = vectors.get(candidate["id"])
+        if vector is not None and len(vector) == dimension:
+            matrix[row] = vector
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), _EPSILON)
+    similarity = matrix @ matrix.T
+    
+    relevance = np.array([candidate["score"] for candidate in candidates], dtype=np.float32)
+    redundancy = np.zeros(len(candidates), dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+    selected = []
+    for _ in range(min(top_k, len(candidates))):
+        objective = np.where(available, (1 - diversity) * relevance - diversity * redundancy, -np.inf)
+        row = int(np.argmax(objective))
+        selected.append(candidates[row])
+        available[row] = False
+        redundancy = np.maximum(redundancy, similarity[row])
+    return selected
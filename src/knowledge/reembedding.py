@@ -0,0 +1,344 @@
+"""Background re-embedding of knowledge layers after a model change.
+
+Every stored item records the embedding model and dimension that produced
+its vector. A re-embedding job streams a layer with ``VectorStore.scan``,
+re-embeds the stale items in large batches into a shadow namespace while
+the layer keeps serving reads and writes, catches up with the writes made
+meanwhile and then atomically switches the layer over to the shadow and
+its embedding model. Until then the layer's reads and writes keep using
+the model its current vectors were made with. The switch and the change
+log live in the vector store router's shared route store, so writes from
+every process are caught up, including those made by processes that have
+not loaded the new route yet.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, AsyncIterable, AsyncIterator, Callable, Iterable
+
+from .embedding_service import content_text
+from .lexical_index import item_text
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks while writes to the source layer are in flight or
+# other processes have not loaded the new route
+_CATCH_UP_INTERVAL = 0.01
+
+
+@dataclass
+class ReembeddingResult:
+    """Outcome of a re-embedding job."""
+    layer: str
+    scanned: int = 0
+    reembedded: int = 0
+    projected: int = 0
+    copied: int = 0
+    deleted: int = 0
+    failed: List[Dict[str, Any]] = field(default_factory=list)
+    switched: bool = False
+    elapsed: float = 0.0
+    
+    @property
+    def items_per_second(self) -> float:
+        """Scanned items per second of wall-clock time."""
+        return self.scanned / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def shadow_layer(layer: str, model_id: str) -> str:
+    """
+    Name the layer holding a layer's vectors for an embedding model.
+    
+    Args:
+        layer: The knowledge layer being migrated
+        model_id: Identifier of the target embedding model
+    
+    Returns:
+        Layer name safe to use in a namespace
+    """
+    slug = re.sub(r"[^a-z0-9]+", "-", model_id.lower()).strip("-")
+    return f"{layer}__{slug}"
+
+
+def embedding_text(metadata: Dict[str, Any]) -> str:
+    """
+    Get the text an item was embedded from, for items written by the
+    knowledge agent and the ingestion pipeline.
+    
+    Args:
+        metadata: Full item metadata
+    
+    Returns:
+        The chunk text, the text of structured content, or the item's
+        searchable text as a fallback
+    """
+    if isinstance(metadata.get("text"), str):
+        return metadata["text"]
+    if isinstance(metadata.get("content"), dict):
+        return content_text(metadata["content"])
+    return item_text(metadata)
+
+
+class ReembeddingJob:
+    """
+    Zero-downtime migration of one layer to the current embedding model.
+    
+    Items already embedded by the target model are copied as they are,
+    and items embedded by the model a target projection was fitted for are
+    projected without calling the model; the rest are re-embedded
+    ``batch_size`` at a time. Writes and deletes
+    that reach the layer during the migration are tracked and replayed
+    onto the shadow before the switch, which hands the layer to the target
+    embedding service, and after it until every process has loaded the
+    new route. The old namespace is left intact, so
+    ``VectorStore.switch_layer`` back to it rolls the migration back.
+    """
+    
+    def __init__(
+        self,
+        vector_store,
+        embedding_service,
+        chapter_id: str,
+        layer: str,
+        batch_size: int = 256,
+        page_size: int = 500,
+        upsert_batch_size: int = 100,
+        max_concurrency: int = 4,
+        target_layer: Optional[str] = None,
+        text_for: Optional[Callable[[Dict[str, Any]], str]] = None,
+        target_index: Optional[str] = None,
+    ):
+        """
+        Initialize the job.
+        
+        Args:
+            vector_store: Vector store holding the layer
+            embedding_service: Service embedding with the target model; a
+                separate instance from the one serving the layer, which
+                keeps its model until the switch
+            chapter_id: The ID of the GDG chapter
+            layer: The knowledge layer to migrate
+            batch_size: Texts per embedding call
+            page_size: Items listed and fetched per scan request
+            upsert_batch_size: Vectors per upsert request
+            max_concurrency: Upsert requests in flight
+            target_layer: Shadow layer to write; defaults to one named
+                after the layer and the target model
+            text_for: Function rebuilding the embedded text from an item's
+                metadata; defaults to ``embedding_text``
+            target_index: Pinecone index for the shadow namespace, needed
+                when the target dimension differs from the layer's index
+        """
+        self.vector_store = vector_store
+        self.embedding_service = embedding_service
+        self.chapter_id = chapter_id
+        self.layer = layer
+        self.batch_size = max(1, batch_size)
+        self.page_size = page_size
+        self.upsert_batch_size = upsert_batch_size
+        self.max_concurrency = max_concurrency
+        self.target_layer = target_layer or shadow_layer(layer, embedding_service.model_id)
+        self.text_for = text_for or embedding_text
+        self.target_index = target_index
+    
+    def is_stale(self, item: Dict[str, Any]) -> bool:
+        """
+        Check whether an item was embedded by another model or dimension.
+        
+        Items without model metadata predate its recording and are stale.
+        
+        Args:
+            item: Item with values and metadata
+        
+        Returns:
+            Whether the item must be re-embedded
+        """
+        metadata = item["metadata"]
+        return (
+            metadata.get("embedding_model") != self.embedding_service.model_id
+            or metadata.get("embedding_dimension") != len(item["values"])
+        )
+    
+    def _projectable(self, item: Dict[str, Any]) -> bool:
+        """Check whether a stale item holds a full embedding the target projection reduces."""
+        projection = getattr(self.embedding_service, "projection", None)
+        return (
+            projection is not None
+            and item["metadata"].get("embedding_model") == projection.source_model
+            and len(item["values"]) == projection.source_dimension
+        )
+    
+    def start(self) -> asyncio.Task:
+        """
+        Run the job in the background.
+        
+        Returns:
+            Task resolving to the ``ReembeddingResult``
+        """
+        return asyncio.ensure_future(self.run())
+    
+    async def run(self) -> ReembeddingResult:
+        """
+        Migrate the layer and switch it over to the shadow.
+        
+        The switch is skipped when any item failed, leaving the layer on
+        its current namespace; re-running the job is safe.
+        
+        Returns:
+            Counts of scanned, re-embedded, projected, copied and deleted
+            items, failures, whether the layer was switched and elapsed time
+        
+        Raises:
+            ValueError: If the layer is already served by the target layer,
+                the target model's dimension does not match the index
+                holding the shadow, or the store's router has no route store
+        """
+        store = self.vector_store
+        router = store.router
+        source_layer = store.resolve_layer(self.chapter_id, self.layer)
+        if source_layer == self.target_layer:
+            raise ValueError(f"Layer {self.layer} is already served by {self.target_layer}")
+        if self.target_index:
+            store.place_layer(self.chapter_id, self.target_layer, self.target_index)
+        await self._check_dimension()
+        
+        result = ReembeddingResult(layer=self.target_layer)
+        start = time.perf_counter()
+        source = store.get_namespace(self.chapter_id, source_layer, routed=False)
+        router.track(source)
+        try:
+            items = store.scan(self.chapter_id, source_layer, page_size=self.page_size)
+            await self._copy(items, result)
+            
+            # Registered first, so the layer never resolves to a model without a service
+            router.register_embedding_service(self.embedding_service)
+            while not result.failed:
+                if store.switch_layer(
+                    self.chapter_id, self.layer, self.target_layer, model_id=self.embedding_service.model_id
+                ):
+                    result.switched = True
+                    break
+                await self._catch_up(source, source_layer, result)
+            
+            if result.switched:
+                # Processes still on the old route keep writing the source namespace
+                version = router.version
+                while not router.acknowledged(version) or router.has_changes(source):
+                    await self._catch_up(source, source_layer, result)
+        finally:
+            router.untrack(source)
+        
+        result.elapsed = time.perf_counter() - start
+        logger.info(
+            f"Re-embedded {result.reembedded}, projected {result.projected} and copied {result.copied} items of "
+            f"{self.chapter_id}/{self.layer} into {self.target_layer} "
+            f"({result.items_per_second:.1f} items/sec, switched: {result.switched})"
+        )
+        return result
+    
+    async def _check_dimension(self):
+        """Fail before copying anything when the shadow's index cannot hold target vectors."""
+        dimension = len(await self.embedding_service.generate_embeddings("dimension check"))
+        expected = await self.vector_store.layer_dimension(self.chapter_id, self.target_layer)
+        if expected is not None and expected != dimension:
+            raise ValueError(
+                f"{self.embedding_service.model_id} embeddings have {dimension} dimensions but the index "
+                f"holding {self.target_layer} has {expected}; pass a target_index of dimension {dimension}"
+            )
+    
+    async def _catch_up(self, source: str, source_layer: str, result: ReembeddingResult):
+        """Replay items changed in the source namespace onto the shadow."""
+        ids = self.vector_store.router.take_changes(source)
+        if not ids:
+            # Changes of writes still in flight are recorded once they finish
+            await asyncio.sleep(_CATCH_UP_INTERVAL)
+            return
+        
+        items = await self.vector_store.fetch(self.chapter_id, source_layer, ids, routed=False)
+        removed = [item_id for item_id in ids if item_id not in items]
+        if removed:
+            await self.vector_store.delete(self.chapter_id, self.target_layer, removed)
+            result.deleted += len(removed)
+        await self._copy(_iterate(items.values()), result)
+    
+    async def _copy(self, items: AsyncIterable[Dict[str, Any]], result: ReembeddingResult):
+        """Write items to the shadow, re-embedding the stale ones."""
+        written = await self.vector_store.store_items(
+            self._shadow_items(items, result),
+            batch_size=self.upsert_batch_size,
+            max_concurrency=self.max_concurrency,
+        )
+        result.failed.extend(written.failed)
+    
+    async def _shadow_items(
+        self,
+        items: AsyncIterable[Dict[str, Any]],
+        result: ReembeddingResult,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield ``store_items`` entries for the shadow layer."""
+        batch = []
+        async for item in items:
+            result.scanned += 1
+            if not self.is_stale(item):
+                result.copied += 1
+                yield self._shadow_item(item["id"], item["values"], item["metadata"])
+                continue
+            if self._projectable(item):
+                result.projected += 1
+                embedding = self.embedding_service.projection.apply(item["values"])
+                yield self._shadow_item(
+                    item["id"],
+                    embedding,
+                    {**item["metadata"], **self.embedding_service.model_metadata(embedding)},
+                )
+                continue
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                for entry in await self._reembed(batch, result):
+                    yield entry
+                batch = []
+        if batch:
+            for entry in await self._reembed(batch, result):
+                yield entry
+    
+    async def _reembed(self, batch: List[Dict[str, Any]], result: ReembeddingResult) -> List[Dict[str, Any]]:
+        """Embed a batch of stale items with one call and build their entries."""
+        try:
+            texts = [self.text_for(item["metadata"]) for item in batch]
+            embeddings = await self.embedding_service.generate_embeddings(texts)
+        except Exception as e:
+            logger.error(f"Failed to re-embed {len(batch)} items: {e}")
+            result.failed.extend(
+                {"chapter_id": self.chapter_id, "layer": self.layer, "id": item["id"], "error": str(e)}
+                for item in batch
+            )
+            return []
+        
+        result.reembedded += len(batch)
+        return [
+            self._shadow_item(
+                item["id"],
+                embedding,
+                {**item["metadata"], **self.embedding_service.model_metadata(embedding)},
+            )
+            for item, embedding in zip(batch, embeddings)
+        ]
+    
+    def _shadow_item(self, item_id: str, embedding, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a ``store_items`` entry for the shadow layer."""
+        return {
+            "chapter_id": self.chapter_id,
+            "layer": self.target_layer,
+            "item_id": item_id,
+            "embedding": embedding,
+            "metadata": metadata,
+        }
+
+
+async def _iterate(items: Iterable[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    """Adapt an iterable to the async iteration ``_copy`` expects."""
+    for item in items:
+        yield item
@@ -0,0 +1,608 @@
+"""Layer routes and change tracking for embedding migrations.
+
+A migration serves a knowledge layer from a shadow namespace embedded by
+another model once it is complete. The switch is recorded as a route in a
+shared SQLite database, whose version every process polls before its
+vector store operations, reloading the routes when it changed. The same
+database logs the IDs written to namespaces a migration tracks, and which
+route version each process has loaded, so a migration keeps catching up
+until every process has moved to the new route.
+
+``LayerRouter`` is the in-process view of the routes: vector stores ask it
+which namespace serves a layer, and agents which embedding service
+produced a layer's vectors.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Callable, Iterable, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the route version
+ROUTE_POLL_INTERVAL = 1.0
+
+# Seconds after its last check a process is assumed gone
+READER_TTL = 60.0
+
+
+@dataclass(frozen=True)
+class LayerRoute:
+    """Namespace, embedding model and index serving a knowledge layer."""
+    chapter_id: str
+    layer: str
+    target_layer: str
+    model_id: Optional[str] = None
+    index_name: Optional[str] = None
+
+
+class SQLiteRouteStore:
+    """
+    Route store backed by a SQLite database shared by every process.
+    
+    Each route change bumps a version. Processes report the version they
+    have loaded with ``acknowledge``, so ``readers_behind`` tells when all
+    of them serve the new route. The connection is shared across threads
+    behind a lock.
+    """
+    
+    def __init__(self, path: str = ":memory:", reader_ttl: float = READER_TTL):
+        """
+        Open (and create if needed) the route database.
+        
+        Args:
+            path: SQLite database file, or ":memory:" for a process-local store
+            reader_ttl: Seconds after its last acknowledgement a process is
+                no longer waited for
+        """
+        self.path = path
+        self.reader_ttl = reader_ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS layer_routes ("
+                "chapter_id TEXT NOT NULL, layer TEXT NOT NULL, target_layer TEXT NOT NULL, "
+                "model_id TEXT, index_name TEXT, PRIMARY KEY (chapter_id, layer))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS route_version (id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER NOT NULL)"
+            )
+            self._connection.execute("INSERT OR IGNORE INTO route_version (id, version) VALUES (0, 0)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS route_readers ("
+                "reader_id TEXT PRIMARY KEY, version INTEGER NOT NULL, seen_at REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE TABLE IF NOT EXISTS tracked_namespaces (namespace TEXT PRIMARY KEY)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS namespace_changes ("
+                "namespace TEXT NOT NULL, item_id TEXT NOT NULL, PRIMARY KEY (namespace, item_id))"
+            )
+    
+    def version(self) -> int:
+        """
+        Get the route version, bumped by every route change.
+        
+        Returns:
+            Current version
+        """
+        with self._lock:
+            return self._connection.execute("SELECT version FROM route_version WHERE id = 0").fetchone()[0]
+    
+    def routes(self) -> Tuple[int, List[LayerRoute]]:
+        """
+        List the recorded layer routes.
+        
+        Returns:
+            The route version and the routes it covers
+        """
+        with self._lock:
+            version = self._connection.execute("SELECT version FROM route_version WHERE id = 0").fetchone()[0]
+            cursor = self._connection.execute(
+                "SELECT chapter_id, layer, target_layer, model_id, index_name FROM layer_routes"
+            )
+            return version, [LayerRoute(*row) for row in cursor]
+    
+    def put_route(self, route: LayerRoute) -> int:
+        """
+        Record the layer, embedding model and index serving a layer.
+        
+        A route of a layer to itself with the default model and index is
+        deleted instead, serving the layer from its own namespace again.
+        
+        Args:
+            route: The layer's new route
+        
+        Returns:
+            The route version including the change
+        """
+        with self._lock, self._connection:
+            if route.target_layer == route.layer and route.model_id is None and route.index_name is None:
+                self._connection.execute(
+                    "DELETE FROM layer_routes WHERE chapter_id = ? AND layer = ?", (route.chapter_id, route.layer)
+                )
+            else:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO layer_routes (chapter_id, layer, target_layer, model_id, index_name) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (route.chapter_id, route.layer, route.target_layer, route.model_id, route.index_name),
+                )
+            self._connection.execute("UPDATE route_version SET version = version + 1 WHERE id = 0")
+            return self._connection.execute("SELECT version FROM route_version WHERE id = 0").fetchone()[0]
+    
+    def acknowledge(self, reader_id: str, version: int):
+        """
+        Record that a process serves the routes of a version.
+        
+        Args:
+            reader_id: Identifier of the process's router
+            version: Route version it has loaded
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO route_readers (reader_id, version, seen_at) VALUES (?, ?, ?)",
+                (reader_id, version, time.time()),
+            )
+    
+    def release(self, reader_id: str):
+        """
+        Stop waiting for a process that no longer serves any route.
+        
+        Args:
+            reader_id: Identifier of the process's router
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM route_readers WHERE reader_id = ?", (reader_id,))
+    
+    def readers_behind(self, version: int) -> int:
+        """
+        Count the live processes that have not loaded a route version yet.
+        
+        Args:
+            version: Route version to check
+        
+        Returns:
+            Processes acknowledging an older version within ``reader_ttl``
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                "SELECT COUNT(*) FROM route_readers WHERE version < ? AND seen_at > ?",
+                (version, time.time() - self.reader_ttl),
+            )
+            return cursor.fetchone()[0]
+    
+    def track(self, namespace: str):
+        """
+        Start logging the IDs changed in a namespace.
+        
+        Args:
+            namespace: Vector store namespace
+        """
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR IGNORE INTO tracked_namespaces (namespace) VALUES (?)", (namespace,))
+    
+    def untrack(self, namespace: str):
+        """
+        Stop logging a namespace's changes and drop those not yet taken.
+        
+        Args:
+            namespace: Vector store namespace
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM tracked_namespaces WHERE namespace = ?", (namespace,))
+            self._connection.execute("DELETE FROM namespace_changes WHERE namespace = ?", (namespace,))
+    
+    def is_tracked(self, namespace: str) -> bool:
+        """
+        Check whether a namespace's changes are logged.
+        
+        Args:
+            namespace: Vector store namespace
+        
+        Returns:
+            Whether ``track`` was called without a later ``untrack``
+        """
+        with self._lock:
+            cursor = self._connection.execute("SELECT 1 FROM tracked_namespaces WHERE namespace = ?", (namespace,))
+            return cursor.fetchone() is not None
+    
+    def record_changes(self, namespace: str, ids: Iterable[str]):
+        """
+        Log changed IDs if the namespace is tracked.
+        
+        Args:
+            namespace: Vector store namespace
+            ids: IDs written or deleted
+        """
+        rows = [(namespace, item_id, namespace) for item_id in ids]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO namespace_changes (namespace, item_id) "
+                "SELECT ?, ? WHERE EXISTS (SELECT 1 FROM tracked_namespaces WHERE namespace = ?)",
+                rows,
+            )
+    
+    def has_changes(self, namespace: str) -> bool:
+        """
+        Check whether a namespace has logged changes not yet taken.
+        
+        Args:
+            namespace: Vector store namespace
+        
+        Returns:
+            Whether ``take_changes`` would return IDs
+        """
+        with self._lock:
+            cursor = self._connection.execute("SELECT 1 FROM namespace_changes WHERE namespace = ? LIMIT 1", (namespace,))
+            return cursor.fetchone() is not None
+    
+    def take_changes(self, namespace: str) -> Set[str]:
+        """
+        Get and clear the IDs logged for a namespace.
+        
+        Args:
+            namespace: Vector store namespace
+        
+        Returns:
+            IDs changed since tracking began or the last call
+        """
+        with self._lock, self._connection:
+            # Hold the write lock so no other process logs an ID between the read and the delete
+            self._connection.execute("BEGIN IMMEDIATE")
+            cursor = self._connection.execute("SELECT item_id FROM namespace_changes WHERE namespace = ?", (namespace,))
+            ids = {item_id for item_id, in cursor}
+            self._connection.execute("DELETE FROM namespace_changes WHERE namespace = ?", (namespace,))
+        return ids
+    
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+
+class LayerRouter:
+    """
+    In-process view of the layer routes and the embedding services serving them.
+    
+    Without a route store every layer is served from its own namespace by
+    the default embedding model, and layers cannot be switched. With one,
+    the routes are reloaded whenever its version changed, checked at most
+    every ``poll_interval`` seconds before a route is resolved, and each
+    check is acknowledged so migrations know when this process follows
+    their switch.
+    """
+    
+    def __init__(self, route_store: Optional[SQLiteRouteStore] = None, poll_interval: float = ROUTE_POLL_INTERVAL):
+        """
+        Initialize the router and load the recorded routes.
+        
+        Args:
+            route_store: Shared route store (defaults to a SQLite store at
+                ``KNOWLEDGE_ROUTE_STORE`` when that is set)
+            poll_interval: Seconds between checks of the route version
+                (0 checks before every resolution)
+        """
+        route_store_path = os.environ.get("KNOWLEDGE_ROUTE_STORE")
+        if route_store is None and route_store_path:
+            route_store = SQLiteRouteStore(route_store_path)
+        self.route_store = route_store
+        self.poll_interval = poll_interval
+        self.reader_id = uuid.uuid4().hex
+        self.version = -1
+        self._lock = threading.RLock()
+        self._routes: Dict[Tuple[str, str], LayerRoute] = {}
+        self._checked_at = float("-inf")
+        self._listeners: List[Callable[[Optional[LayerRoute], Optional[LayerRoute]], None]] = []
+        self._embedding_services: Dict[str, Any] = {}
+        self.refresh(force=True)
+    
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reload the routes if the route store's version changed.
+        
+        Args:
+            force: Check now even if ``poll_interval`` has not elapsed
+        
+        Returns:
+            Whether any route changed
+        """
+        if self.route_store is None:
+            return False
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.poll_interval:
+            return False
+        
+        with self._lock:
+            self._checked_at = now
+            changes = []
+            if self.route_store.version() != self.version:
+                version, routes = self.route_store.routes()
+                loaded = {(route.chapter_id, route.layer): route for route in routes}
+                for key in self._routes.keys() | loaded.keys():
+                    if self._routes.get(key) != loaded.get(key):
+                        changes.append((self._routes.get(key), loaded.get(key)))
+                self._routes, self.version = loaded, version
+            for listener in self._listeners:
+                for old, new in changes:
+                    listener(old, new)
+            self.route_store.acknowledge(self.reader_id, self.version)
+        if changes:
+            logger.info(f"Loaded {len(changes)} changed layer routes (version {self.version})")
+        return bool(changes)
+    
+    def subscribe(self, listener: Callable[[Optional[LayerRoute], Optional[LayerRoute]], None]):
+        """
+        Call a function with every route change, after applying current routes.
+        
+        Args:
+            listener: Called with the old and new route of a layer (None
+                for a layer served from its own namespace)
+        """
+        with self._lock:
+            self._listeners.append(listener)
+            for route in self._routes.values():
+                listener(None, route)
+    
+    def route(self, chapter_id: str, layer: str) -> LayerRoute:
+        """
+        Get the route serving a layer.
+        
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layer: The knowledge layer
+        
+        Returns:
+            The recorded route, or the layer's own namespace and the
+            default model
+        """
+        self.refresh()
+        route = self._routes.get((chapter_id, layer))
+        return route if route is not None else LayerRoute(chapter_id, layer, layer)
+    
+    def routes(self) -> List[LayerRoute]:
+        """
+        List the routes currently loaded.
+        
+        Returns:
+            Routes of the layers not served from their own namespace
+        """
+        return list(self._routes.values())
+    
+    def model_id(self, chapter_id: str, layer: str) -> Optional[str]:
+        """
+        Get the embedding model of a layer's vectors.
+        
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layer: The knowledge layer
+        
+        Returns:
+            The model the layer was switched to, or None for the default
+        """
+        return self.route(chapter_id, layer).model_id
+    
+    def switch(self, route: LayerRoute) -> int:
+        """
+        Record a layer's new route and apply it in this process.
+        
+        Args:
+            route: The layer's new route
+        
+        Returns:
+            The route version other processes must acknowledge
+        
+        Raises:
+            ValueError: Without a route store, since other processes could
+                not follow the switch
+        """
+        if self.route_store is None:
+            raise ValueError(
+                "Switching layers needs a shared route store; pass one or set KNOWLEDGE_ROUTE_STORE"
+            )
+        version = self.route_store.put_route(route)
+        self.refresh(force=True)
+        return version
+    
+    def acknowledged(self, version: int) -> bool:
+        """
+        Check whether every live process has loaded a route version.
+        
+        Args:
+            version: Version returned by ``switch``
+        
+        Returns:
+            Whether no process still serves older routes
+        """
+        return self.route_store is None or self.route_store.readers_behind(version) == 0
+    
+    def track(self, namespace: str):
+        """
+        Start logging the IDs written to or deleted from a namespace by any process.
+        
+        Args:
+            namespace: Vector store namespace
+        
+        Raises:
+            ValueError: Without a route store
+        """
+        if self.route_store is None:
+            raise ValueError("Tracking changes needs a shared route store; pass one or set KNOWLEDGE_ROUTE_STORE")
+        self.route_store.track(namespace)
+    
+    def untrack(self, namespace: str):
+        """
+        Stop logging a namespace's changes.
+        
+        Args:
+            namespace: Vector store namespace
+        """
+        if self.route_store is not None:
+            self.route_store.untrack(namespace)
+    
+    def record_changes(self, namespace: str, ids: Iterable[str]):
+        """
+        Log changed IDs for a migration tracking the namespace.
+        
+        Args:
+            namespace: Vector store namespace
+            ids: IDs written or deleted
+        """
+        if self.route_store is not None:
+            self.route_store.record_changes(namespace, ids)
+    
+    def has_changes(self, namespace: str) -> bool:
+        """
+        Check whether a tracked namespace has changes not yet taken.
+        
+        Args:
+            namespace: Vector store namespace
+        
+        Returns:
+            Whether ``take_changes`` would return IDs
+        """
+        return self.route_store is not None and self.route_store.has_changes(namespace)
+    
+    def take_changes(self, namespace: str) -> Set[str]:
+        """
+        Get and reset the IDs changed since tracking began or the last call.
+        
+        Args:
+            namespace: Tracked vector store namespace
+        
+        Returns:
+            IDs written or deleted; empty when the namespace is not tracked
+        """
+        if self.route_store is None:
+            return set()
+        return self.route_store.take_changes(namespace)
+    
+    def register_embedding_service(self, embedding_service):
+        """
+        Make an embedding service available to layers switched to its model.
+        
+        Call at startup for every model a recorded route names.
+        
+        Args:
+            embedding_service: Service exposing ``model_id``
+        """
+        self._embedding_services[embedding_service.model_id] = embedding_service
+    
+    def embedding_service_for(self, chapter_id: str, layer: str, default):
+        """
+        Get the embedding service for a layer's queries and writes.
+        
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layer: The knowledge layer
+            default: Service used by layers not switched to another model
+        
+        Returns:
+            The service whose model produced the layer's vectors
+        
+        Raises:
+            ValueError: If the layer was switched to a model with no
+                registered service that the default cannot provide
+                (see ``EmbeddingService.for_model``)
+        """
+        model_id = self.model_id(chapter_id, layer)
+        if model_id is None or model_id == default.model_id:
+            return default
+        service = self._embedding_services.get(model_id)
+        if service is None and hasattr(default, "for_model"):
+            service = default.for_model(model_id)
+            if service is not None:
+                self.register_embedding_service(service)
+        if service is None:
+            raise ValueError(
+                f"Layer {layer} of {chapter_id} holds {model_id} embeddings; "
+                f"register an embedding service for that model"
+            )
+        return service
+    
+    async def embed_query(self, chapter_id: str, layers: Iterable[str], text: str, default) -> Dict[str, Any]:
+        """
+        Embed a query for several layers, once per model serving them.
+        
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layers: Knowledge layers to be searched
+            text: Query text
+            default: Service used by layers not switched to another model
+        
+        Returns:
+            Query embedding per layer
+        """
+        services = {layer: self.embedding_service_for(chapter_id, layer, default) for layer in layers}
+        distinct = list({id(service): service for service in services.values()}.values())
+        embeddings = await asyncio.gather(*[service.generate_embeddings(text) for service in distinct])
+        by_service = {id(service): embedding for service, embedding in zip(distinct, embeddings)}
+        return {layer: by_service[id(service)] for layer, service in services.items()}
+    
+    async def check_dimensions(self, vector_store, chapter_id: str, layers: Iterable[str], default):
+        """
+        Check that each layer's index accepts the embeddings of the model serving it.
+        
+        Run at startup: a layer switched to a projected or other model
+        must be held by an index of that model's dimension.
+        
+        Args:
+            vector_store: Vector store holding the layers
+            chapter_id: The ID of the GDG chapter
+            layers: Knowledge layers to check
+            default: Service used by layers not switched to another model
+        
+        Raises:
+            ValueError: If an index dimension does not match its layer's model
+        """
+        for layer in layers:
+            service = self.embedding_service_for(chapter_id, layer, default)
+            expected = await vector_store.layer_dimension(chapter_id, layer)
+            if expected is None:
+                continue
+            dimension = len(await service.generate_embeddings("dimension check"))
+            if dimension != expected:
+                raise ValueError(
+                    f"Layer {layer} of {chapter_id} is served by {service.model_id} embeddings of "
+                    f"{dimension} dimensions but its index has {expected}"
+                )
+    
+    def check_dimensions_in_background(self, vector_store, chapter_id: str, layers: Iterable[str], default) -> Optional[asyncio.Task]:
+        """
+        Start ``check_dimensions`` on the running event loop, for agent constructors.
+        
+        Args:
+            vector_store: Vector store holding the layers
+            chapter_id: The ID of the GDG chapter
+            layers: Knowledge layers to check
+            default: Service used by layers not switched to another model
+        
+        Returns:
+            The check task, whose mismatches are logged as errors, or None
+            outside an event loop
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        
+        task = loop.create_task(self.check_dimensions(vector_store, chapter_id, list(layers), default))
+        task.add_done_callback(_log_dimension_check_failure)
+        return task
+    
+    def close(self):
+        """Stop being waited for by migrations."""
+        if self.route_store is not None:
+            self.route_store.release(self.reader_id)
+
+
+def _log_dimension_check_failure(task: asyncio.Task):
+    """Log a failed background dimension check."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Checking layer index dimensions failed: {task.exception()}")
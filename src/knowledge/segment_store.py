@@ -0,0 +1,552 @@
+"""Append-only, memory-mapped vector segments for local namespaces.
+
+A persisted namespace is a directory of segments. Each segment stores:
+
+- ``<name>.vec``: fixed-width float32 matrix, one row per item
+- ``<name>.norms``: float32 vector norms, one per row
+- ``<name>.meta``: concatenated JSON metadata records
+- ``<name>.offsets``: int64 offsets of each record in ``.meta`` (rows + 1)
+- ``<name>.ids``: newline-separated item IDs
+
+Files are only ever appended to, and ``.offsets`` is written last, so the
+number of committed rows is always ``len(offsets) - 1``. Segments are opened
+with ``mmap`` on first use, which keeps ``LocalVectorStore.initialize`` O(1)
+and lets pages fault in lazily when a namespace is first queried. When the
+same ID is written more than once, the row in the newest segment wins.
+Deletes append tombstone rows (zero vector, norm -1) that hide older rows
+of the same ID; compaction drops both. Rows also carry in-memory append
+positions, which compaction preserves, so paging offsets stay valid while
+segments are merged underneath a scan. Decoded metadata is kept only for
+a bounded number of recently returned rows; filters and compaction decode
+records without caching them, so a namespace never becomes resident.
+"""
+
+import json
+import logging
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Sequence, Tuple
+
+import numpy as np
+
+from .filters import matches_filter
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Guards cosine similarity against zero-length vectors
+_EPSILON = 1e-12
+
+_EXTENSIONS = (".vec", ".norms", ".meta", ".offsets", ".ids")
+
+# Norm recorded for tombstone rows; real norms are never negative
+_TOMBSTONE_NORM = -1.0
+
+# Decoded metadata records kept per segment for rows returned recently
+_METADATA_CACHE_ROWS = 1024
+
+
+class Segment:
+    """
+    One append-only segment of a persisted namespace.
+    
+    Segment names are ``<sequence>.<generation>``; segments are ordered by
+    sequence, then generation, so a compacted segment (same sequence as the
+    newest segment it replaced, next generation) sorts after its inputs.
+    """
+    
+    def __init__(self, directory: str, sequence: int, generation: int, dimension: int):
+        self.directory = directory
+        self.sequence = sequence
+        self.generation = generation
+        self.dimension = dimension
+        self.name = f"{sequence:08d}.{generation}"
+        
+        offsets_path = self._path(".offsets")
+        if not os.path.exists(offsets_path):
+            # A new segment commits the leading zero offset first
+            with open(offsets_path, "wb") as f:
+                f.write(np.zeros(1, dtype=np.int64).tobytes())
+        self.count = os.path.getsize(offsets_path) // 8 - 1
+        
+        self.live = np.ones(self.count, dtype=bool)
+        self.positions = np.arange(self.count, dtype=np.int64)
+        self._ids: Optional[List[str]] = None
+        self._vectors: Optional[np.ndarray] = None
+        self._norms: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._blob: Optional[mmap.mmap] = None
+        self._metadata_cache: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+    
+    def _path(self, extension: str) -> str:
+        return os.path.join(self.directory, self.name + extension)
+    
+    def recover(self):
+        """Truncate bytes written after the last committed row."""
+        offsets = np.fromfile(self._path(".offsets"), dtype=np.int64)
+        self._truncate(".vec", self.count * self.dimension * 4)
+        self._truncate(".norms", self.count * 4)
+        self._truncate(".meta", int(offsets[-1]))
+        ids = self.ids
+        with open(self._path(".ids"), "w", encoding="utf-8") as f:
+            f.writelines(f"{item_id}\n" for item_id in ids)
+    
+    def _truncate(self, extension: str, size: int):
+        path = self._path(extension)
+        with open(path, "ab") as f:
+            if f.tell() > size:
+                f.truncate(size)
+    
+    @property
+    def ids(self) -> List[str]:
+        """IDs of committed rows, read once and then kept in memory."""
+        if self._ids is None:
+            path = self._path(".ids")
+            ids = []
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    ids = f.read().split("\n")
+            self._ids = ids[:self.count]
+        return self._ids
+    
+    @property
+    def vectors(self) -> np.ndarray:
+        """Memory-mapped row matrix; pages are read on first access."""
+        if self._vectors is None:
+            self._vectors = np.memmap(
+                self._path(".vec"), dtype=np.float32, mode="r", shape=(self.count, self.dimension)
+            ) if self.count else np.empty((0, self.dimension), dtype=np.float32)
+        return self._vectors
+    
+    @property
+    def norms(self) -> np.ndarray:
+        """Memory-mapped row norms."""
+        if self._norms is None:
+            self._norms = np.memmap(
+                self._path(".norms"), dtype=np.float32, mode="r", shape=(self.count,)
+            ) if self.count else np.empty(0, dtype=np.float32)
+        return self._norms
+    
+    def metadata(self, row: int, cache: bool = True) -> Dict[str, Any]:
+        """
+        Decode the metadata record of a row.
+        
+        Args:
+            row: Row number
+            cache: Keep the decoded record in the segment's bounded LRU;
+                passes over many rows (filtering, compaction) skip it
+        """
+        cached = self._metadata_cache.get(row)
+        if cached is not None:
+            self._metadata_cache.move_to_end(row)
+            return cached
+        
+        if self._offsets is None:
+            self._offsets = np.memmap(self._path(".offsets"), dtype=np.int64, mode="r", shape=(self.count + 1,))
+        if self._blob is None:
+            with open(self._path(".meta"), "rb") as f:
+                self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        metadata = json.loads(self._blob[start:end])
+        if cache:
+            self._metadata_cache[row] = metadata
+            if len(self._metadata_cache) > _METADATA_CACHE_ROWS:
+                self._metadata_cache.popitem(last=False)
+        return metadata
+    
+    def append(
+        self,
+        ids: Sequence[str],
+        matrix: np.ndarray,
+        norms: np.ndarray,
+        metadata: Sequence[Dict[str, Any]],
+        positions: np.ndarray,
+    ):
+        """Append rows and commit them by writing their offsets last."""
+        records = [json.dumps(item_metadata, default=str).encode("utf-8") for item_metadata in metadata]
+        meta_path = self._path(".meta")
+        start = os.path.getsize(meta_path) if os.path.exists(meta_path) else 0
+        offsets = start + np.cumsum([len(record) for record in records], dtype=np.int64)
+        
+        with open(self._path(".vec"), "ab") as f:
+            f.write(np.ascontiguousarray(matrix, dtype=np.float32).tobytes())
+        with open(self._path(".norms"), "ab") as f:
+            f.write(np.asarray(norms, dtype=np.float32).tobytes())
+        with open(meta_path, "ab") as f:
+            f.write(b"".join(records))
+        with open(self._path(".ids"), "a", encoding="utf-8") as f:
+            f.writelines(f"{item_id}\n" for item_id in ids)
+        with open(self._path(".offsets"), "ab") as f:
+            f.write(offsets.tobytes())
+        
+        self.ids.extend(ids)
+        self.count += len(ids)
+        self.live = np.concatenate([self.live, np.ones(len(ids), dtype=bool)])
+        self.positions = np.concatenate([self.positions, np.asarray(positions, dtype=np.int64)])
+        self._close_maps()
+    
+    def _close_maps(self):
+        # Maps are re-created on next access so they cover appended rows
+        self._vectors = self._norms = self._offsets = None
+        if self._blob is not None:
+            self._blob.close()
+            self._blob = None
+    
+    def remove(self):
+        """Delete the segment's files."""
+        for extension in _EXTENSIONS:
+            path = self._path(extension)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class SegmentedNamespace:
+    """
+    Persisted namespace index made of append-only memory-mapped segments.
+    
+    Writes go to the newest (active) segment until it holds
+    ``segment_size`` rows. Once more than ``max_segments`` sealed segments
+    accumulate, a background thread merges them into one segment that keeps
+    only the latest row of every ID.
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        metric: str = "cosine",
+        segment_size: int = 10000,
+        max_segments: int = 8,
+    ):
+        """
+        Initialize the namespace without touching its files.
+        
+        Args:
+            path: Directory holding the namespace's segments
+            metric: Similarity metric for new namespaces ("cosine" or "dotproduct")
+            segment_size: Maximum rows per segment
+            max_segments: Sealed segments allowed before background compaction
+        """
+        self.path = path
+        self.metric = metric
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        self.dimension: Optional[int] = None
+        
+        self._lock = threading.RLock()
+        self._opened = False
+        self._segments: List[Segment] = []
+        self._live: Dict[str, Tuple[Segment, int]] = {}
+        self._next_position = 0
+        self._compaction: Optional[threading.Thread] = None
+    
+    def __len__(self) -> int:
+        self._open()
+        return len(self._live)
+    
+    @property
+    def ids(self) -> List[str]:
+        """IDs of live items."""
+        self._open()
+        return list(self._live)
+    
+    def _open(self):
+        """Discover segments and build the ID map on first access."""
+        if self._opened:
+            return
+        
+        with self._lock:
+            if self._opened:
+                return
+            
+            header_path = os.path.join(self.path, "namespace.json")
+            if os.path.exists(header_path):
+                with open(header_path) as f:
+                    header = json.load(f)
+                self.dimension = header["dimension"]
+                self.metric = header["metric"]
+                
+                keys = sorted(
+                    tuple(int(part) for part in name[:-len(".offsets")].split("."))
+                    for name in os.listdir(self.path) if name.endswith(".offsets")
+                )
+                self._segments = [Segment(self.path, seq, gen, self.dimension) for seq, gen in keys]
+                if self._segments:
+                    self._segments[-1].recover()
+                for segment in self._segments:
+                    segment.positions = self._next_position + np.arange(segment.count, dtype=np.int64)
+                    self._next_position += segment.count
+                self._rebuild_live()
+            
+            self._opened = True
+    
+    def _rebuild_live(self):
+        """Recompute which row holds the latest version of every ID."""
+        self._live = {}
+        for segment in self._segments:
+            segment.live = np.ones(segment.count, dtype=bool)
+            self._mark_live(segment, 0, segment.ids, np.asarray(segment.norms))
+    
+    def _mark_live(self, segment: Segment, first_row: int, ids: Sequence[str], norms: np.ndarray):
+        """Make rows the latest version of their IDs; tombstones remove the ID."""
+        for row, (item_id, norm) in enumerate(zip(ids, norms), start=first_row):
+            previous = self._live.pop(item_id, None)
+            if previous is not None:
+                previous[0].live[previous[1]] = False
+            if norm == _TOMBSTONE_NORM:
+                segment.live[row] = False
+            else:
+                self._live[item_id] = (segment, row)
+    
+    def _new_segment(self, sequence: int, generation: int = 0) -> Segment:
+        return Segment(self.path, sequence, generation, self.dimension)
+    
+    def upsert(
+        self,
+        ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        metadata: Sequence[Dict[str, Any]],
+    ):
+        """
+        Append items to the active segment, starting new segments as needed.
+        
+        Args:
+            ids: Item IDs
+            vectors: One vector per item
+            metadata: One metadata dict per item
+        """
+        self._open()
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        
+        with self._lock:
+            if self.dimension is None:
+                os.makedirs(self.path, exist_ok=True)
+                self.dimension = matrix.shape[1]
+                with open(os.path.join(self.path, "namespace.json"), "w") as f:
+                    json.dump({"dimension": self.dimension, "metric": self.metric}, f)
+            if matrix.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Vector dimension {matrix.shape[1]} does not match index dimension {self.dimension}"
+                )
+            
+            self._append(ids, matrix, np.linalg.norm(matrix, axis=1), metadata)
+            
+            if len(self._segments) - 1 > self.max_segments:
+                self.compact(background=True)
+    
+    def delete(self, ids: Sequence[str]) -> int:
+        """
+        Delete items by appending tombstone rows.
+        
+        Compaction is not started here, so a purge deleting as it goes does
+        not merge segments after every batch; ``compact`` reclaims the space
+        afterwards.
+        
+        Args:
+            ids: IDs to delete; unknown IDs are ignored
+        
+        Returns:
+            Number of items deleted
+        """
+        self._open()
+        with self._lock:
+            ids = [item_id for item_id in dict.fromkeys(ids) if item_id in self._live]
+            if ids:
+                self._append(
+                    ids,
+                    np.zeros((len(ids), self.dimension), dtype=np.float32),
+                    np.full(len(ids), _TOMBSTONE_NORM, dtype=np.float32),
+                    [{}] * len(ids),
+                )
+        return len(ids)
+    
+    def _append(
+        self,
+        ids: Sequence[str],
+        matrix: np.ndarray,
+        norms: np.ndarray,
+        metadata: Sequence[Dict[str, Any]],
+    ):
+        """Append rows to the active segment, starting new segments as needed."""
+        position = 0
+        while position < len(ids):
+            if not self._segments or self._segments[-1].count >= self.segment_size:
+                sequence = self._segments[-1].sequence + 1 if self._segments else 1
+                self._segments.append(self._new_segment(sequence))
+            
+            segment = self._segments[-1]
+            end = position + min(len(ids) - position, self.segment_size - segment.count)
+            first_row = segment.count
+            positions = self._next_position + np.arange(end - position, dtype=np.int64)
+            self._next_position += end - position
+            segment.append(
+                ids[position:end], matrix[position:end], norms[position:end], metadata[position:end], positions
+            )
+            self._mark_live(segment, first_row, ids[position:end], norms[position:end])
+            position = end
+    
+    def ids_page(self, offset: int, limit: int) -> Tuple[List[str], Optional[int]]:
+        """
+        Return up to ``limit`` live IDs starting at append position ``offset``.
+        
+        Positions increase across segments in sequence order and survive
+        compaction, so a scan running concurrently with one neither skips
+        nor repeats items.
+        
+        Returns:
+            The IDs and the offset of the next page (``None`` at the end)
+        """
+        self._open()
+        ids: List[str] = []
+        with self._lock:
+            for segment in self._segments:
+                first = int(np.searchsorted(segment.positions, offset))
+                if first >= segment.count:
+                    continue
+                rows = np.flatnonzero(segment.live[first:segment.count])[:limit - len(ids)] + first
+                segment_ids = segment.ids
+                ids.extend(segment_ids[row] for row in rows)
+                if len(ids) == limit:
+                    next_offset = int(segment.positions[rows[-1]]) + 1
+                    return ids, next_offset if next_offset < self._next_position else None
+        return ids, None
+    
+    def get(self, item_id: str) -> Optional[Tuple[np.ndarray, Dict[str, Any]]]:
+        """Return the stored vector and metadata for an ID, if present."""
+        self._open()
+        # Holding the lock keeps compaction from removing the segment mid-read
+        with self._lock:
+            location = self._live.get(item_id)
+            if location is None:
+                return None
+            segment, row = location
+            return np.array(segment.vectors[row]), segment.metadata(row)
+    
+    def search(
+        self,
+        query: Sequence[float],
+        top_k: int,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Find the most similar items across all segments.
+        
+        Args:
+            query: Query vector
+            top_k: Number of results to return
+            filter: Optional metadata filter
+        
+        Returns:
+            ``(id, score, metadata)`` tuples ordered by descending score
+        """
+        self._open()
+        if top_k <= 0 or not self._live:
+            return []
+        
+        query_vector = np.asarray(query, dtype=np.float32).reshape(-1)
+        if query_vector.shape[0] != self.dimension:
+            raise ValueError(
+                f"Vector dimension {query_vector.shape[0]} does not match index dimension {self.dimension}"
+            )
+        query_norm = np.linalg.norm(query_vector)
+        
+        # Holding the lock keeps compaction from swapping segments mid-query
+        with self._lock:
+            candidates = []
+            for segment in self._segments:
+                mask = segment.live.copy()
+                if filter:
+                    for row in np.flatnonzero(mask):
+                        if not matches_filter(segment.metadata(row, cache=False), filter):
+                            mask[row] = False
+                if not mask.any():
+                    continue
+                
+                scores = segment.vectors @ query_vector
+                if self.metric == "cosine":
+                    scores /= np.maximum(segment.norms * query_norm, _EPSILON)
+                scores[~mask] = -np.inf
+                
+                k = min(top_k, int(mask.sum()))
+                top = np.argpartition(-scores, k - 1)[:k]
+                candidates.extend((float(scores[row]), segment, int(row)) for row in top)
+            
+            candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+            return [
+                (segment.ids[row], score, segment.metadata(row))
+                for score, segment, row in candidates[:top_k]
+            ]
+    
+    def wait_for_compaction(self):
+        """Block until a running background compaction finishes."""
+        if self._compaction is not None:
+            self._compaction.join()
+    
+    def compact(self, background: bool = False, chunk_size: int = 4096) -> int:
+        """
+        Merge all sealed segments into a single segment.
+        
+        Sealed segments are immutable, so the merge runs without holding the
+        namespace lock; only the final swap is locked. Writes made meanwhile
+        land in the active segment, which is newer and therefore still wins.
+        Inputs are deleted oldest first once the merged segment is complete.
+        
+        Args:
+            background: Merge on a background thread and return at once;
+                nothing new is started while a background merge runs
+            chunk_size: Rows copied per write
+        
+        Returns:
+            Number of segments merged (0 when merging in the background)
+        """
+        if background:
+            if self._compaction is None or not self._compaction.is_alive():
+                self._compaction = threading.Thread(
+                    target=self.compact,
+                    kwargs={"chunk_size": chunk_size},
+                    name=f"compact-{os.path.basename(self.path)}",
+                    daemon=True,
+                )
+                self._compaction.start()
+            return 0
+        
+        self._open()
+        with self._lock:
+            sealed = self._segments[:-1]
+            if len(sealed) < 2:
+                return 0
+            masks = [segment.live.copy() for segment in sealed]
+        
+        newest = sealed[-1]
+        merged = self._new_segment(newest.sequence, newest.generation + 1)
+        try:
+            for segment, mask in zip(sealed, masks):
+                ids = segment.ids
+                rows = np.flatnonzero(mask)
+                for start in range(0, len(rows), chunk_size):
+                    chunk = rows[start:start + chunk_size]
+                    merged.append(
+                        [ids[row] for row in chunk],
+                        np.asarray(segment.vectors[chunk]),
+                        np.asarray(segment.norms[chunk]),
+                        [segment.metadata(row, cache=False) for row in chunk],
+                        segment.positions[chunk],
+                    )
+        except Exception as e:
+            logger.error(f"Compaction of {self.path} failed: {e}")
+            merged.remove()
+            raise
+        
+        with self._lock:
+            self._segments = [merged] + self._segments[len(sealed):]
+            self._rebuild_live()
+        
+        for segment in sealed:
+            segment.remove()
+        
+        logger.info(f"Compacted {len(sealed)} segments of {self.path} into {merged.name}")
+        return len(sealed)
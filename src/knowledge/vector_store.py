@@ -1,7 +1,107 @@
 """Vector database interface for the knowledge management system."""
 
+import asyncio
+import functools
+import json
 import os
-from typing import Dict, List, Optional, Any, Union
+import threading
+import time
+import weakref
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Union, Iterable, AsyncIterable, AsyncIterator, Tuple, Callable, Awaitable
+
+import numpy as np
+
+from .document_store import SQLiteDocumentStore, compact_metadata
+from .filters import matches_filter
+from .lexical_index import BM25Index, item_text, reciprocal_rank_fusion
+from .query_cache import QueryCache
+from .ranking import ScoreCalibrator, merge_rankings
+from .route_store import LayerRoute, LayerRouter
+
+# Pinecone accepts at most 1000 vectors and 2MB per upsert request
+MAX_UPSERT_BATCH_SIZE = 1000
+MAX_UPSERT_REQUEST_BYTES = 2 * 1024 * 1024
+
+# Pinecone accepts at most 1000 IDs per fetch or delete request
+MAX_FETCH_BATCH_SIZE = 1000
+MAX_DELETE_BATCH_SIZE = 1000
+
+# Seconds a successful index-existence check is trusted process-wide
+INDEX_CHECK_TTL = 300.0
+
+
+@dataclass
+class BatchWriteResult:
+    """Outcome of a bulk write to the vector store."""
+    succeeded: int = 0
+    failed: List[Dict[str, Any]] = field(default_factory=list)
+    
+    @property
+    def total(self) -> int:
+        """Number of items that were attempted."""
+        return self.succeeded + len(self.failed)
+
+
+class _IndexRegistry:
+    """
+    Process-wide Pinecone clients and index handles.
+    
+    Every ``VectorStore`` built with the same API key and index name shares
+    one client and one index handle, and the ``list_indexes`` existence
+    check is repeated at most once per TTL instead of once per instance.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[str, Any] = {}
+        self._indexes: Dict[Tuple[str, str], Any] = {}
+        self._checked: Dict[Tuple[str, str], float] = {}
+    
+    def get_index(self, api_key: str, index_name: str, check_ttl: float = INDEX_CHECK_TTL):
+        """
+        Return the shared handle for an index, connecting on first use.
+        
+        Args:
+            api_key: Pinecone API key
+            index_name: Pinecone index name
+            check_ttl: Seconds a previous existence check stays valid
+            
+        Returns:
+            Pinecone index handle
+        """
+        key = (api_key, index_name)
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is None:
+                from pinecone import Pinecone
+                
+                client = self._clients[api_key] = Pinecone(api_key=api_key)
+            
+            checked = self._checked.get(key)
+            if checked is None or time.monotonic() - checked > check_ttl:
+                existing_indexes = [idx.name for idx in client.list_indexes()]
+                if index_name not in existing_indexes:
+                    raise ValueError(f"Index '{index_name}' does not exist. Please create it in the Pinecone dashboard.")
+                self._checked[key] = time.monotonic()
+            
+            index = self._indexes.get(key)
+            if index is None:
+                index = self._indexes[key] = client.Index(index_name)
+            return index
+    
+    def clear(self):
+        """Forget all clients, handles and existence checks."""
+        with self._lock:
+            self._clients.clear()
+            self._indexes.clear()
+            self._checked.clear()
+
+
+_index_registry = _IndexRegistry()
+
 
 class VectorStore:
     """
@@ -16,6 +116,16 @@ class VectorStore:
         api_key: Optional[str] = None,
         index_name: Optional[str] = None,
         namespace_prefix: str = "gdg",
+        max_workers: int = 8,
+        max_pending: int = 64,
+        query_cache_size: int = 1024,
+        query_cache_ttl: float = 300.0,
+        lexical_index: bool = False,
+        lexical_index_size: Optional[int] = 10000,
+        lexical_index_ttl: Optional[float] = 300.0,
+        index_check_ttl: float = INDEX_CHECK_TTL,
+        document_store: Optional[SQLiteDocumentStore] = None,
+        router: Optional[LayerRouter] = None,
     ):
         """
         Initialize the vector store.
@@ -24,48 +134,231 @@ class VectorStore:
             api_key: Pinecone API key (defaults to environment variable)
             index_name: Pinecone index name (defaults to environment variable)
             namespace_prefix: Prefix for Pinecone namespaces
+            max_workers: Size of the thread pool running blocking client calls
+            max_pending: Maximum number of calls queued or running on the pool
+                before callers wait for a free slot
+            query_cache_size: Maximum number of cached query results
+                (0 disables the query cache)
+            query_cache_ttl: Seconds a cached query result stays valid
+            lexical_index: Maintain a BM25 index over the text of items
+                written through this store, used by ``hybrid_query``. It
+                lives in this process only, so it is off by default; see
+                ``build_lexical_index``
+            lexical_index_size: Maximum documents per namespace in the
+                lexical index (None for no limit)
+            lexical_index_ttl: Seconds after ``build_lexical_index`` during
+                which the lexical index may answer ``hybrid_query`` without
+                a vector query; other processes' writes are only seen by
+                the next build (None trusts the index indefinitely, for
+                stores no other process writes to)
+            index_check_ttl: Seconds a process-wide index-existence check
+                stays valid before a new connection repeats it
+            document_store: Side-car store for full item metadata; vectors
+                then carry only ``compact_metadata`` (defaults to a SQLite
+                store at ``KNOWLEDGE_DOCUMENT_STORE`` when that is set)
+            router: Routes of layers switched by embedding migrations to
+                other namespaces (defaults to one on the route store at
+                ``KNOWLEDGE_ROUTE_STORE`` when that is set); changes of
+                migrated layers are logged through it
         """
         self.api_key = api_key or os.environ.get("PINECONE_API_KEY")
         self._index_name = index_name or os.environ.get("PINECONE_INDEX_NAME", "gdg-community")
         self.namespace_prefix = namespace_prefix
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.index_check_ttl = index_check_ttl
         self._initialized = False
+        self._index = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # One backpressure semaphore per event loop using this store
+        self._pending_limits = weakref.WeakKeyDictionary()
+        self.query_cache = QueryCache(max_size=query_cache_size, ttl=query_cache_ttl)
+        self.lexical_index = lexical_index
+        self.lexical_index_size = lexical_index_size
+        self.lexical_index_ttl = lexical_index_ttl
+        self._lexical: Dict[str, BM25Index] = {}
+        # Writes and deletes started per namespace, compared with the
+        # lexical index's own count to tell whether it missed any
+        self._write_versions: Dict[str, int] = defaultdict(int)
+        # Retired namespace -> replacement, for writes addressed before a switch
+        self._redirects: Dict[str, str] = {}
+        # Namespaces kept in another Pinecone index than the default one
+        self._namespace_indexes: Dict[str, str] = {}
+        self._writes_in_flight: Dict[str, int] = defaultdict(int)
+        # Score distribution of each embedding model, for merging layers
+        # served by different models
+        self.score_calibrator = ScoreCalibrator()
+        
+        document_store_path = os.environ.get("KNOWLEDGE_DOCUMENT_STORE")
+        if document_store is None and document_store_path:
+            document_store = SQLiteDocumentStore(document_store_path)
+        self.document_store = document_store
+        self.router = router or LayerRouter()
+        self.router.subscribe(self._apply_route)
         
     def initialize(self):
-        """Initialize the Pinecone client and create index if needed."""
-        from pinecone import Pinecone
+        """
+        Mark the store ready without any network calls.
         
-        if not self._initialized:
-            # Initialize Pinecone with new API
-            self._pc = Pinecone(api_key=self.api_key)
-            
-            # Check if index exists
-            existing_indexes = [idx.name for idx in self._pc.list_indexes()]
-            if self._index_name not in existing_indexes:
-                raise ValueError(f"Index '{self._index_name}' does not exist. Please create it in the Pinecone dashboard.")
-                
-            # Connect to the index
-            self.index = self._pc.Index(self._index_name)
-            self._initialized = True
+        The Pinecone connection is made lazily by the first operation that
+        needs the index (on a worker thread), so constructing stores and the
+        agents that hold them costs no round-trips.
+        """
+        self._initialized = True
     
-    def get_namespace(self, chapter_id: str, layer: str) -> str:
+    def connect(self):
+        """
+        Resolve the shared Pinecone index handle now.
+        
+        Raises:
+            ValueError: If the index does not exist
+        """
+        if self._index is None:
+            self._index = _index_registry.get_index(self.api_key, self._index_name, self.index_check_ttl)
+        self._initialized = True
+        return self._index
+    
+    @property
+    def index(self):
+        """Pinecone index handle, connected on first access."""
+        if self._index is None:
+            return self.connect()
+        return self._index
+    
+    @index.setter
+    def index(self, index):
+        self._index = index
+    
+    def close(self):
+        """Shut down the thread pool used for blocking client calls."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+    
+    def get_namespace(self, chapter_id: str, layer: str, routed: bool = True) -> str:
         """
         Get the namespace for a specific chapter and knowledge layer.
         
         Args:
             chapter_id: The ID of the GDG chapter
             layer: The knowledge layer (semantic, kinetic, or dynamic)
+            routed: Follow the layer's route; False gives the layer's own
+                namespace even after it was switched to another one
             
         Returns:
             Formatted namespace string
         """
+        if routed:
+            layer = self.router.route(chapter_id, layer).target_layer
         return f"{self.namespace_prefix}-{chapter_id}-{layer}"
     
+    def resolve_layer(self, chapter_id: str, layer: str) -> str:
+        """
+        Get the layer whose namespace currently serves a layer.
+        
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layer: The knowledge layer (semantic, kinetic, or dynamic)
+            
+        Returns:
+            The layer itself, or the layer it was switched to
+        """
+        return self.router.route(chapter_id, layer).target_layer
+    
+    def switch_layer(
+        self,
+        chapter_id: str,
+        layer: str,
+        target_layer: str,
+        model_id: Optional[str] = None,
+        index_name: Optional[str] = None,
+    ) -> bool:
+        """
+        Atomically serve a layer from another layer's namespace.
+        
+        The switch only happens while no write to the current namespace is
+        in flight here and no tracked change is waiting to be copied, so
+        nothing written before it is lost. It is recorded in the router's
+        route store, which every process polls before its operations;
+        writes already addressed to the old namespace (buffered batches)
+        are redirected to the new one. Processes that have not loaded the
+        route yet keep writing the old namespace, so a migration keeps
+        tracking it until ``router.acknowledged`` the switch's version.
+        
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layer: The knowledge layer to switch
+            target_layer: Layer whose namespace serves reads and writes of
+                ``layer`` from now on
+            model_id: Embedding model of the target namespace's vectors
+                (None for the default model); register its service with
+                ``router.register_embedding_service``
+            index_name: Pinecone index holding the target namespace
+                (defaults to the one set by ``place_layer``)
+            
+        Returns:
+            Whether the switch happened; False means changes are pending
+            and the caller should catch up and retry
+        
+        Raises:
+            ValueError: If the router has no route store
+        """
+        source = self.get_namespace(chapter_id, layer)
+        target = self.get_namespace(chapter_id, target_layer, routed=False)
+        if self.router.has_changes(source) or self._writes_in_flight[source]:
+            return False
+        
+        index_name = index_name or self._namespace_indexes.get(target)
+        self.router.switch(LayerRoute(chapter_id, layer, target_layer, model_id, index_name))
+        return True
+    
+    def _apply_route(self, old: Optional[LayerRoute], new: Optional[LayerRoute]):
+        """Redirect writes and place the namespace of a changed route."""
+        route = new or old
+        source = self.get_namespace(route.chapter_id, old.target_layer if old else route.layer, routed=False)
+        target = self.get_namespace(route.chapter_id, new.target_layer if new else route.layer, routed=False)
+        if new is not None and new.index_name is not None:
+            self._namespace_indexes[target] = new.index_name
+        self._redirects.pop(target, None)
+        if source != target:
+            self._redirects[source] = target
+    
+    def place_layer(self, chapter_id: str, layer: str, index_name: str):
+        """
+        Keep a layer's own namespace in another Pinecone index.
+        
+        Used for migration shadows whose vectors have another dimension
+        than the default index; the placement is recorded with the switch.
+        
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layer: The knowledge layer
+            index_name: Existing Pinecone index of the layer's dimension
+        """
+        self._namespace_indexes[self.get_namespace(chapter_id, layer, routed=False)] = index_name
+    
+    async def layer_dimension(self, chapter_id: str, layer: str) -> Optional[int]:
+        """
+        Get the vector dimension a layer's namespace accepts.
+        
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layer: The knowledge layer
+            
+        Returns:
+            The dimension of the index holding the namespace, or None
+            when it is not fixed yet
+        """
+        if not self._initialized:
+            await self._run(self.initialize)
+        return await self._run(self._dimension, self.get_namespace(chapter_id, layer))
+    
     async def store_item(
         self,
         chapter_id: str,
         layer: str,
         item_id: str,
-        embedding: List[float],
+        embedding: Union[List[float], np.ndarray],
         metadata: Dict[str, Any],
     ):
         """
@@ -79,27 +372,125 @@ class VectorStore:
             metadata: Additional metadata for the item
         """
         if not self._initialized:
-            self.initialize()
+            await self._run(self.initialize)
             
         namespace = self.get_namespace(chapter_id, layer)
         
         # Upsert the vector into Pinecone
-        self.index.upsert(
-            vectors=[(item_id, embedding, metadata)],
-            namespace=namespace
-        )
+        vectors = [(item_id, embedding, metadata)]
+        namespace = await self._mutate(namespace, [item_id], self._write, vectors)
+        self._index_text(namespace, vectors)
+    
+    async def store_items(
+        self,
+        items: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        batch_size: int = 100,
+        max_concurrency: int = 4,
+    ) -> BatchWriteResult:
+        """
+        Store many knowledge items with batched, concurrent upserts.
+        
+        Items are grouped by namespace and sent in chunks that respect the
+        backend's payload limits. Items are consumed lazily, so a generator
+        can stream an arbitrarily large restore through a bounded buffer.
+        
+        Args:
+            items: Dicts with the same keys as ``store_item`` arguments
+                (chapter_id, layer, item_id, embedding, metadata)
+            batch_size: Maximum number of vectors per upsert request
+            max_concurrency: Maximum number of upsert requests in flight
+            
+        Returns:
+            Count of stored items and a list of per-item failures
+        """
+        if not self._initialized:
+            await self._run(self.initialize)
+        
+        batch_size = max(1, min(batch_size, MAX_UPSERT_BATCH_SIZE))
+        result = BatchWriteResult()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        pending = set()
+        
+        # Per-namespace buffers of (chapter_id, layer, vector tuple)
+        buffers: Dict[str, List[tuple]] = defaultdict(list)
+        buffer_bytes: Dict[str, int] = defaultdict(int)
+        
+        async def send(namespace: str, batch: List[tuple]):
+            try:
+                vectors = [vector for _, _, vector in batch]
+                written = await self._mutate(namespace, [vector[0] for vector in vectors], self._write, vectors)
+                self._index_text(written, vectors)
+                result.succeeded += len(batch)
+            except Exception as e:
+                result.failed.extend(
+                    {"chapter_id": chapter_id, "layer": layer, "id": vector[0], "error": str(e)}
+                    for chapter_id, layer, vector in batch
+                )
+            finally:
+                semaphore.release()
+        
+        async def flush(namespace: str):
+            batch = buffers.pop(namespace, [])
+            buffer_bytes.pop(namespace, None)
+            if not batch:
+                return
+            # Wait for a free slot so the producer cannot outrun the backend
+            await semaphore.acquire()
+            task = asyncio.ensure_future(send(namespace, batch))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        
+        async def add(item: Dict[str, Any]):
+            try:
+                chapter_id, layer = item["chapter_id"], item["layer"]
+                vector = (item["item_id"], item["embedding"], item.get("metadata") or {})
+                size = _estimate_vector_bytes(vector)
+            except Exception as e:
+                result.failed.append({
+                    "chapter_id": item.get("chapter_id"),
+                    "layer": item.get("layer"),
+                    "id": item.get("item_id"),
+                    "error": f"Invalid item: {e}",
+                })
+                return
+            
+            namespace = self.get_namespace(chapter_id, layer)
+            if buffers[namespace] and buffer_bytes[namespace] + size > MAX_UPSERT_REQUEST_BYTES:
+                await flush(namespace)
+            buffers[namespace].append((chapter_id, layer, vector))
+            buffer_bytes[namespace] += size
+            if len(buffers[namespace]) >= batch_size:
+                await flush(namespace)
+        
+        if hasattr(items, "__aiter__"):
+            async for item in items:
+                await add(item)
+        else:
+            for item in items:
+                await add(item)
+        
+        for namespace in list(buffers):
+            await flush(namespace)
+        if pending:
+            await asyncio.gather(*pending)
+        
+        return result
     
     async def query(
         self,
         chapter_id: str,
         layer: str,
-        query_embedding: List[float],
+        query_embedding: Union[List[float], np.ndarray],
         filter: Optional[Dict[str, Any]] = None,
         top_k: int = 5,
     ) -> List[Dict[str, Any]]:
         """
         Query the vector database for similar items.
         
+        Results are served from the query cache while the namespace has not
+        been written through this store and the entry is younger than the
+        cache TTL.
+        
         Args:
             chapter_id: The ID of the GDG chapter
             layer: The knowledge layer (semantic, kinetic, or dynamic)
@@ -111,14 +502,565 @@ class VectorStore:
             List of matching items with metadata
         """
         if not self._initialized:
-            self.initialize()
+            await self._run(self.initialize)
+            
+        namespace = self.get_namespace(chapter_id, layer)
+        
+        if not self.query_cache.enabled:
+            return await self._run(self._search, namespace, query_embedding, filter, top_k)
+        
+        key = self.query_cache.key(namespace, query_embedding, filter, top_k)
+        matches = self.query_cache.get(key)
+        if matches is None:
+            # Query Pinecone
+            matches = await self._run(self._search, namespace, query_embedding, filter, top_k)
+            self.query_cache.put(key, matches)
+        return matches
+    
+    async def hybrid_query(
+        self,
+        chapter_id: str,
+        layer: str,
+        query_text: str,
+        embed: Callable[[str], Awaitable[List[float]]],
+        filter: Optional[Dict[str, Any]] = None,
+        top_k: int = 5,
+        lexical_threshold: float = 0.75,
+        rrf_k: int = 60,
+    ) -> List[Dict[str, Any]]:
+        """
+        Query with combined keyword (BM25) and vector retrieval.
+        
+        The lexical index is consulted first. When it returns ``top_k``
+        matches that each contain at least ``lexical_threshold`` of the
+        query's IDF-weighted terms, the lexical ranking is decisive and no
+        embedding is computed. Otherwise the query is embedded, a vector
+        query runs, and both rankings are merged with reciprocal rank
+        fusion.
+        
+        The lexical index only covers items written through this store
+        instance (or loaded by ``build_lexical_index``), so it is decisive
+        only while it is current: it must have applied every write and
+        delete this store started on the namespace, and unless
+        ``lexical_index_ttl`` is None, have been built from a scan within
+        the last ``lexical_index_ttl`` seconds. No request is made to
+        confirm its matches. Otherwise its ranking is only fused with the
+        vector results. With the Pinecone defaults (``lexical_index`` off
+        and no build) there is no lexical index, so this is a plain vector
+        query; callers skip the embedding call there only through ``embed``
+        (e.g. ``QueryRegistry.embedder``).
+        
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layer: The knowledge layer (semantic, kinetic, or dynamic)
+            query_text: Query text
+            embed: Coroutine function embedding the query text, e.g.
+                ``EmbeddingService.generate_embeddings``
+            filter: Optional metadata filter
+            top_k: Number of results to return
+            lexical_threshold: Minimum query term coverage for a lexical
+                match to count as decisive
+            rrf_k: Reciprocal rank fusion damping constant
             
+        Returns:
+            List of matching items with metadata; scores are fused RRF scores
+        """
+        namespace = self.get_namespace(chapter_id, layer)
+        index = self._lexical.get(namespace)
+        lexical = index.search(query_text, top_k, filter) if index is not None else []
+        
+        decisive = (
+            len(lexical) >= top_k
+            and all(coverage >= lexical_threshold for _, _, coverage, _ in lexical)
+            and self._lexical_current(namespace, index)
+        )
+        if decisive:
+            fused = reciprocal_rank_fusion([[item_id for item_id, _, _, _ in lexical]], k=rrf_k)
+            return [
+                {"id": item_id, "score": fused[item_id], "metadata": dict(metadata)}
+                for item_id, _, _, metadata in lexical
+            ]
+        
+        query_embedding = await embed(query_text)
+        vector = await self.query(chapter_id, layer, query_embedding, filter=filter, top_k=top_k)
+        if not lexical:
+            return vector
+        
+        fused = reciprocal_rank_fusion(
+            [[match["id"] for match in vector], [item_id for item_id, _, _, _ in lexical]],
+            k=rrf_k,
+        )
+        metadata = {item_id: item_metadata for item_id, _, _, item_metadata in lexical}
+        metadata.update((match["id"], match["metadata"]) for match in vector)
+        
+        ranked = sorted(fused, key=lambda item_id: -fused[item_id])[:top_k]
+        return [
+            {"id": item_id, "score": fused[item_id], "metadata": dict(metadata[item_id] or {})}
+            for item_id in ranked
+        ]
+    
+    async def build_lexical_index(self, chapter_id: str, layer: str, page_size: int = 500) -> int:
+        """
+        Load a namespace's items into the lexical index with ``scan``.
+        
+        Use this to run ``hybrid_query`` against items written by other
+        processes. Writes through this store keep the index current
+        afterwards, even with ``lexical_index`` off.
+        
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layer: The knowledge layer (semantic, kinetic, or dynamic)
+            page_size: Items listed and fetched per scan request
+        
+        Returns:
+            Number of items indexed (at most ``lexical_index_size``)
+        """
         namespace = self.get_namespace(chapter_id, layer)
+        index = BM25Index(max_documents=self.lexical_index_size)
+        # Writes started during the scan leave the versions apart, so the
+        # new index is not decisive until it is built again
+        index.version = self._write_versions[namespace]
+        index.synced_at = time.monotonic()
+        async for item in self.scan(chapter_id, layer, page_size=page_size):
+            index.upsert(item["id"], item_text(item["metadata"]), dict(item["metadata"]))
+        self._lexical[namespace] = index
+        return len(index)
+    
+    async def query_many(
+        self,
+        chapter_id: str,
+        layers: Iterable[str],
+        query_embedding: Union[List[float], np.ndarray, Dict[str, Any]],
+        top_k: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+        layer_weights: Optional[Dict[str, float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Query several layers concurrently with one query vector.
+        
+        Each layer's search runs through ``query`` (so the query cache
+        applies) and all of them are in flight at once, making latency that
+        of the slowest layer. The rankings are combined by
+        ``merge_rankings``: layers served by the same embedding model are
+        merged on their raw similarities, optionally scaled per layer, and
+        when a migration left the layers on different models their scores
+        are first calibrated against each model's score distribution,
+        since raw similarities of different models are not comparable.
+        Items found in several layers are returned once.
         
-        # Query Pinecone
-        results = self.index.query(
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layers: Knowledge layers to search
+            query_embedding: Vector embedding for the query, or a mapping
+                of layer to embedding from ``LayerRouter.embed_query``
+                when layers are served by different models
+            top_k: Number of merged results to return
+            filter: Optional metadata filter
+            layer_weights: Multiplier of each layer's scores (default 1.0)
+            
+        Returns:
+            Up to ``top_k`` matches ordered by weighted (and, across models,
+            calibrated) score; each carries its ``layer`` and original
+            ``raw_score``
+        """
+        layers = list(dict.fromkeys(layers))
+        if not isinstance(query_embedding, dict):
+            query_embedding = dict.fromkeys(layers, query_embedding)
+        results = await asyncio.gather(*[
+            self.query(chapter_id, layer, query_embedding[layer], filter=filter, top_k=top_k)
+            for layer in layers
+        ])
+        
+        merged = merge_rankings(
+            dict(zip(layers, results)),
+            layer_weights,
+            models={layer: self.router.model_id(chapter_id, layer) for layer in layers},
+            calibrator=self.score_calibrator,
+        )
+        return merged[:top_k]
+    
+    async def fetch(
+        self,
+        chapter_id: str,
+        layer: str,
+        ids: Iterable[str],
+        batch_size: int = 100,
+        routed: bool = True,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieve knowledge items by ID without a similarity search.
+        
+        IDs are fetched in batches; batches run concurrently.
+        
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layer: The knowledge layer (semantic, kinetic, or dynamic)
+            ids: IDs of the items to retrieve
+            batch_size: Maximum number of IDs per fetch request
+            routed: Follow the layer's route; False reads the layer's own
+                namespace, e.g. a migration's source after the switch
+            
+        Returns:
+            Mapping of ID to item (id, values, metadata); missing IDs are omitted
+        """
+        if not self._initialized:
+            await self._run(self.initialize)
+        
+        namespace = self.get_namespace(chapter_id, layer, routed)
+        ids = list(dict.fromkeys(ids))
+        batch_size = max(1, min(batch_size, MAX_FETCH_BATCH_SIZE))
+        
+        batches = await asyncio.gather(*[
+            self._run(self._fetch_documents, namespace, ids[start:start + batch_size])
+            for start in range(0, len(ids), batch_size)
+        ])
+        
+        items = {}
+        for batch in batches:
+            items.update(batch)
+        return items
+    
+    async def fetch_many(
+        self,
+        requests: Iterable[Tuple[str, str, Iterable[str]]],
+        batch_size: int = 100,
+    ) -> Dict[Tuple[str, str], Dict[str, Dict[str, Any]]]:
+        """
+        Retrieve items by ID from several chapters and layers concurrently.
+        
+        Args:
+            requests: ``(chapter_id, layer, ids)`` tuples
+            batch_size: Maximum number of IDs per fetch request
+            
+        Returns:
+            Mapping of ``(chapter_id, layer)`` to that namespace's fetched items
+        """
+        ids_by_layer: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+        for chapter_id, layer, ids in requests:
+            ids_by_layer[(chapter_id, layer)].extend(ids)
+        
+        keys = list(ids_by_layer)
+        results = await asyncio.gather(*[
+            self.fetch(chapter_id, layer, ids_by_layer[(chapter_id, layer)], batch_size=batch_size)
+            for chapter_id, layer in keys
+        ])
+        return dict(zip(keys, results))
+    
+    async def scan(
+        self,
+        chapter_id: str,
+        layer: str,
+        filter: Optional[Dict[str, Any]] = None,
+        page_size: int = 100,
+        prefix: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over every item of a namespace.
+        
+        IDs are listed one page at a time and each page is fetched before
+        the next is requested, so memory stays bounded by ``page_size``
+        whatever the namespace size. Items written during a scan may or
+        may not be returned.
+        
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layer: The knowledge layer (semantic, kinetic, or dynamic)
+            filter: Optional metadata filter, applied to each fetched page
+            page_size: Number of items listed and fetched per request
+            prefix: Only list IDs starting with this prefix; the backend
+                lists them server-side, so only matching items are fetched
+            
+        Yields:
+            Items with id, values and metadata
+        """
+        if not self._initialized:
+            await self._run(self.initialize)
+        
+        namespace = self.get_namespace(chapter_id, layer)
+        page_size = max(1, min(page_size, MAX_FETCH_BATCH_SIZE))
+        token = None
+        
+        while True:
+            ids, token = await self._run(self._list_ids, namespace, page_size, token, prefix)
+            if ids:
+                items = await self._run(self._fetch_documents, namespace, ids)
+                for item_id in ids:
+                    item = items.get(item_id)
+                    if item is not None and (not filter or matches_filter(item["metadata"], filter)):
+                        yield item
+            if not token:
+                return
+    
+    async def list_ids(
+        self,
+        chapter_id: str,
+        layer: str,
+        prefix: Optional[str] = None,
+        page_size: int = 100,
+    ) -> AsyncIterator[str]:
+        """
+        Iterate over the IDs of a namespace without fetching the items.
+        
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layer: The knowledge layer (semantic, kinetic, or dynamic)
+            prefix: Only list IDs starting with this prefix (server-side)
+            page_size: Number of IDs listed per request
+            
+        Yields:
+            Item IDs
+        """
+        if not self._initialized:
+            await self._run(self.initialize)
+        
+        namespace = self.get_namespace(chapter_id, layer)
+        page_size = max(1, min(page_size, MAX_FETCH_BATCH_SIZE))
+        token = None
+        
+        while True:
+            ids, token = await self._run(self._list_ids, namespace, page_size, token, prefix)
+            for item_id in ids:
+                yield item_id
+            if not token:
+                return
+    
+    async def delete(
+        self,
+        chapter_id: str,
+        layer: str,
+        ids: Iterable[str],
+        batch_size: int = MAX_DELETE_BATCH_SIZE,
+        max_requests_per_second: Optional[float] = None,
+    ) -> int:
+        """
+        Delete knowledge items by ID.
+        
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layer: The knowledge layer (semantic, kinetic, or dynamic)
+            ids: IDs of the items to delete; unknown IDs are ignored
+            batch_size: Maximum number of IDs per delete request
+            max_requests_per_second: Optional cap on the delete request rate
+            
+        Returns:
+            Number of IDs sent for deletion
+        """
+        if not self._initialized:
+            await self._run(self.initialize)
+        
+        namespace = self.get_namespace(chapter_id, layer)
+        limiter = _RateLimiter(max_requests_per_second)
+        batch_size = max(1, min(batch_size, MAX_DELETE_BATCH_SIZE))
+        
+        ids = list(dict.fromkeys(ids))
+        for start in range(0, len(ids), batch_size):
+            await self._delete_batch(namespace, ids[start:start + batch_size], limiter)
+        
+        await self._run(self._reclaim, namespace)
+        return len(ids)
+    
+    async def delete_where(
+        self,
+        chapter_id: str,
+        layer: str,
+        filter: Dict[str, Any],
+        page_size: int = 100,
+        batch_size: int = MAX_DELETE_BATCH_SIZE,
+        max_requests_per_second: Optional[float] = 10.0,
+    ) -> int:
+        """
+        Delete every item of a namespace whose metadata matches a filter.
+        
+        Matching IDs are streamed with ``scan`` and deleted in batches as
+        they accumulate, so memory stays bounded and the backend sees at
+        most ``max_requests_per_second`` delete requests.
+        
+        Args:
+            chapter_id: The ID of the GDG chapter
+            layer: The knowledge layer (semantic, kinetic, or dynamic)
+            filter: Metadata filter selecting the items to delete
+            page_size: Number of items scanned per page
+            batch_size: Maximum number of IDs per delete request
+            max_requests_per_second: Optional cap on the delete request rate
+            
+        Returns:
+            Number of items deleted
+        """
+        namespace = self.get_namespace(chapter_id, layer)
+        limiter = _RateLimiter(max_requests_per_second)
+        batch_size = max(1, min(batch_size, MAX_DELETE_BATCH_SIZE))
+        
+        deleted = 0
+        batch: List[str] = []
+        async for item in self.scan(chapter_id, layer, filter=filter, page_size=page_size):
+            batch.append(item["id"])
+            if len(batch) >= batch_size:
+                await self._delete_batch(namespace, batch, limiter)
+                deleted += len(batch)
+                batch = []
+        if batch:
+            await self._delete_batch(namespace, batch, limiter)
+            deleted += len(batch)
+        
+        if deleted:
+            await self._run(self._reclaim, namespace)
+        return deleted
+    
+    async def _delete_batch(self, namespace: str, ids: List[str], limiter: "_RateLimiter"):
+        """Delete one batch of IDs and drop them from the caches."""
+        await limiter.wait()
+        namespace = await self._mutate(namespace, ids, self._remove, ids)
+        
+        index = self._lexical.get(namespace)
+        if index is not None:
+            for item_id in ids:
+                index.remove(item_id)
+            index.version += 1
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Get query cache counters.
+        
+        Returns:
+            Hits, misses, hit rate and current number of cached queries
+        """
+        return self.query_cache.stats()
+    
+    async def _run(self, func, *args, **kwargs):
+        """
+        Run a blocking client call on the store's thread pool.
+        
+        The event loop stays free while the call waits on the network, so
+        concurrent vector operations overlap. Once ``max_pending`` calls are
+        queued or running, further callers wait for a slot instead of
+        growing the pool's queue without bound.
+        
+        A caller that gives up (e.g. via ``asyncio.wait_for``) drops a call
+        that has not started yet; one already running keeps its thread and
+        its slot until it returns, so ``max_pending`` still counts it.
+        """
+        loop = asyncio.get_running_loop()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="vector-store",
+            )
+        
+        semaphore = self._pending_limits.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_pending)
+            self._pending_limits[loop] = semaphore
+        
+        await semaphore.acquire()
+        try:
+            future = self._executor.submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            semaphore.release()
+            raise
+        future.add_done_callback(lambda _: _release_slot(loop, semaphore))
+        return await asyncio.wrap_future(future, loop=loop)
+    
+    async def _mutate(self, namespace: str, ids: List[str], func, *args) -> str:
+        """
+        Run a write or delete against a namespace.
+        
+        Follows layer switches, counts the call as in flight and records
+        the IDs for a migration tracking the namespace.
+        
+        Returns:
+            The namespace actually changed
+        """
+        while namespace in self._redirects:
+            namespace = self._redirects[namespace]
+        
+        self._write_versions[namespace] += 1
+        self._writes_in_flight[namespace] += 1
+        try:
+            await self._run(func, namespace, *args)
+        finally:
+            self._writes_in_flight[namespace] -= 1
+            self.router.record_changes(namespace, ids)
+            self.query_cache.invalidate(namespace)
+        return namespace
+    
+    def _index_text(self, namespace: str, vectors: List[tuple]):
+        """Add written ``(id, embedding, metadata)`` tuples to the lexical index."""
+        index = self._lexical.get(namespace)
+        if index is None:
+            if not self.lexical_index:
+                return
+            index = self._lexical[namespace] = BM25Index(max_documents=self.lexical_index_size)
+            # A new index holds only this process's writes from here on
+            index.version = self._write_versions[namespace] - 1
+        for item_id, _, metadata in vectors:
+            index.upsert(item_id, item_text(metadata), dict(metadata))
+        index.version += 1
+    
+    def _lexical_current(self, namespace: str, index: BM25Index) -> bool:
+        """Whether a namespace's lexical index may answer a query on its own."""
+        if index.version != self._write_versions[namespace]:
+            return False
+        if self.lexical_index_ttl is None:
+            return True
+        return index.synced_at is not None and time.monotonic() - index.synced_at < self.lexical_index_ttl
+    
+    def _write(self, namespace: str, vectors: List[tuple]):
+        """Store full metadata out of line if configured, then upsert the vectors."""
+        if self.document_store is not None:
+            self.document_store.put_many(namespace, {item_id: metadata for item_id, _, metadata in vectors})
+            vectors = [
+                (item_id, embedding, compact_metadata(metadata))
+                for item_id, embedding, metadata in vectors
+            ]
+        self._upsert(namespace, vectors)
+    
+    def _search(
+        self,
+        namespace: str,
+        query_embedding: Union[List[float], np.ndarray],
+        filter: Optional[Dict[str, Any]],
+        top_k: int,
+    ) -> List[Dict[str, Any]]:
+        """Query a namespace and hydrate the matches' metadata."""
+        matches = self._query(namespace, query_embedding, filter, top_k)
+        self._hydrate(namespace, matches)
+        return matches
+    
+    def _fetch_documents(self, namespace: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch items by ID and hydrate their metadata."""
+        items = self._fetch(namespace, ids)
+        self._hydrate(namespace, items.values())
+        return items
+    
+    def _remove(self, namespace: str, ids: List[str]):
+        """Delete vectors and their out-of-line documents."""
+        self._delete(namespace, ids)
+        if self.document_store is not None:
+            self.document_store.delete_many(namespace, ids)
+    
+    def _hydrate(self, namespace: str, items: Iterable[Dict[str, Any]]):
+        """Replace compact metadata with full documents in one multi-get."""
+        if self.document_store is None:
+            return
+        
+        items = list(items)
+        documents = self.document_store.get_many(namespace, [item["id"] for item in items])
+        for item in items:
+            document = documents.get(item["id"])
+            if document is not None:
+                item["metadata"] = document
+    
+    def _query(
+        self,
+        namespace: str,
+        query_embedding: Union[List[float], np.ndarray],
+        filter: Optional[Dict[str, Any]],
+        top_k: int,
+    ) -> List[Dict[str, Any]]:
+        """Run a similarity query against a namespace and format the matches."""
+        results = self._index_for(namespace).query(
             namespace=namespace,
-            vector=query_embedding,
+            vector=_as_list(query_embedding),
             filter=filter,
             top_k=top_k,
             include_metadata=True
@@ -134,3 +1076,88 @@ class VectorStore:
             })
             
         return matches
+    
+    def _upsert(self, namespace: str, vectors: List[tuple]):
+        """Upsert ``(id, embedding, metadata)`` tuples into a namespace."""
+        vectors = [(item_id, _as_list(embedding), metadata) for item_id, embedding, metadata in vectors]
+        self._index_for(namespace).upsert(vectors=vectors, namespace=namespace)
+    
+    def _delete(self, namespace: str, ids: List[str]):
+        """Delete vectors by ID from a namespace."""
+        self._index_for(namespace).delete(ids=ids, namespace=namespace)
+    
+    def _reclaim(self, namespace: str):
+        """Reclaim space after deletes; Pinecone does this server-side."""
+    
+    def _index_for(self, namespace: str):
+        """Pinecone index handle holding a namespace."""
+        index_name = self._namespace_indexes.get(namespace)
+        if index_name is None:
+            return self.index
+        return _index_registry.get_index(self.api_key, index_name, self.index_check_ttl)
+    
+    def _dimension(self, namespace: str) -> Optional[int]:
+        """Dimension of the Pinecone index holding a namespace."""
+        return self._index_for(namespace).describe_index_stats().dimension
+    
+    def _list_ids(
+        self,
+        namespace: str,
+        limit: int,
+        token: Optional[str],
+        prefix: Optional[str] = None,
+    ) -> Tuple[List[str], Optional[str]]:
+        """List one page of a namespace's IDs and the token of the next page."""
+        options = {"prefix": prefix} if prefix else {}
+        response = self._index_for(namespace).list_paginated(namespace=namespace, limit=limit, pagination_token=token, **options)
+        
+        ids = [vector.id for vector in response.vectors]
+        next_token = response.pagination.next if response.pagination else None
+        return ids, next_token
+    
+    def _fetch(self, namespace: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch vectors by ID from a namespace and format them."""
+        response = self._index_for(namespace).fetch(ids=ids, namespace=namespace)
+        
+        return {
+            item_id: {
+                "id": item_id,
+                "values": list(vector.values),
+                "metadata": vector.metadata or {},
+            }
+            for item_id, vector in response.vectors.items()
+        }
+
+
+class _RateLimiter:
+    """Spaces out requests so at most ``rate`` start per second."""
+    
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+    
+    async def wait(self):
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        if self._next > now:
+            await asyncio.sleep(self._next - now)
+        self._next = max(now, self._next) + self.interval
+
+
+def _as_list(embedding: Union[List[float], np.ndarray]) -> List[float]:
+    """Convert an array embedding to the float list the Pinecone client sends."""
+    return embedding.tolist() if isinstance(embedding, np.ndarray) else embedding
+
+
+def _estimate_vector_bytes(vector: tuple) -> int:
+    """Rough serialized size of an ``(id, embedding, metadata)`` tuple."""
+    item_id, embedding, metadata = vector
+    # Values travel as 4-byte floats; metadata is sent as JSON
+    return len(item_id) + 4 * len(embedding) + len(json.dumps(metadata, default=str))
+
+
+def _release_slot(loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore):
+    """Free a pending-call slot once its worker thread is done."""
+    if not loop.is_closed():
+        loop.call_soon_threadsafe(semaphore.release)
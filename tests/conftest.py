@@ -18,6 +18,7 @@ class MockEmbeddingService:
     
     def __init__(self):
         self._initialized = True
+        self.model_id = "mock-embedding"
         
     async def generate_embeddings(self, text: str) -> List[float]:
         """Return a fixed embedding vector for any text."""
@@ -29,18 +30,26 @@ class MockEmbeddingService:
         if isinstance(content, dict) and "text" in content:
             return await self.generate_embeddings(content["text"])
         return await self.generate_embeddings(str(content))
+    
+    def model_metadata(self, embedding: List[float]) -> Dict[str, Any]:
+        """Describe the mock model that produced an embedding."""
+        return {"embedding_model": self.model_id, "embedding_dimension": len(embedding)}
 
 
 class MockVectorStore:
     """Mock for VectorStore to avoid actual database calls during tests."""
     
     def __init__(self):
+        from src.knowledge.route_store import LayerRouter
+        
         self._initialized = True
         self.store = {
             "semantic": {},
             "kinetic": {},
             "dynamic": {}
         }
+        # No route store: every mock layer is served by the default model
+        self.router = LayerRouter()
         
     def initialize(self):
         """Initialize the vector store mock."""
@@ -68,6 +77,37 @@ class MockVectorStore:
         
         return item_id
         
+    async def fetch(
+        self,
+        chapter_id: str,
+        layer: str,
+        ids: List[str],
+        batch_size: int = 100
+    ) -> Dict[str, Dict[str, Any]]:
+        """Fetch items by ID from the mock database."""
+        stored = self.store.get(layer, {}).get(chapter_id, {})
+        return {
+            item_id: {
+                "id": item_id,
+                "values": stored[item_id]["embedding"],
+                "metadata": stored[item_id]["metadata"]
+            }
+            for item_id in ids if item_id in stored
+        }
+        
+    async def hybrid_query(
+        self,
+        chapter_id: str,
+        layer: str,
+        query_text: str,
+        embed,
+        filter: Optional[Dict[str, Any]] = None,
+        top_k: int = 3
+    ) -> List[Dict[str, Any]]:
+        """Embed the query text and run a mock vector query."""
+        query_embedding = await embed(query_text)
+        return await self.query(chapter_id, layer, query_embedding, filter=filter, top_k=top_k)
+        
     async def query(
         self,
         chapter_id: str,
@@ -102,6 +142,21 @@ class MockVectorStore:
         
         return results
         
+    async def query_many(
+        self,
+        chapter_id: str,
+        layers: List[str],
+        query_embedding: List[float],
+        top_k: int = 3,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Query several layers of the mock vector store."""
+        results = []
+        for layer in layers:
+            for match in await self.query(chapter_id, layer, query_embedding, filter=filter, top_k=top_k):
+                results.append({**match, "layer": layer})
+        return results[:top_k]
+        
     def _matches_filter(self, metadata: Dict[str, Any], filter: Dict[str, Any]) -> bool:
         """Check if metadata matches the provided filter."""
         for key, value in filter.items():
@@ -258,6 +313,17 @@ def mock_vector_store():
     return MockVectorStore()
 
 
+@pytest.fixture
+def local_vector_store():
+    """Fixture for a real in-process vector store with an in-memory route store."""
+    from src.knowledge.local_vector_store import LocalVectorStore
+    from src.knowledge.route_store import LayerRouter, SQLiteRouteStore
+    
+    store = LocalVectorStore(router=LayerRouter(SQLiteRouteStore()))
+    store.initialize()
+    return store
+
+
 @pytest.fixture
 def mock_linkedin_service():
     """Fixture for a mock LinkedIn service."""
@@ -73,6 +73,16 @@ class TestContentAgent:
         assert "event-announcement" in [t["id"] for t in templates]
         assert "event-recap" in [t["id"] for t in templates]
     
+    @pytest.mark.asyncio
+    async def test_template_queries_stay_fixed(self, content_agent):
+        """Test looking up arbitrary template types registers no new queries."""
+        names = list(content_agent.queries.names)
+        
+        for template_type in ["event-recap", "custom-1", "custom-2"]:
+            await content_agent._get_content_templates(template_type)
+        
+        assert content_agent.queries.names == names
+    
     @pytest.mark.asyncio
     async def test_get_brand_voice(self, content_agent, mock_vector_store, sample_brand_voice):
         """Test retrieving brand voice from the vector store."""
@@ -159,6 +169,31 @@ class TestContentAgent:
         assert isinstance(item_id, str)
         assert "post_" in item_id
     
+    @pytest.mark.asyncio
+    async def test_record_content_performance(self, content_agent, mock_vector_store):
+        """Test performance recording looks the content up by ID."""
+        # Store the original post in the kinetic layer
+        content = {"text": "Test post content", "platform": "linkedin"}
+        await mock_vector_store.store_item(
+            chapter_id="test-chapter",
+            layer="kinetic",
+            item_id="post_12345",
+            embedding=[0.3] * 50,
+            metadata={"type": "social_post", "platform": "linkedin", "content": content}
+        )
+        content_agent._save_generated_content = AsyncMock(return_value="post_67890")
+        
+        # Record performance
+        metrics = {"engagement_rate": 0.1, "click_rate": 0.05}
+        await content_agent.record_content_performance("post_12345", metrics)
+        
+        # Check the fetched content and its stored embedding were saved
+        args, kwargs = content_agent._save_generated_content.call_args
+        assert args[0]["performance"] == metrics
+        assert args[0]["performance_score"] == pytest.approx(0.075)
+        assert args[1] == metrics
+        assert kwargs["embedding"] == [0.3] * 50
+    
     @pytest.mark.asyncio
     async def test_post_to_social_media(self, content_agent, mock_social_media_service):
         """Test posting content to social media."""
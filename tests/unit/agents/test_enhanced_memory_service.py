@@ -0,0 +1,81 @@
+"""Unit tests for the enhanced memory service module."""
+
+from datetime import datetime, timezone
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.agents.enhanced_memory_service import EnhancedMemoryService, EpisodicMemory, MemoryType
+
+
+@pytest.mark.unit
+@pytest.mark.agents
+class TestEnhancedMemoryService:
+    """Tests for the EnhancedMemoryService class."""
+    
+    @pytest.fixture
+    def embedding_service(self):
+        """Fixture for an embedding service returning a fixed vector."""
+        service = MagicMock()
+        service.embed_text = AsyncMock(return_value=[0.1, 0.2, 0.3])
+        service.model_metadata = MagicMock(return_value={"embedding_model": "mock", "embedding_dimension": 3})
+        return service
+    
+    @pytest.fixture
+    def memory_service(self, local_vector_store, embedding_service):
+        """Fixture for a memory service backed by the local vector store."""
+        return EnhancedMemoryService(
+            vector_store=local_vector_store,
+            embedding_service=embedding_service,
+            chapter_id="test-chapter"
+        )
+    
+    @staticmethod
+    def _episode(session_id, hour):
+        return EpisodicMemory(
+            session_id=session_id,
+            timestamp=datetime(2025, 5, 14, hour, tzinfo=timezone.utc),
+            agent_id="content_agent",
+            user_input=f"Question at {hour}",
+            agent_response="Answer",
+            context={},
+            metadata={}
+        )
+    
+    @pytest.mark.asyncio
+    async def test_get_session_memories_scans_without_embedding(self, memory_service, embedding_service):
+        """Test session memories are listed by ID prefix, oldest first."""
+        for session_id, hour in [("s1", 12), ("s2", 10), ("s1_b", 11), ("s1", 9)]:
+            await memory_service.store_episodic_memory(self._episode(session_id, hour))
+        embedding_service.embed_text.reset_mock()
+        
+        memories = await memory_service.get_session_memories("s1")
+        
+        assert [memory["user_input"] for memory in memories] == ["Question at 9", "Question at 12"]
+        embedding_service.embed_text.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_retrieve_relevant_memories(self, memory_service):
+        """Test retrieval queries the memory layer of each requested type."""
+        await memory_service.store_episodic_memory(self._episode("s1", 12))
+        
+        results = await memory_service.retrieve_relevant_memories("question", [MemoryType.EPISODIC, MemoryType.SEMANTIC])
+        
+        assert len(results["episodic"]) == 1
+        assert results["episodic"][0]["score"] == pytest.approx(1.0)
+        assert results["semantic"] == []
+    
+    @pytest.mark.asyncio
+    async def test_cleanup_old_memories_deletes_expired(self, memory_service):
+        """Test retention deletes memories older than the cutoff."""
+        old = self._episode("s1", 9)
+        recent = self._episode("s1", 10)
+        recent.timestamp = datetime.now(timezone.utc)
+        await memory_service.store_episodic_memory(old)
+        await memory_service.store_episodic_memory(recent)
+        
+        removed = await memory_service.cleanup_old_memories(days_to_keep=30)
+        
+        assert removed == 1
+        memories = await memory_service.get_session_memories("s1")
+        assert [memory["timestamp"] for memory in memories] == [recent.timestamp.isoformat()]
@@ -0,0 +1,125 @@
+"""Unit tests for the backup module."""
+
+import gzip
+
+import numpy as np
+import pytest
+
+from src.knowledge.backup import backup_chapter, read_records, restore_chapter
+from src.knowledge.local_vector_store import LocalVectorStore
+
+LAYERS = ("semantic", "kinetic", "dynamic")
+
+
+async def populate(store):
+    """Store items in the semantic and dynamic layers of a test chapter."""
+    rng = np.random.default_rng(0)
+    await store.store_items(
+        {
+            "chapter_id": "test-chapter",
+            "layer": layer,
+            "item_id": f"{layer}-{i}",
+            "embedding": rng.standard_normal(16).astype(np.float32),
+            "metadata": {"text": f"{layer} item {i}", "tags": ["flutter"], "rank": i},
+        }
+        for layer, count in [("semantic", 300), ("dynamic", 5)]
+        for i in range(count)
+    )
+    return store
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestBackup:
+    """Tests for streaming backups, restores and damaged backup files."""
+    
+    @pytest.mark.asyncio
+    async def test_round_trip(self, local_vector_store, tmp_path):
+        """Test a restored chapter has the backed-up vectors and metadata."""
+        populated_store = await populate(local_vector_store)
+        path = str(tmp_path / "backup.ndjson.gz")
+        backup = await backup_chapter(populated_store, "test-chapter", path, LAYERS, page_size=64)
+        
+        restored_store = LocalVectorStore()
+        restored_store.initialize()
+        restored = await restore_chapter(restored_store, "test-chapter", path, batch_size=50)
+        
+        assert backup.complete and restored.complete
+        assert backup.counts == restored.counts == {"semantic": 300, "kinetic": 0, "dynamic": 5}
+        original = await populated_store.fetch("test-chapter", "semantic", ["semantic-7"])
+        copy = await restored_store.fetch("test-chapter", "semantic", ["semantic-7"])
+        assert copy["semantic-7"]["metadata"] == original["semantic-7"]["metadata"]
+        assert np.allclose(copy["semantic-7"]["values"], original["semantic-7"]["values"])
+    
+    @pytest.mark.asyncio
+    async def test_restore_selected_layers(self, local_vector_store, tmp_path):
+        """Test only the requested layers are restored."""
+        populated_store = await populate(local_vector_store)
+        path = str(tmp_path / "backup.ndjson.gz")
+        await backup_chapter(populated_store, "test-chapter", path, LAYERS)
+        
+        restored_store = LocalVectorStore()
+        restored_store.initialize()
+        restored = await restore_chapter(restored_store, "test-chapter", path, layers=["dynamic"])
+        
+        assert restored.counts == {"dynamic": 5}
+        assert [item async for item in restored_store.scan("test-chapter", "semantic")] == []
+    
+    @pytest.mark.asyncio
+    async def test_truncated_and_foreign_files(self, local_vector_store, tmp_path):
+        """Test a cut-off backup restores what it holds and other files are rejected."""
+        populated_store = await populate(local_vector_store)
+        path = tmp_path / "backup.ndjson.gz"
+        await backup_chapter(populated_store, "test-chapter", str(path), LAYERS)
+        records = [record async for record in read_records(str(path))]
+        truncated = tmp_path / "truncated.ndjson.gz"
+        truncated.write_bytes(path.read_bytes()[: path.stat().st_size // 2])
+        
+        restored_store = LocalVectorStore()
+        restored_store.initialize()
+        restored = await restore_chapter(restored_store, "test-chapter", str(truncated))
+        
+        assert [record["type"] for record in records[:2]] == ["header", "item"] and records[-1]["type"] == "end"
+        assert not restored.complete and 0 < restored.counts["semantic"] < 300
+        foreign = tmp_path / "foreign.ndjson.gz"
+        with gzip.open(foreign, "wt") as handle:
+            handle.write('{"name": "not a backup"}\n')
+        with pytest.raises(ValueError):
+            await restore_chapter(restored_store, "test-chapter", str(foreign))
+    
+    @pytest.mark.asyncio
+    async def test_failed_layer_keeps_previous_backup(self, local_vector_store, tmp_path, monkeypatch):
+        """Test a backup with a failed layer is kept aside instead of replacing the last one."""
+        populated_store = await populate(local_vector_store)
+        path = tmp_path / "backup.ndjson.gz"
+        await backup_chapter(populated_store, "test-chapter", str(path), LAYERS)
+        previous = path.read_bytes()
+        scan = populated_store.scan
+        
+        async def failing_scan(chapter_id, layer, **kwargs):
+            if layer == "dynamic":
+                raise ConnectionError("index unavailable")
+            async for item in scan(chapter_id, layer, **kwargs):
+                yield item
+        monkeypatch.setattr(populated_store, "scan", failing_scan)
+        
+        backup = await backup_chapter(populated_store, "test-chapter", str(path), LAYERS)
+        
+        assert not backup.complete and backup.errors == {"dynamic": "index unavailable"}
+        assert backup.path == f"{path}.partial"
+        assert path.read_bytes() == previous
+        assert (tmp_path / "backup.ndjson.gz.partial").exists()
+    
+    @pytest.mark.asyncio
+    async def test_unreadable_files_are_rejected(self, local_vector_store, tmp_path):
+        """Test a file cut off in its header or not gzip-compressed raises ValueError."""
+        path = tmp_path / "backup.ndjson.gz"
+        await backup_chapter(local_vector_store, "test-chapter", str(path), LAYERS)
+        cut = tmp_path / "cut.ndjson.gz"
+        cut.write_bytes(path.read_bytes()[:20])
+        plain = tmp_path / "plain.ndjson"
+        plain.write_text('{"type": "header"}\n')
+        
+        for damaged in (cut, plain):
+            with pytest.raises(ValueError):
+                await restore_chapter(local_vector_store, "test-chapter", str(damaged))
@@ -0,0 +1,73 @@
+"""Unit tests for the document store module."""
+
+import pytest
+
+from src.knowledge.document_store import SQLiteDocumentStore, compact_metadata
+from src.knowledge.local_vector_store import LocalVectorStore
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestDocumentStore:
+    """Tests for out-of-line metadata storage."""
+    
+    @pytest.fixture
+    def store(self):
+        """Fixture for a local vector store with a side-car document store."""
+        store = LocalVectorStore(document_store=SQLiteDocumentStore())
+        store.initialize()
+        return store
+    
+    def test_compact_metadata_keeps_filterable_fields(self):
+        """Test nested objects and long text are left out of vector metadata."""
+        metadata = {
+            "type": "social_post",
+            "performance": 0.8,
+            "published": True,
+            "tags": ["flutter", "workshop"],
+            "content": {"text": "Join us"},
+            "transcript": "x" * 1000,
+        }
+        
+        assert compact_metadata(metadata) == {
+            "type": "social_post",
+            "performance": 0.8,
+            "published": True,
+            "tags": ["flutter", "workshop"],
+        }
+    
+    def test_sqlite_round_trip(self, tmp_path):
+        """Test documents persist per namespace and can be deleted."""
+        path = str(tmp_path / "documents.db")
+        documents = SQLiteDocumentStore(path)
+        documents.put_many("ns-a", {f"item-{i}": {"i": i} for i in range(600)})
+        documents.put_many("ns-b", {"item-0": {"other": True}})
+        documents.delete_many("ns-a", ["item-1"])
+        documents.close()
+        
+        reopened = SQLiteDocumentStore(path)
+        fetched = reopened.get_many("ns-a", [f"item-{i}" for i in range(600)])
+        
+        assert len(fetched) == 599
+        assert fetched["item-599"] == {"i": 599}
+        assert reopened.get_many("ns-b", ["item-0", "item-1"]) == {"item-0": {"other": True}}
+    
+    @pytest.mark.asyncio
+    async def test_vector_store_hydrates_full_documents(self, store):
+        """Test vectors carry compact metadata while reads return full documents."""
+        content = {"text": "Long post " * 200, "platform": "linkedin"}
+        await store.store_item("test-chapter", "kinetic", "post-1", [1.0, 0.0], {"type": "social_post", "content": content})
+        
+        index = store._get_index(store.get_namespace("test-chapter", "kinetic"))
+        assert index.get("post-1")[1] == {"type": "social_post"}
+        
+        results = await store.query("test-chapter", "kinetic", [1.0, 0.0], filter={"type": "social_post"})
+        fetched = await store.fetch("test-chapter", "kinetic", ["post-1"])
+        scanned = [item async for item in store.scan("test-chapter", "kinetic", filter={"type": "social_post"})]
+        
+        assert results[0]["metadata"]["content"] == content
+        assert fetched["post-1"]["metadata"]["content"] == content
+        assert scanned[0]["metadata"]["content"] == content
+        
+        await store.delete("test-chapter", "kinetic", ["post-1"])
+        assert store.document_store.get_many(store.get_namespace("test-chapter", "kinetic"), ["post-1"]) == {}
@@ -0,0 +1,63 @@
+"""Unit tests for the embedding batcher module."""
+
+import asyncio
+
+import pytest
+
+from src.knowledge.embedding_batcher import EmbeddingBatcher
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestEmbeddingBatcher:
+    """Tests for the EmbeddingBatcher class."""
+    
+    @pytest.fixture
+    def calls(self):
+        """Fixture recording the texts of every backend call."""
+        return []
+    
+    @pytest.fixture
+    def backend(self, calls):
+        """Fixture for a backend embedding each text as its length."""
+        async def embed(texts):
+            calls.append(list(texts))
+            await asyncio.sleep(0)
+            return [[float(len(text))] for text in texts]
+        return embed
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_call(self, backend, calls):
+        """Test single-text requests arriving together are coalesced."""
+        batcher = EmbeddingBatcher(backend, max_batch_size=64, max_delay=0.01)
+        
+        results = await asyncio.gather(*[batcher.embed([text]) for text in ["a", "bb", "ccc", "bb"]])
+        
+        assert results == [[[1.0]], [[2.0]], [[3.0]], [[2.0]]]
+        assert calls == [["a", "bb", "ccc"]]
+        assert batcher.stats() == {"requests": 4, "batches": 1, "mean_batch_size": 4.0}
+    
+    @pytest.mark.asyncio
+    async def test_full_batches_are_sent_without_waiting(self, backend, calls):
+        """Test a batch goes out as soon as max_batch_size texts are pending."""
+        batcher = EmbeddingBatcher(backend, max_batch_size=2, max_delay=10.0)
+        
+        results = await asyncio.wait_for(batcher.embed(["a", "bb", "ccc", "dddd"]), timeout=1.0)
+        
+        assert results == [[1.0], [2.0], [3.0], [4.0]]
+        assert calls == [["a", "bb"], ["ccc", "dddd"]]
+    
+    @pytest.mark.asyncio
+    async def test_backend_errors_reach_every_caller(self, calls):
+        """Test a failed batch fails each waiting request."""
+        async def failing(texts):
+            calls.append(texts)
+            raise RuntimeError("quota exceeded")
+        batcher = EmbeddingBatcher(failing, max_delay=0.001)
+        
+        results = await asyncio.gather(
+            batcher.embed(["a"]), batcher.embed(["b"]), return_exceptions=True
+        )
+        
+        assert len(calls) == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
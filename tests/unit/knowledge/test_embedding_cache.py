@@ -0,0 +1,74 @@
+"""Unit tests for the embedding cache module."""
+
+import numpy as np
+import pytest
+
+from src.knowledge.embedding_cache import EmbeddingCache, text_key
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestEmbeddingCache:
+    """Tests for the EmbeddingCache class."""
+    
+    def test_keys_normalize_whitespace_and_include_model(self):
+        """Test formatting-only differences share a key but models do not."""
+        assert text_key("model-a", "session  memories\n") == text_key("model-a", "session memories")
+        assert text_key("model-a", "session memories") != text_key("model-b", "session memories")
+        assert text_key("model-a", "Session memories") != text_key("model-a", "session memories")
+    
+    def test_memory_tier_evicts_least_recently_used(self):
+        """Test the memory tier is bounded and tracks hits and misses."""
+        cache = EmbeddingCache(max_size=2)
+        a, b, c = (text_key("m", text) for text in ("a", "b", "c"))
+        
+        cache.put_many({a: [1.0], b: [2.0]})
+        assert cache.get_many([a])[a].tolist() == [1.0]
+        cache.put_many({c: np.array([3.0])})
+        
+        found = cache.get_many([a, b, c])
+        assert {key: vector.tolist() for key, vector in found.items()} == {a: [1.0], c: [3.0]}
+        assert found[a].dtype == np.float32
+        assert not found[a].flags.writeable
+        stats = cache.stats()
+        assert stats["memory_hits"] == 3
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(0.75)
+        assert stats["size"] == 2
+    
+    def test_disk_tier_persists_and_promotes(self, tmp_path):
+        """Test vectors survive a restart and disk hits move into memory."""
+        path = str(tmp_path / "embeddings.db")
+        key = text_key("m", "brand voice guidelines tone style")
+        
+        first = EmbeddingCache(path=path)
+        first.put_many({key: [0.25, -0.5]})
+        first.close()
+        
+        second = EmbeddingCache(path=path)
+        assert second.get_many([key])[key].tolist() == [0.25, -0.5]
+        assert second.get_many([key])[key].tolist() == [0.25, -0.5]
+        assert second.stats()["disk_hits"] == 1
+        assert second.stats()["memory_hits"] == 1
+        second.close()
+    
+    def test_disk_tier_evicts_least_recently_accessed(self, tmp_path):
+        """Test the disk tier stays within its bound."""
+        cache = EmbeddingCache(max_size=0, path=str(tmp_path / "embeddings.db"), max_disk_entries=2)
+        a, b, c = (text_key("m", text) for text in ("a", "b", "c"))
+        
+        cache.put_many({a: [1.0]})
+        cache.put_many({b: [2.0]})
+        cache.get_many([a])
+        cache.put_many({c: [3.0]})
+        
+        assert set(cache.get_many([a, b, c])) == {a, c}
+        assert cache.stats()["disk_size"] == 2
+        
+        # Replacing a stored vector at the bound evicts nothing
+        cache.put_many({a: [4.0]})
+        assert set(cache.get_many([a, c])) == {a, c}
+        cache.close()
+        reopened = EmbeddingCache(path=str(tmp_path / "embeddings.db"))
+        assert reopened._disk_count == 2
+        reopened.close()
@@ -0,0 +1,91 @@
+"""Unit tests for the embedding service and offline backend."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.knowledge.embedding_cache import EmbeddingCache
+from src.knowledge.embedding_service import EmbeddingService
+from src.knowledge.hashing_embedder import HashingEmbedder
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestHashingEmbedder:
+    """Tests for the HashingEmbedder class."""
+    
+    def test_vectors_are_deterministic_and_normalized(self):
+        """Test identical texts always map to the same unit vector."""
+        embedder = HashingEmbedder(dimension=64)
+        
+        first = embedder.encode(["Flutter workshop in Providence", ""])
+        second = HashingEmbedder(dimension=64).encode(["Flutter workshop in Providence"])
+        
+        assert first.shape == (2, 64)
+        assert first.dtype == np.float32
+        np.testing.assert_array_equal(first[0], second[0])
+        assert np.linalg.norm(first[0]) == pytest.approx(1.0)
+        assert not first[1].any()
+    
+    def test_similar_texts_score_higher(self):
+        """Test shared vocabulary and spelling raise cosine similarity."""
+        embedder = HashingEmbedder()
+        query, related, unrelated = embedder.encode([
+            "brand voice guidelines",
+            "Our brand voice: friendly guidelines for posts",
+            "Kubernetes cluster autoscaling",
+        ])
+        
+        assert query @ related > query @ unrelated + 0.2
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestEmbeddingService:
+    """Tests for the EmbeddingService class with the offline backend."""
+    
+    @pytest.fixture
+    def service(self):
+        """Fixture for an embedding service using the hashing backend."""
+        return EmbeddingService(backend=HashingEmbedder(dimension=32), cache=EmbeddingCache())
+    
+    @pytest.mark.asyncio
+    async def test_repeated_texts_are_served_from_cache(self, service):
+        """Test identical strings are embedded once."""
+        first = await service.embed_text("session memories")
+        second = await service.generate_embeddings(["session   memories", "brand voice"])
+        
+        assert second[0] == first
+        assert len(first) == 32
+        assert service.model_id == service.backend.model_id
+        stats = service.cache_stats()
+        assert stats["memory_hits"] == 1
+        assert stats["misses"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_numpy_output_returns_contiguous_arrays(self):
+        """Test the numpy output format yields float32 arrays end to end."""
+        service = EmbeddingService(backend=HashingEmbedder(dimension=16), output_format="numpy")
+        
+        single = await service.embed_text("flutter workshop")
+        batch = await service.generate_embeddings(["flutter workshop", "devfest"])
+        
+        assert isinstance(single, np.ndarray) and single.shape == (16,)
+        assert batch.shape == (2, 16)
+        assert batch.dtype == np.float32
+        assert batch.flags.c_contiguous
+        np.testing.assert_array_equal(batch[0], single)
+        
+        with pytest.raises(ValueError):
+            EmbeddingService(output_format="tensor")
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_are_batched(self, service):
+        """Test concurrent single-text requests share one backend call."""
+        texts = [f"event {i}" for i in range(10)]
+        
+        results = await asyncio.gather(*[service.embed_text(text) for text in texts])
+        
+        assert service.batcher.stats()["batches"] == 1
+        np.testing.assert_allclose(results, service.backend.encode(texts), rtol=1e-6)
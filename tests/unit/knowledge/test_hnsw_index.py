@@ -0,0 +1,101 @@
+"""Unit tests for the HNSW index module."""
+
+import numpy as np
+import pytest
+
+from src.knowledge.hnsw_index import HNSWIndex
+from src.knowledge.local_vector_store import FlatIndex, LocalVectorStore
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestHNSWIndex:
+    """Tests for the HNSWIndex class."""
+    
+    @pytest.fixture
+    def vectors(self):
+        """Fixture for reproducible random vectors."""
+        return np.random.default_rng(7).standard_normal((500, 32)).astype(np.float32)
+    
+    @pytest.fixture
+    def index(self, vectors):
+        """Fixture for an HNSW index over the random vectors."""
+        index = HNSWIndex(dimension=32, M=8, ef_construction=64, ef_search=32, seed=1)
+        ids = [f"item-{i}" for i in range(len(vectors))]
+        index.upsert(ids, vectors, [{"even": i % 2 == 0} for i in range(len(vectors))])
+        return index
+    
+    def test_recall_against_exact_search(self, index, vectors):
+        """Test approximate results mostly agree with exact search."""
+        exact = FlatIndex(dimension=32)
+        exact.upsert([f"item-{i}" for i in range(len(vectors))], vectors, [{}] * len(vectors))
+        queries = np.random.default_rng(8).standard_normal((50, 32)).astype(np.float32)
+        
+        hits = 0
+        for query in queries:
+            expected = {item_id for item_id, _, _ in exact.search(query, 10)}
+            found = {item_id for item_id, _, _ in index.search(query, 10)}
+            hits += len(expected & found)
+        
+        assert hits / (10 * len(queries)) >= 0.9
+    
+    def test_tombstoned_items_are_not_returned(self, index, vectors):
+        """Test deleted items disappear from results and counts."""
+        assert index.search(vectors[3], 1)[0][0] == "item-3"
+        
+        assert index.delete(["item-3", "unknown"]) == 1
+        
+        assert len(index) == 499
+        assert index.get("item-3") is None
+        assert "item-3" not in [item_id for item_id, _, _ in index.search(vectors[3], 10)]
+    
+    def test_tombstones_trigger_a_rebuild(self, index, vectors):
+        """Test deletes and vector updates do not grow the graph without bound."""
+        first_page, token = index.ids_page(0, 100)
+        index.delete([f"item-{i}" for i in range(0, 100, 2)])
+        for _ in range(3):
+            index.upsert([f"item-{i}" for i in range(100, 200)], vectors[100:200] * 2, [{}] * 100)
+        
+        assert len(index) == 450
+        assert index.dead_rows < 0.25 * len(index._node_ids) <= 500
+        assert index.search(vectors[7] * 2, 1)[0][0] == "item-7"
+        assert index.search(vectors[150], 1)[0][0] == "item-150"
+        second_page, _ = index.ids_page(token, 100)
+        assert first_page[:2] == ["item-0", "item-1"]
+        assert second_page[:2] == ["item-200", "item-201"]
+    
+    def test_filtered_search(self, index, vectors):
+        """Test filtered queries only return matching items."""
+        results = index.search(vectors[3], 5, filter={"even": True})
+        
+        assert len(results) == 5
+        assert all(metadata["even"] for _, _, metadata in results)
+    
+    def test_save_and_load(self, index, vectors, tmp_path):
+        """Test an index survives a round trip through disk."""
+        index.delete(["item-0"])
+        index.save(str(tmp_path / "index"))
+        
+        loaded = HNSWIndex.load(str(tmp_path / "index"))
+        
+        assert len(loaded) == len(index)
+        for query in vectors[:20]:
+            assert loaded.search(query, 5) == index.search(query, 5)
+        loaded.upsert(["new"], vectors[:1] * 2, [{}])
+        assert loaded.search(vectors[0] * 2, 1)[0][0] == "new"
+    
+    @pytest.mark.asyncio
+    async def test_local_vector_store_hnsw_backend(self, vectors, tmp_path):
+        """Test LocalVectorStore can use HNSW namespaces."""
+        store = LocalVectorStore(index_type="hnsw", index_options={"M": 8, "seed": 1})
+        store.initialize()
+        for i, vector in enumerate(vectors[:50]):
+            await store.store_item("test-chapter", "episodic", f"m{i}", vector, {"i": i})
+        
+        results = await store.query("test-chapter", "episodic", vectors[10], top_k=1)
+        assert results[0]["id"] == "m10"
+        
+        store.save_index("test-chapter", "episodic", str(tmp_path / "episodic"))
+        restored = LocalVectorStore(index_type="hnsw")
+        restored.load_index("test-chapter", "episodic", str(tmp_path / "episodic"))
+        assert await restored.query("test-chapter", "episodic", vectors[10], top_k=1) == results
@@ -0,0 +1,123 @@
+"""Unit tests for the document ingestion module."""
+
+import json
+import os
+
+import pytest
+from unittest.mock import MagicMock
+
+from src.knowledge.embedding_service import EmbeddingService
+from src.knowledge.hashing_embedder import HashingEmbedder
+from src.knowledge.ingestion import IngestionPipeline, chunk_text, read_documents
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestIngestion:
+    """Tests for chunking, document readers and the ingestion pipeline."""
+    
+    @pytest.fixture
+    def docs(self, tmp_path):
+        """Fixture for a directory with one document file of each type."""
+        (tmp_path / "recap.md").write_text(
+            "# DevFest 2024\n" + " ".join(f"word{i}" for i in range(25)) + "\n"
+            "## Sponsors\nThanks to our sponsors\n"
+        )
+        (tmp_path / "events.jsonl").write_text(
+            json.dumps({"title": "Flutter workshop", "description": "Build an app", "city": "Providence"}) + "\n"
+            + json.dumps({"title": "Gemini talk", "description": "Prompting tips", "city": "Boston"}) + "\n"
+        )
+        (tmp_path / "sponsors.csv").write_text("name,tier\nAcme,gold\n")
+        (tmp_path / "notes.pdf").write_bytes(b"%PDF")
+        return tmp_path
+    
+    @pytest.fixture
+    def pipeline_factory(self, local_vector_store):
+        """Fixture building pipelines over a local store and offline embeddings."""
+        embedding_service = EmbeddingService(backend=HashingEmbedder(dimension=32))
+        
+        def build(**options):
+            return IngestionPipeline(local_vector_store, embedding_service, "test-chapter", max_tokens=10, overlap=2, **options)
+        return build
+    
+    def test_chunks_overlap_and_respect_token_bound(self):
+        """Test windows hold at most max_tokens and share the overlap."""
+        tokens = [f"t{i}" for i in range(25)]
+        
+        chunks = [chunk.split() for chunk in chunk_text(" ".join(tokens), max_tokens=10, overlap=3)]
+        
+        assert chunks == [tokens[0:10], tokens[7:17], tokens[14:24], tokens[21:25]]
+        assert list(chunk_text("   ", max_tokens=10, overlap=3)) == []
+        with pytest.raises(ValueError):
+            list(chunk_text("text", max_tokens=4, overlap=4))
+    
+    def test_readers_split_sections_records_and_rows(self, docs):
+        """Test each file type yields documents with inherited metadata."""
+        sections = list(read_documents(docs / "recap.md"))
+        records = list(read_documents(docs / "events.jsonl"))
+        rows = list(read_documents(docs / "sponsors.csv"))
+        
+        assert [doc.metadata["section"] for doc in sections] == ["DevFest 2024", "Sponsors"]
+        (docs / "intro.md").write_text("Preamble\n# Agenda\nTalks\n")
+        assert [doc.metadata for doc in read_documents(docs / "intro.md")] == [{}, {"section": "Agenda"}]
+        assert records[0].text == "Flutter workshop\nBuild an app"
+        assert records[1].metadata == {"city": "Boston"}
+        assert rows[0].text == "Acme"
+        assert rows[0].metadata == {"tier": "gold"}
+    
+    @pytest.mark.asyncio
+    async def test_pipeline_stores_chunks_and_resumes(self, docs, local_vector_store, pipeline_factory):
+        """Test chunks become searchable items and completed files are skipped."""
+        checkpoint = str(docs / "checkpoint.json")
+        
+        result = await pipeline_factory(checkpoint_path=checkpoint).run([docs])
+        
+        # recap.md: 4 + 1 chunks, events.jsonl: 2, sponsors.csv: 1
+        assert result.files == 3
+        assert result.documents == 5
+        assert result.chunks == 8
+        assert result.failed == []
+        assert result.items_per_second > 0
+        
+        items = [item async for item in local_vector_store.scan("test-chapter", "semantic")]
+        assert len(items) == 8
+        workshop = next(item for item in items if item["metadata"].get("city") == "Providence")
+        assert workshop["metadata"]["type"] == "document_chunk"
+        assert workshop["metadata"]["text"] == "Flutter workshop Build an app"
+        
+        (docs / "sponsors.csv").write_text("name,tier\nAcme,gold\nGlobex,silver\n")
+        resumed = await pipeline_factory(checkpoint_path=checkpoint).run([docs])
+        
+        assert resumed.skipped_files == 2
+        assert resumed.files == 1
+        assert resumed.chunks == 2
+        assert len([item async for item in local_vector_store.scan("test-chapter", "semantic")]) == 9
+        
+        (docs / "recap.md").write_text("# DevFest 2024\nShort recap\n")
+        shrunk = await pipeline_factory(checkpoint_path=checkpoint).run([docs])
+        
+        assert shrunk.files == 1
+        assert shrunk.chunks == 1
+        assert shrunk.removed_chunks == 4
+        items = [item async for item in local_vector_store.scan("test-chapter", "semantic")]
+        assert len(items) == 5
+        assert [item["metadata"]["text"] for item in items if item["metadata"]["source"].endswith("recap.md")] == ["# DevFest 2024 Short recap"]
+    
+    @pytest.mark.asyncio
+    async def test_files_are_keyed_on_their_resolved_path(self, docs, local_vector_store, pipeline_factory, monkeypatch):
+        """Test a file ingested by another path keeps its chunk IDs and checkpoint entry."""
+        checkpoint = str(docs / "checkpoint.json")
+        await pipeline_factory(checkpoint_path=checkpoint, root=docs).run([docs / "recap.md"])
+        ids = {item_id async for item_id in local_vector_store.list_ids("test-chapter", "semantic")}
+        
+        monkeypatch.chdir(docs)
+        resumed = await pipeline_factory(checkpoint_path=checkpoint, root=".").run(["recap.md"])
+        assert resumed.skipped_files == 1
+        
+        (docs / "recap.md").write_text("# DevFest 2024\nShort recap\n")
+        local_vector_store.scan = MagicMock(side_effect=AssertionError("stale chunks are listed by ID"))
+        shrunk = await pipeline_factory(checkpoint_path=checkpoint, root=".").run([os.path.join("..", docs.name, "recap.md")])
+        
+        assert shrunk.removed_chunks == 4
+        remaining = {item_id async for item_id in local_vector_store.list_ids("test-chapter", "semantic")}
+        assert remaining < ids
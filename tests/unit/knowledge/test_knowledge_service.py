@@ -0,0 +1,171 @@
+"""Unit tests for the knowledge service module."""
+
+import asyncio
+import sys
+import types
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.knowledge.embedding_service import EmbeddingService
+from src.knowledge.hashing_embedder import HashingEmbedder
+
+
+def _layer_modules():
+    """Stand-ins for the layer modules, which are not part of this tree."""
+    modules = {}
+    for name, class_name in [
+        ("semantic_layer", "SemanticLayer"),
+        ("kinetic_layer", "KineticLayer"),
+        ("dynamic_layer", "DynamicLayer"),
+    ]:
+        module = types.ModuleType(f"src.knowledge.{name}")
+        setattr(module, class_name, MagicMock(name=class_name))
+        modules[module.__name__] = module
+    return modules
+
+
+with patch.dict(sys.modules, _layer_modules()):
+    from src.knowledge.knowledge_service import KnowledgeService
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestKnowledgeService:
+    """Tests for the KnowledgeService class."""
+    
+    @pytest.fixture
+    def embedding_service(self):
+        """Fixture for a deterministic embedding service."""
+        return EmbeddingService(backend=HashingEmbedder(dimension=32), output_format="numpy")
+    
+    @pytest.fixture
+    def service(self, local_vector_store, embedding_service):
+        """Fixture for a knowledge service backed by the local vector store."""
+        return KnowledgeService(
+            chapter_id="test-chapter",
+            vector_store=local_vector_store,
+            embedding_service=embedding_service
+        )
+    
+    @staticmethod
+    async def _store(service, layer, item_id, text, **metadata):
+        embedding = await service.embedding_service.generate_embeddings(text)
+        await service.vector_store.store_item(
+            "test-chapter", layer, item_id, embedding, {"text": text, **metadata}
+        )
+    
+    @staticmethod
+    def _layer_search(service, layer, results=(), delay=0, error=None):
+        async def search(query, limit=10):
+            await asyncio.sleep(delay)
+            if error is not None:
+                raise error
+            return list(results)[:limit]
+        getattr(service, layer).search = AsyncMock(side_effect=search)
+        return getattr(service, layer).search
+    
+    @pytest.mark.asyncio
+    async def test_search_across_layers_returns_layer_results(self, service):
+        """Test each layer's own search results are returned unchanged, by layer."""
+        semantic = self._layer_search(service, "semantic", [{"id": "s1", "content": {"text": "Flutter workshop template"}}])
+        self._layer_search(service, "kinetic")
+        self._layer_search(service, "dynamic", [{"id": "d1"}, {"id": "d2"}])
+        
+        results = await service.search_across_layers("Flutter workshop template", limit=1)
+        
+        assert results == {
+            "semantic": [{"id": "s1", "content": {"text": "Flutter workshop template"}}],
+            "kinetic": [],
+            "dynamic": [{"id": "d1"}],
+        }
+        semantic.assert_awaited_once_with("Flutter workshop template", limit=1)
+    
+    @pytest.mark.asyncio
+    async def test_slow_layer_is_given_up(self, service):
+        """Test a layer past the timeout returns nothing while the others answer."""
+        self._layer_search(service, "semantic", [{"id": "s1"}], delay=0.3)
+        self._layer_search(service, "kinetic", [{"id": "k1"}], delay=1)
+        
+        results = await asyncio.wait_for(
+            service.search_across_layers("Flutter workshop", layers=["semantic", "kinetic"], timeout=0.5),
+            0.7
+        )
+        
+        assert results == {"semantic": [{"id": "s1"}], "kinetic": []}
+    
+    @pytest.mark.asyncio
+    async def test_failing_layer_returns_nothing(self, service):
+        """Test a layer whose search raises contributes an empty list."""
+        self._layer_search(service, "semantic", [{"id": "s1"}])
+        self._layer_search(service, "kinetic")
+        self._layer_search(service, "dynamic", error=ConnectionError("index unavailable"))
+        
+        results = await service.search_across_layers("Flutter workshop")
+        
+        assert results["dynamic"] == []
+        assert results["semantic"] == [{"id": "s1"}]
+    
+    @pytest.mark.asyncio
+    async def test_retrieve_merges_layers_on_weighted_raw_scores(self, service):
+        """Test ranked retrieval weights raw scores and drops copies from other layers."""
+        await self._store(service, "semantic", "s1", "Flutter workshop template", created_at="2025-01-01")
+        await self._store(service, "kinetic", "k1", "Flutter workshop template", created_at="2025-02-01")
+        await self._store(service, "dynamic", "d1", "Flutter workshop attendance")
+        
+        ranked = await service.retrieve(
+            "Flutter workshop template", top_k=5, layer_weights={"semantic": 0.5}, diversity=0
+        )
+        
+        assert [item["id"] for item in ranked] == ["k1", "d1"]
+        assert ranked[0]["raw_score"] == pytest.approx(1.0, abs=1e-5)
+        assert ranked[1]["score"] == ranked[1]["raw_score"] < ranked[0]["score"]
+    
+    @pytest.mark.asyncio
+    async def test_retrieve_skips_failing_layer(self, service):
+        """Test ranked retrieval keeps the answering layers when one fails."""
+        await self._store(service, "semantic", "s1", "Flutter workshop template")
+        await self._store(service, "dynamic", "d1", "Flutter workshop attendance")
+        query = service.vector_store.query
+        
+        async def failing_query(chapter_id, layer, *args, **kwargs):
+            if layer == "semantic":
+                raise ConnectionError("index unavailable")
+            return await query(chapter_id, layer, *args, **kwargs)
+        service.vector_store.query = failing_query
+        
+        ranked = await service.retrieve("Flutter workshop", top_k=5)
+        
+        assert [item["id"] for item in ranked] == ["d1"]
+    
+    @pytest.mark.asyncio
+    async def test_get_contextual_knowledge_buckets_ranked_items(self, service):
+        """Test contextual knowledge keeps each layer's results and buckets one ranked list by category."""
+        await self._store(service, "semantic", "s1", "Flutter workshop template", category="template")
+        await self._store(service, "kinetic", "k1", "Flutter workshop workflow", category="workflow")
+        await self._store(service, "dynamic", "d1", "Flutter workshop attendance")
+        kinetic_results = [{"id": "k1", "content": {"steps": ["book venue"]}}]
+        self._layer_search(service, "semantic")
+        self._layer_search(service, "kinetic", kinetic_results)
+        self._layer_search(service, "dynamic")
+        
+        knowledge = await service.get_contextual_knowledge("Flutter workshop", limit=1)
+        
+        assert {item["id"] for item in knowledge["results"]} == {"s1", "k1", "d1"}
+        assert knowledge["search_results"] == {"semantic": [], "kinetic": kinetic_results, "dynamic": []}
+        assert [item["id"] for item in knowledge["recommendations"]["templates"]] == ["s1"]
+        assert [item["id"] for item in knowledge["recommendations"]["workflows"]] == ["k1"]
+        assert knowledge["recommendations"]["insights"] == []
+    
+    @pytest.mark.asyncio
+    async def test_legacy_backup_exports_layers_without_scanning(self, service):
+        """Test the in-memory backup keeps the layers' own exports and holds no vectors."""
+        await self._store(service, "semantic", "s1", "Flutter workshop template")
+        service.vector_store.scan = MagicMock(side_effect=AssertionError("legacy backup must not scan"))
+        for layer in ("semantic", "kinetic", "dynamic"):
+            getattr(service, layer).export_data = AsyncMock(return_value={"items": [{"id": f"{layer}-1"}]})
+        
+        backup = await service.backup_knowledge()
+        
+        assert backup["layers"]["semantic"] == {"items": [{"id": "semantic-1"}]}
+        assert set(backup["layers"]) == {"semantic", "kinetic", "dynamic"}
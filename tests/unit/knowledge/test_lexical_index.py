@@ -0,0 +1,165 @@
+"""Unit tests for the lexical index module."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.knowledge.lexical_index import BM25Index, item_text, reciprocal_rank_fusion, tokenize
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestLexicalIndex:
+    """Tests for BM25 indexing and hybrid retrieval."""
+    
+    @pytest.fixture
+    def embed(self):
+        """Fixture for an embedding function that records its calls."""
+        return AsyncMock(return_value=[1.0, 0.0, 0.0])
+    
+    async def _store(self, store):
+        await store.store_item("test-chapter", "semantic", "voice", [1.0, 0.0, 0.0], {
+            "type": "brand_voice",
+            "content": {"tone": "Friendly and technical", "style": "Short sentences"},
+        })
+        await store.store_item("test-chapter", "semantic", "announce", [0.0, 1.0, 0.0], {
+            "type": "template",
+            "content": {"name": "Event announcement", "template": "Join us for {event_name}"},
+        })
+        await store.store_item("test-chapter", "semantic", "recap", [0.0, 0.0, 1.0], {
+            "type": "template",
+            "content": {"name": "Event recap", "template": "Thanks for joining {event_name}"},
+        })
+    
+    def test_tokenize_and_item_text(self):
+        """Test text extraction covers nested content keys and values."""
+        metadata = {"type": "brand_voice", "content": {"tone": "Friendly"}, "score": 0.9}
+        
+        assert tokenize(item_text(metadata)) == ["type", "brand", "voice", "content", "tone", "friendly", "score"]
+        assert tokenize("The tone of the post") == ["tone", "post"]
+    
+    def test_bm25_ranking_and_updates(self):
+        """Test BM25 ranks by term relevance and handles re-indexing."""
+        index = BM25Index()
+        index.upsert("a", "flutter workshop flutter codelab", {"type": "event"})
+        index.upsert("b", "kotlin workshop", {"type": "event"})
+        index.upsert("c", "community guidelines", {"type": "policy"})
+        
+        results = index.search("flutter workshop", top_k=5)
+        assert [item_id for item_id, _, _, _ in results] == ["a", "b"]
+        assert results[0][2] == pytest.approx(1.0)
+        assert results[1][2] < 1.0
+        
+        index.upsert("a", "community meetup", {"type": "event"})
+        index.remove("b")
+        assert index.search("flutter workshop", top_k=5) == []
+        assert [r[0] for r in index.search("community", top_k=5, filter={"type": "event"})] == ["a"]
+        assert len(index) == 2
+    
+    def test_bounded_index_drops_oldest(self):
+        """Test a full index drops the least recently written documents."""
+        index = BM25Index(max_documents=2)
+        index.upsert("a", "flutter", {})
+        index.upsert("b", "kotlin", {})
+        index.upsert("a", "flutter codelab", {})
+        index.upsert("c", "android", {})
+        
+        assert len(index) == 2
+        assert "b" not in index and "a" in index and "c" in index
+    
+    def test_reciprocal_rank_fusion(self):
+        """Test items ranked well in several lists win."""
+        scores = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "a"]], k=1)
+        
+        assert max(scores, key=scores.get) == "b"
+    
+    @pytest.mark.asyncio
+    async def test_decisive_lexical_match_skips_embedding(self, local_vector_store, embed):
+        """Test strong keyword matches are returned without embedding the query."""
+        await self._store(local_vector_store)
+        
+        results = await local_vector_store.hybrid_query(
+            "test-chapter", "semantic", "brand voice tone style", embed,
+            filter={"type": "brand_voice"}, top_k=1,
+        )
+        
+        assert [r["id"] for r in results] == ["voice"]
+        embed.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_weak_lexical_match_is_fused_with_vectors(self, local_vector_store, embed):
+        """Test weak keyword matches fall back to embedding and fusion."""
+        await self._store(local_vector_store)
+        
+        results = await local_vector_store.hybrid_query(
+            "test-chapter", "semantic", "event recap highlights", embed, top_k=2,
+        )
+        
+        embed.assert_awaited_once_with("event recap highlights")
+        # "announce" is second in both rankings and beats either leader
+        assert results[0]["id"] == "announce"
+        assert results[0]["score"] > results[1]["score"]
+    
+    @pytest.mark.asyncio
+    async def test_without_lexical_index_uses_vectors(self, embed):
+        """Test hybrid queries degrade to vector queries when disabled."""
+        from src.knowledge.local_vector_store import LocalVectorStore
+        
+        store = LocalVectorStore(lexical_index=False)
+        store.initialize()
+        await self._store(store)
+        
+        results = await store.hybrid_query("test-chapter", "semantic", "brand voice", embed, top_k=1)
+        
+        assert results[0]["id"] == "voice"
+        assert results[0]["score"] == pytest.approx(1.0)
+        embed.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_out_of_date_index_is_not_decisive(self, embed):
+        """Test a scanned index past its TTL, or one that missed a write, is only fused."""
+        from src.knowledge.local_vector_store import LocalVectorStore
+        
+        store = LocalVectorStore(lexical_index=False, lexical_index_ttl=0.05)
+        store.initialize()
+        await self._store(store)
+        await store.build_lexical_index("test-chapter", "semantic")
+        store.fetch = AsyncMock(side_effect=AssertionError("lexical matches need no fetch"))
+        query = ("test-chapter", "semantic", "brand voice tone style")
+        
+        assert [r["id"] for r in await store.hybrid_query(*query, embed, top_k=1)] == ["voice"]
+        embed.assert_not_called()
+        
+        await asyncio.sleep(0.06)
+        await store.hybrid_query(*query, embed, top_k=1)
+        embed.assert_awaited_once()
+        
+        await store.build_lexical_index("test-chapter", "semantic")
+        namespace = store.get_namespace("test-chapter", "semantic")
+        store._upsert = MagicMock(side_effect=ConnectionError("write failed"))
+        with pytest.raises(ConnectionError):
+            await store.store_item("test-chapter", "semantic", "voice", [1.0, 0.0, 0.0], {"type": "brand_voice"})
+        assert store._lexical[namespace].version != store._write_versions[namespace]
+        await store.hybrid_query(*query, embed, top_k=1)
+        assert embed.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_build_lexical_index_from_scan(self, embed):
+        """Test a store without a write-time index can load one from its items."""
+        from src.knowledge.vector_store import VectorStore
+        from src.knowledge.local_vector_store import LocalVectorStore
+        
+        assert VectorStore().lexical_index is False
+        store = LocalVectorStore(lexical_index=False)
+        store.initialize()
+        await self._store(store)
+        
+        assert await store.build_lexical_index("test-chapter", "semantic") == 3
+        results = await store.hybrid_query(
+            "test-chapter", "semantic", "brand voice tone style", embed,
+            filter={"type": "brand_voice"}, top_k=1,
+        )
+        
+        assert [r["id"] for r in results] == ["voice"]
+        embed.assert_not_called()
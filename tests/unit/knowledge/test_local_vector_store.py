@@ -0,0 +1,165 @@
+"""Unit tests for the local vector store module."""
+
+import pytest
+
+from src.knowledge.filters import matches_filter
+from src.knowledge.local_vector_store import FlatIndex, LocalVectorStore
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestLocalVectorStore:
+    """Tests for the LocalVectorStore class."""
+    
+    @pytest.mark.asyncio
+    async def test_query_ranks_by_cosine_similarity(self, local_vector_store):
+        """Test results are ordered by cosine similarity."""
+        await local_vector_store.store_item("test-chapter", "semantic", "a", [1.0, 0.0, 0.0], {"type": "template"})
+        await local_vector_store.store_item("test-chapter", "semantic", "b", [0.7, 0.7, 0.0], {"type": "template"})
+        await local_vector_store.store_item("test-chapter", "semantic", "c", [0.0, 0.0, 5.0], {"type": "template"})
+        
+        results = await local_vector_store.query("test-chapter", "semantic", [2.0, 0.1, 0.0], top_k=2)
+        
+        assert [r["id"] for r in results] == ["a", "b"]
+        assert results[0]["score"] == pytest.approx(0.9988, abs=1e-3)
+        assert results[0]["metadata"] == {"type": "template"}
+    
+    @pytest.mark.asyncio
+    async def test_query_applies_metadata_filter(self, local_vector_store):
+        """Test the filter syntax used by the content agent."""
+        posts = [
+            ("p1", "linkedin", 0.9),
+            ("p2", "linkedin", 0.5),
+            ("p3", "bluesky", 0.95),
+        ]
+        for item_id, platform, performance in posts:
+            await local_vector_store.store_item(
+                "test-chapter", "dynamic", item_id, [1.0, 0.5],
+                {"type": "social_post", "platform": platform, "performance": performance},
+            )
+        
+        results = await local_vector_store.query(
+            "test-chapter", "dynamic", [1.0, 0.5],
+            filter={"type": "social_post", "platform": "linkedin", "performance": {"$gt": 0.7}},
+            top_k=3,
+        )
+        
+        assert [r["id"] for r in results] == ["p1"]
+    
+    @pytest.mark.asyncio
+    async def test_upsert_overwrites_and_namespaces_are_isolated(self, local_vector_store):
+        """Test re-storing an ID replaces it and layers do not mix."""
+        await local_vector_store.store_item("test-chapter", "semantic", "a", [1.0, 0.0], {"version": 1})
+        await local_vector_store.store_item("test-chapter", "semantic", "a", [0.0, 1.0], {"version": 2})
+        await local_vector_store.store_item("test-chapter", "kinetic", "b", [0.0, 1.0], {})
+        
+        results = await local_vector_store.query("test-chapter", "semantic", [0.0, 1.0], top_k=5)
+        
+        assert len(results) == 1
+        assert results[0]["metadata"] == {"version": 2}
+        assert results[0]["score"] == pytest.approx(1.0)
+        assert await local_vector_store.query("other-chapter", "semantic", [0.0, 1.0]) == []
+    
+    def test_dimension_mismatch_raises(self):
+        """Test vectors of the wrong dimension are rejected."""
+        index = FlatIndex(dimension=3)
+        with pytest.raises(ValueError):
+            index.upsert(["a"], [[1.0, 2.0]], [{}])
+    
+    def test_matches_filter_operators(self):
+        """Test the supported filter operators."""
+        metadata = {"type": "social_post", "performance": 0.8, "platform": "linkedin"}
+        
+        assert matches_filter(metadata, None)
+        assert matches_filter(metadata, {"performance": {"$gte": 0.8, "$lt": 1}})
+        assert matches_filter(metadata, {"platform": {"$in": ["linkedin", "bluesky"]}})
+        assert matches_filter(metadata, {"missing": {"$exists": False}})
+        assert matches_filter(metadata, {"$or": [{"type": "template"}, {"performance": {"$gt": 0.5}}]})
+        assert not matches_filter(metadata, {"missing": "value"})
+        assert not matches_filter(metadata, {"performance": {"$gt": "high"}})
+        with pytest.raises(ValueError):
+            matches_filter(metadata, {"performance": {"$near": 1}})
+    
+    @pytest.mark.asyncio
+    async def test_fetch_by_id(self, local_vector_store):
+        """Test items are fetched by ID without a similarity query."""
+        await local_vector_store.store_item("test-chapter", "semantic", "a", [1.0, 0.0], {"type": "template"})
+        await local_vector_store.store_item("test-chapter", "kinetic", "b", [0.0, 1.0], {"type": "workflow"})
+        
+        items = await local_vector_store.fetch("test-chapter", "semantic", ["a", "missing"])
+        layers = await local_vector_store.fetch_many([
+            ("test-chapter", "semantic", ["a"]),
+            ("test-chapter", "kinetic", ["b"]),
+            ("other-chapter", "kinetic", ["b"]),
+        ])
+        
+        assert items == {"a": {"id": "a", "values": [1.0, 0.0], "metadata": {"type": "template"}}}
+        assert list(layers[("test-chapter", "kinetic")]) == ["b"]
+        assert layers[("other-chapter", "kinetic")] == {}
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("options", [{}, {"index_type": "hnsw"}, {"segment_size": 3}])
+    async def test_scan_pages_through_namespace(self, tmp_path, options):
+        """Test scan yields every item once across pages and backends."""
+        if "segment_size" in options:
+            options = dict(options, data_dir=str(tmp_path))
+        store = LocalVectorStore(**options)
+        store.initialize()
+        for i in range(10):
+            await store.store_item("test-chapter", "semantic", f"item-{i}", [1.0, float(i)], {"even": i % 2 == 0})
+        await store.store_item("test-chapter", "semantic", "item-4", [1.0, 4.0], {"even": True, "updated": True})
+        
+        items = [item async for item in store.scan("test-chapter", "semantic", page_size=3)]
+        even = [item["id"] async for item in store.scan("test-chapter", "semantic", filter={"even": True}, page_size=4)]
+        
+        assert sorted(item["id"] for item in items) == sorted(f"item-{i}" for i in range(10))
+        assert next(item for item in items if item["id"] == "item-4")["metadata"]["updated"]
+        assert sorted(even) == ["item-0", "item-2", "item-4", "item-6", "item-8"]
+        assert [item async for item in store.scan("other-chapter", "semantic")] == []
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("options", [{}, {"index_type": "hnsw"}, {"quantization": "int8"}, {"segment_size": 4}])
+    async def test_delete_and_delete_where(self, tmp_path, options):
+        """Test deletes remove items from queries, fetches and scans."""
+        if "segment_size" in options:
+            options = dict(options, data_dir=str(tmp_path))
+        store = LocalVectorStore(**options)
+        store.initialize()
+        await store.store_items(
+            {
+                "chapter_id": "test-chapter",
+                "layer": "episodic",
+                "item_id": f"item-{i}",
+                "embedding": [1.0, float(i)],
+                "metadata": {"day": i},
+            }
+            for i in range(10)
+        )
+        
+        assert await store.delete("test-chapter", "episodic", ["item-0", "missing"]) == 2
+        deleted = await store.delete_where(
+            "test-chapter", "episodic", {"day": {"$lt": 5}},
+            page_size=2, batch_size=2, max_requests_per_second=None,
+        )
+        store.close()
+        
+        assert deleted == 4
+        remaining = sorted([item["id"] async for item in store.scan("test-chapter", "episodic")])
+        assert remaining == [f"item-{i}" for i in range(5, 10)]
+        assert await store.fetch("test-chapter", "episodic", ["item-3"]) == {}
+        results = await store.query("test-chapter", "episodic", [1.0, 0.0], top_k=10)
+        assert sorted(r["id"] for r in results) == remaining
+    
+    def test_flat_index_compaction(self):
+        """Test compaction drops tombstoned rows and keeps the rest searchable."""
+        index = FlatIndex(dimension=2)
+        index.upsert(["a", "b", "c"], [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]], [{}, {"k": "b"}, {}])
+        index.delete(["a", "c"])
+        
+        assert index.ids_page(0, 10) == (["b"], None)
+        page, offset = index.ids_page(0, 1)
+        assert index.compact() == 2
+        assert index.ids_page(offset, 10) == (["b"], None)
+        assert index.ids == ["b"]
+        assert index.memory_bytes() == 3 * 4
+        assert index.search([0.0, 1.0], 5) == [("b", pytest.approx(1.0), {"k": "b"})]
@@ -0,0 +1,134 @@
+"""Unit tests for the projection module."""
+
+import numpy as np
+import pytest
+
+from src.knowledge.embedding_service import EmbeddingService
+from src.knowledge.hashing_embedder import HashingEmbedder
+from src.knowledge.local_vector_store import LocalVectorStore
+from src.knowledge.projection import Projection, fit_chapter_projection
+from src.knowledge.reembedding import ReembeddingJob
+from src.knowledge.route_store import LayerRouter, SQLiteRouteStore
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestProjection:
+    """Tests for PCA and truncation projections and their integration."""
+    
+    @pytest.fixture
+    def vectors(self):
+        """Fixture for vectors near a 4-dimensional subspace of a 32-dimensional space."""
+        rng = np.random.default_rng(0)
+        basis = rng.standard_normal((4, 32))
+        return (rng.standard_normal((200, 4)) @ basis + 0.01 * rng.standard_normal((200, 32))).astype(np.float32)
+    
+    def test_pca_keeps_variance_and_neighbours(self, vectors):
+        """Test PCA onto the subspace keeps nearest neighbours and normalizes rows."""
+        projection = Projection.fit_pca(vectors, 4, source_model="model")
+        
+        reduced = projection.apply(vectors)
+        full = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        
+        assert reduced.shape == (200, 4) and reduced.dtype == np.float32
+        assert np.allclose(np.linalg.norm(reduced, axis=1), 1.0, atol=1e-5)
+        assert projection.explained_variance > 0.99
+        assert np.argmax(full[1:] @ full[0]) == np.argmax(reduced[1:] @ reduced[0])
+        assert projection.apply(vectors[0]).shape == (4,)
+    
+    def test_truncation_keeps_prefix(self):
+        """Test truncation keeps the leading coordinates, renormalized."""
+        projection = Projection.truncate(4, 2, source_model="model")
+        
+        assert np.allclose(projection.apply([3.0, 4.0, 9.0, 9.0]), [0.6, 0.8])
+        with pytest.raises(ValueError):
+            projection.apply([1.0, 2.0])
+        with pytest.raises(ValueError):
+            Projection.truncate(4, 8, source_model="model")
+    
+    def test_save_versions_and_load(self, vectors, tmp_path):
+        """Test saved versions are kept side by side and the latest is current."""
+        first = Projection.fit_pca(vectors, 4, source_model="model")
+        second = Projection.fit_pca(vectors[:100], 4, source_model="model")
+        first.save(str(tmp_path))
+        second.save(str(tmp_path))
+        
+        current = Projection.load(str(tmp_path))
+        previous = Projection.load(str(tmp_path), version=first.version)
+        
+        assert Projection.versions(str(tmp_path)) == [first.version, second.version]
+        assert current.version == second.version and current.model_id == second.model_id
+        assert np.allclose(previous.apply(vectors), first.apply(vectors))
+    
+    @pytest.mark.asyncio
+    async def test_embedding_service_returns_projected_vectors(self):
+        """Test a projected service reduces embeddings and changes its model ID."""
+        backend = HashingEmbedder(dimension=32)
+        service = EmbeddingService(backend=backend, projection=Projection.truncate(32, 8, backend.model_id))
+        
+        embedding = await service.generate_embeddings("Flutter workshop")
+        
+        assert len(embedding) == 8
+        assert service.model_id.startswith(f"{backend.model_id}+truncate8-")
+        assert service.model_metadata(embedding)["embedding_dimension"] == 8
+        with pytest.raises(ValueError):
+            service.set_projection(Projection.truncate(32, 8, "another-model"))
+    
+    @pytest.mark.asyncio
+    async def test_fit_per_chapter_and_project_stored_vectors(self, local_vector_store):
+        """Test a chapter fit feeds a migration that projects instead of re-embedding."""
+        service = EmbeddingService(backend=HashingEmbedder(dimension=32), output_format="numpy")
+        texts = [f"meetup {i} about topic {i % 7}" for i in range(40)]
+        embeddings = await service.generate_embeddings(texts)
+        await local_vector_store.store_items(
+            {
+                "chapter_id": "test-chapter",
+                "layer": "semantic",
+                "item_id": f"item-{i}",
+                "embedding": embedding,
+                "metadata": {"text": text, **service.model_metadata(embedding)},
+            }
+            for i, (text, embedding) in enumerate(zip(texts, embeddings))
+        )
+        
+        projection = await fit_chapter_projection(
+            local_vector_store, "test-chapter", ["semantic"], dimension=8, source_model=service.model_id
+        )
+        projected = service.projected(projection)
+        result = await ReembeddingJob(local_vector_store, projected, "test-chapter", "semantic").run()
+        
+        assert (result.projected, result.reembedded, result.switched) == (40, 0, True)
+        queries = await local_vector_store.router.embed_query("test-chapter", ["semantic", "kinetic"], texts[3], service)
+        matches = await local_vector_store.query("test-chapter", "semantic", queries["semantic"], top_k=1)
+        assert (len(queries["semantic"]), len(queries["kinetic"])) == (8, 32)
+        assert matches[0]["id"] == "item-3"
+        with pytest.raises(ValueError):
+            await fit_chapter_projection(local_vector_store, "test-chapter", ["semantic"], 8, "missing-model")
+    
+    @pytest.mark.asyncio
+    async def test_switched_layers_load_their_projection(self, tmp_path):
+        """Test a restarted store serves a projected layer from the saved projection and checks dimensions."""
+        backend = HashingEmbedder(dimension=32)
+        projection = Projection.truncate(32, 8, backend.model_id)
+        projection.save(str(tmp_path / "projections"))
+        
+        def open_store():
+            store = LocalVectorStore(data_dir=str(tmp_path / "data"), router=LayerRouter(SQLiteRouteStore(str(tmp_path / "routes.db"))))
+            store.initialize()
+            return store
+        
+        store = open_store()
+        await store.store_item("test-chapter", "semantic__v2", "item", [1.0] * 8, {})
+        await store.store_item("test-chapter", "kinetic", "item", [1.0] * 32, {})
+        await store.store_item("test-chapter", "dynamic", "item", [1.0] * 8, {})
+        assert store.switch_layer("test-chapter", "semantic", "semantic__v2", model_id=projection.model_id)
+        store.close()
+        
+        service = EmbeddingService(backend=backend, projection_path=str(tmp_path / "projections"))
+        restarted = open_store()
+        
+        assert service.model_id == backend.model_id
+        assert restarted.router.embedding_service_for("test-chapter", "semantic", service).model_id == projection.model_id
+        await restarted.router.check_dimensions(restarted, "test-chapter", ["semantic", "kinetic"], service)
+        with pytest.raises(ValueError):
+            await restarted.router.check_dimensions(restarted, "test-chapter", ["dynamic"], service)
@@ -0,0 +1,102 @@
+"""Unit tests for the quantization module."""
+
+import numpy as np
+import pytest
+
+from src.knowledge.local_vector_store import FlatIndex, LocalVectorStore
+from src.knowledge.quantization import QuantizedFlatIndex, ScalarQuantizer
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestQuantization:
+    """Tests for scalar quantization of local namespaces."""
+    
+    @pytest.fixture
+    def vectors(self):
+        """Fixture for reproducible random vectors."""
+        return np.random.default_rng(11).standard_normal((2000, 64)).astype(np.float32)
+    
+    @pytest.fixture
+    def queries(self):
+        """Fixture for reproducible random queries."""
+        return np.random.default_rng(12).standard_normal((50, 64)).astype(np.float32)
+    
+    @staticmethod
+    def _recall(index, exact, queries, top_k=10):
+        hits = 0
+        for query in queries:
+            expected = {item_id for item_id, _, _ in exact.search(query, top_k)}
+            hits += len(expected & {item_id for item_id, _, _ in index.search(query, top_k)})
+        return hits / (top_k * len(queries))
+    
+    @staticmethod
+    def _build(index, vectors):
+        index.upsert([f"item-{i}" for i in range(len(vectors))], vectors, [{}] * len(vectors))
+        return index
+    
+    def test_int8_round_trip_error_is_small(self, vectors):
+        """Test int8 codes reconstruct vectors within one quantization step."""
+        quantizer = ScalarQuantizer("int8", percentile=100)
+        quantizer.fit(vectors)
+        
+        codes = quantizer.encode(vectors)
+        
+        assert codes.dtype == np.int8
+        assert np.all(np.abs(quantizer.decode(codes) - vectors) <= quantizer.scale / 2 + 1e-5)
+        np.testing.assert_allclose(
+            quantizer.inner_products(codes, vectors[0]),
+            quantizer.decode(codes) @ vectors[0],
+            rtol=1e-4, atol=1e-3,
+        )
+    
+    @pytest.mark.parametrize("quantization, ratio", [("int8", 4), ("float16", 2)])
+    def test_memory_and_recall(self, vectors, queries, quantization, ratio):
+        """Test quantized indexes shrink memory while keeping recall."""
+        exact = self._build(FlatIndex(dimension=64), vectors)
+        index = self._build(QuantizedFlatIndex(dimension=64, quantization=quantization, calibration_size=500), vectors)
+        
+        assert exact.memory_bytes() / index.memory_bytes() >= ratio * 0.9
+        assert self._recall(index, exact, queries) >= 0.9
+    
+    def test_rescoring_returns_exact_scores(self, vectors, queries, tmp_path):
+        """Test rescored results carry full-precision scores read from disk."""
+        exact = self._build(FlatIndex(dimension=64), vectors)
+        index = self._build(
+            QuantizedFlatIndex(dimension=64, rescore=4, calibration_size=500, rescore_dir=str(tmp_path)),
+            vectors,
+        )
+        
+        assert exact.memory_bytes() / index.memory_bytes() >= 3.6
+        assert self._recall(index, exact, queries) >= 0.98
+        np.testing.assert_array_equal(index.get("item-3")[0], vectors[3])
+        expected = exact.search(queries[0], 3)
+        for (item_id, score, _), (expected_id, expected_score, _) in zip(index.search(queries[0], 3), expected):
+            assert item_id == expected_id
+            assert score == pytest.approx(expected_score, abs=1e-5)
+        
+        index.delete([f"item-{i}" for i in range(0, 2000, 2)])
+        index.compact()
+        assert index.search(vectors[7], 1)[0][0] == "item-7"
+        np.testing.assert_array_equal(index.get("item-1999")[0], vectors[1999])
+    
+    def test_exact_until_calibrated(self, vectors):
+        """Test rows stay in float32 until the calibration sample is full."""
+        index = self._build(QuantizedFlatIndex(dimension=64, calibration_size=5000), vectors[:10])
+        
+        assert not index.quantizer.fitted
+        np.testing.assert_array_equal(index.get("item-3")[0], vectors[3])
+    
+    @pytest.mark.asyncio
+    async def test_local_vector_store_quantization(self, vectors):
+        """Test LocalVectorStore creates quantized namespaces."""
+        store = LocalVectorStore(quantization="float16")
+        store.initialize()
+        await store.store_item("test-chapter", "semantic", "a", vectors[0], {"type": "template"})
+        
+        results = await store.query("test-chapter", "semantic", vectors[0], top_k=1)
+        
+        assert results[0]["id"] == "a"
+        assert results[0]["score"] == pytest.approx(1.0, abs=1e-3)
+        with pytest.raises(ValueError):
+            LocalVectorStore(quantization="int8", index_type="hnsw")
@@ -0,0 +1,107 @@
+"""Unit tests for the query registry module."""
+
+import numpy as np
+import pytest
+
+from src.knowledge.embedding_service import EmbeddingService
+from src.knowledge.hashing_embedder import HashingEmbedder
+from src.knowledge.projection import Projection
+from src.knowledge.query_registry import CANONICAL_QUERIES, QueryRegistry
+
+
+class CountingEmbedder(HashingEmbedder):
+    """Hashing backend counting the texts it embeds."""
+    
+    def __init__(self):
+        super().__init__(dimension=32)
+        self.texts = []
+    
+    async def embed(self, texts):
+        self.texts.extend(texts)
+        return await super().embed(texts)
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestQueryRegistry:
+    """Tests for warm-up, lookups, artifacts and model changes."""
+    
+    @pytest.fixture
+    def backend(self):
+        """Fixture for a counting offline embedding backend."""
+        return CountingEmbedder()
+    
+    @pytest.fixture
+    def service(self, backend):
+        """Fixture for an embedding service over the counting backend."""
+        return EmbeddingService(backend=backend, output_format="numpy")
+    
+    @pytest.mark.asyncio
+    async def test_warm_up_embeds_once(self, service, backend):
+        """Test warm-up embeds every query in one call and lookups reuse it."""
+        registry = QueryRegistry(service)
+        
+        assert await registry.warm_up() == len(CANONICAL_QUERIES)
+        embed = registry.embedder("brand_voice")
+        first = await embed("ignored")
+        second = await registry.embedding("brand_voice")
+        
+        assert sorted(backend.texts) == sorted(CANONICAL_QUERIES.values())
+        assert first is second
+        assert np.allclose(first, await service.generate_embeddings("brand voice guidelines tone style"))
+        assert await registry.warm_up() == 0
+    
+    @pytest.mark.asyncio
+    async def test_warm_up_in_background(self, service, backend):
+        """Test agent constructors start warm-up on the running loop."""
+        registry = QueryRegistry(service)
+        
+        task = registry.warm_up_in_background()
+        await task
+        await registry.embedding("content_templates:event-recap")
+        
+        assert task.result() == len(CANONICAL_QUERIES)
+        assert sorted(backend.texts) == sorted(CANONICAL_QUERIES.values())
+    
+    def test_no_warm_up_outside_event_loop(self, service):
+        """Test registries built outside an event loop embed on first use."""
+        assert QueryRegistry(service).warm_up_in_background() is None
+    
+    @pytest.mark.asyncio
+    async def test_register_replaces_changed_text(self, service):
+        """Test re-registering a name with new text drops its embedding."""
+        registry = QueryRegistry(service, queries={})
+        name = registry.register("content_templates:recap", "content template recap")
+        before = await registry.embedding(name)
+        
+        registry.register(name, "content template event recap")
+        after = await registry.embedding(name)
+        
+        assert registry.names == [name]
+        assert not np.allclose(before, after)
+    
+    @pytest.mark.asyncio
+    async def test_artifact_round_trip(self, service, backend, tmp_path):
+        """Test saved embeddings load without calling the model."""
+        path = str(tmp_path / "queries.npz")
+        source = QueryRegistry(service)
+        await source.warm_up()
+        source.save(path)
+        backend.texts.clear()
+        
+        loaded = QueryRegistry(EmbeddingService(backend=backend), path=path)
+        vector = await loaded.embedding("reflection_summary")
+        
+        assert backend.texts == []
+        assert isinstance(vector, list) and len(vector) == 32
+        assert QueryRegistry(EmbeddingService(backend=HashingEmbedder(dimension=16)), path=path).load(path) == 0
+    
+    @pytest.mark.asyncio
+    async def test_model_change_recomputes(self, service, backend):
+        """Test embeddings are recomputed after the service's model changes."""
+        registry = QueryRegistry(service)
+        await registry.warm_up()
+        
+        service.set_projection(Projection.truncate(32, 8, backend.model_id))
+        
+        assert len(await registry.embedding("brand_voice")) == 8
@@ -0,0 +1,94 @@
+"""Unit tests for the ranking module."""
+
+import pytest
+
+from src.knowledge.ranking import ScoreCalibrator, content_hash, merge_rankings, mmr_rerank
+
+
+def match(item_id, score, text):
+    """Build a query match with text metadata."""
+    return {"id": item_id, "score": score, "metadata": {"text": text}}
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestRanking:
+    """Tests for merging, deduplication and MMR."""
+    
+    def test_merge_weights_and_deduplicates(self):
+        """Test raw scores are weighted per layer and duplicates by ID or content keep the best."""
+        merged = merge_rankings(
+            {
+                "semantic": [match("a", 0.9, "Flutter  Workshop"), match("b", 0.4, "Cloud study jam")],
+                "kinetic": [match("c", 0.2, "Flutter Workshop\n"), match("d", 0.1, "Event checklist")],
+                "dynamic": [match("b", 0.8, "Cloud study jam"), match("e", 0.6, "Attendance trend")],
+            },
+            weights={"dynamic": 0.5},
+        )
+        
+        assert [(m["id"], m["layer"], m["score"]) for m in merged] == [
+            ("a", "semantic", pytest.approx(0.9)),
+            ("b", "dynamic", pytest.approx(0.4)),
+            ("e", "dynamic", pytest.approx(0.3)),
+            ("d", "kinetic", pytest.approx(0.1)),
+        ]
+        assert merged[1]["raw_score"] == 0.8
+    
+    def test_weak_matches_stay_weak(self):
+        """Test a layer's best match is not promoted above stronger matches elsewhere."""
+        merged = merge_rankings({
+            "semantic": [match("a", 0.8, "Flutter workshop"), match("b", 0.6, "Cloud study jam")],
+            "kinetic": [match("c", 0.2, "Event checklist")],
+        })
+        
+        assert [(m["id"], m["score"]) for m in merged] == [("a", 0.8), ("b", 0.6), ("c", 0.2)]
+    
+    def test_layers_of_different_models_are_calibrated(self):
+        """Test scores of different models are compared by their place in each model's distribution."""
+        calibrator = ScoreCalibrator(min_samples=4)
+        rankings = {
+            "semantic": [match("a", 0.8, "Flutter workshop")],
+            "kinetic": [match("c", 0.4, "Event checklist")],
+        }
+        models = {"semantic": "model-a", "kinetic": "model-b"}
+        
+        # Without known distributions the raw scores are merged
+        merged = merge_rankings(rankings, models=models, calibrator=calibrator)
+        assert [m["id"] for m in merged] == ["a", "c"]
+        
+        calibrator.observe("model-a", [0.7, 0.9] * 10)
+        calibrator.observe("model-b", [0.2, 0.3] * 10)
+        merged = merge_rankings(rankings, models=models, calibrator=calibrator)
+        assert [m["id"] for m in merged] == ["c", "a"]
+        assert merged[0]["raw_score"] == 0.4
+        
+        # Layers sharing a model keep their raw scores
+        merged = merge_rankings(rankings, models=dict.fromkeys(rankings, "model-a"), calibrator=calibrator)
+        assert [(m["id"], m["score"]) for m in merged] == [("a", 0.8), ("c", 0.4)]
+    
+    def test_content_hash_ignores_bookkeeping_metadata(self):
+        """Test only content or text identify an item's content."""
+        first = {"text": "Flutter Workshop", "source": "a.md", "created_at": "2025-01-01"}
+        second = {"text": "Flutter  Workshop\n", "source": "b.md", "created_at": "2025-02-01"}
+        
+        assert content_hash(first) == content_hash(second)
+        assert content_hash({"content": {"a": 1, "b": 2}}) == content_hash({"content": {"b": 2, "a": 1}})
+        assert content_hash({"source": "a.md", "embedding_model": "mock"}) is None
+        merged = merge_rankings({"semantic": [
+            {"id": "a", "score": 0.9, "metadata": {"source": "a.md"}},
+            {"id": "b", "score": 0.8, "metadata": {"source": "a.md"}},
+        ]})
+        assert [m["id"] for m in merged] == ["a", "b"]
+    
+    def test_mmr_prefers_diverse_candidates(self):
+        """Test MMR skips a near-duplicate that plain ranking would keep."""
+        candidates = [
+            {"id": "a", "score": 1.0},
+            {"id": "a-copy", "score": 0.95},
+            {"id": "b", "score": 0.8},
+        ]
+        vectors = {"a": [1.0, 0.0], "a-copy": [0.99, 0.1], "b": [0.0, 1.0]}
+        
+        assert [c["id"] for c in mmr_rerank(candidates, vectors, 2, diversity=0.5)] == ["a", "b"]
+        assert [c["id"] for c in mmr_rerank(candidates, vectors, 2, diversity=0.0)] == ["a", "a-copy"]
+        assert [c["id"] for c in mmr_rerank(candidates, {}, 3, diversity=0.5)] == ["a", "a-copy", "b"]
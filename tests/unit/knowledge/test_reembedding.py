@@ -0,0 +1,170 @@
+"""Unit tests for the re-embedding module."""
+
+import asyncio
+
+import pytest
+
+from src.knowledge.embedding_service import EmbeddingService
+from src.knowledge.hashing_embedder import HashingEmbedder
+from src.knowledge.local_vector_store import LocalVectorStore
+from src.knowledge.reembedding import ReembeddingJob, shadow_layer
+from src.knowledge.route_store import LayerRouter, SQLiteRouteStore
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestReembedding:
+    """Tests for model metadata, layer switching and the re-embedding job."""
+    
+    @pytest.fixture
+    def old_service(self):
+        """Fixture for the embedding model the items were written with."""
+        return EmbeddingService(backend=HashingEmbedder(dimension=32), output_format="numpy")
+    
+    @pytest.fixture
+    def new_service(self):
+        """Fixture for the embedding model being migrated to."""
+        return EmbeddingService(backend=HashingEmbedder(dimension=48), output_format="numpy")
+    
+    async def store(self, vector_store, service, item_id, text):
+        """Store a text item embedded by a service."""
+        embedding = await service.generate_embeddings(text)
+        await vector_store.store_item(
+            "test-chapter", "semantic", item_id, embedding,
+            {"type": "note", "text": text, **service.model_metadata(embedding)},
+        )
+    
+    @pytest.mark.asyncio
+    async def test_job_reembeds_stale_items_and_switches(self, local_vector_store, old_service):
+        """Test stale items are re-embedded into the shadow and reads follow the switch."""
+        new_service = EmbeddingService(backend=HashingEmbedder(dimension=32, word_bigrams=False), output_format="numpy")
+        for i in range(10):
+            await self.store(local_vector_store, old_service, f"old-{i}", f"meetup recap number {i}")
+        await self.store(local_vector_store, new_service, "current", "already on the new model")
+        
+        result = await ReembeddingJob(local_vector_store, new_service, "test-chapter", "semantic", batch_size=4).run()
+        
+        assert (result.scanned, result.reembedded, result.copied, result.failed) == (11, 10, 1, [])
+        assert result.switched
+        assert result.layer == shadow_layer("semantic", new_service.model_id)
+        assert local_vector_store.resolve_layer("test-chapter", "semantic") == result.layer
+        assert local_vector_store.router.embedding_service_for("test-chapter", "semantic", old_service) is new_service
+        
+        query = await new_service.generate_embeddings("meetup recap number 3")
+        matches = await local_vector_store.query("test-chapter", "semantic", query, top_k=1)
+        assert matches[0]["id"] == "old-3"
+        assert matches[0]["metadata"]["embedding_model"] == new_service.model_id
+        assert matches[0]["metadata"]["embedding_dimension"] == 32
+    
+    @pytest.mark.asyncio
+    async def test_writes_during_migration_reach_the_shadow(self, local_vector_store, old_service, new_service):
+        """Test writes and deletes made while the job runs are replayed before the switch."""
+        for i in range(20):
+            await self.store(local_vector_store, old_service, f"item-{i}", f"session notes {i}")
+        job = ReembeddingJob(local_vector_store, new_service, "test-chapter", "semantic", batch_size=5, page_size=5)
+        
+        task = job.start()
+        await asyncio.sleep(0)
+        await self.store(local_vector_store, old_service, "late", "written during the migration")
+        await local_vector_store.delete("test-chapter", "semantic", ["item-0"])
+        result = await task
+        
+        assert result.switched
+        items = await local_vector_store.fetch("test-chapter", "semantic", ["late", "item-0", "item-1"])
+        assert set(items) == {"late", "item-1"}
+        assert len(items["late"]["values"]) == 48
+    
+    @pytest.mark.asyncio
+    async def test_switch_waits_for_tracked_changes(self, local_vector_store, old_service):
+        """Test a layer with pending tracked changes is not switched."""
+        namespace = local_vector_store.get_namespace("test-chapter", "semantic")
+        local_vector_store.router.track(namespace)
+        await self.store(local_vector_store, old_service, "pending", "not yet copied")
+        
+        assert not local_vector_store.switch_layer("test-chapter", "semantic", "semantic__v2")
+        assert local_vector_store.router.take_changes(namespace) == {"pending"}
+        assert local_vector_store.switch_layer("test-chapter", "semantic", "semantic__v2")
+        assert local_vector_store.get_namespace("test-chapter", "semantic").endswith("-semantic__v2")
+    
+    def test_switch_needs_a_route_store(self):
+        """Test a layer cannot be switched where other processes could not follow."""
+        store = LocalVectorStore()
+        store.initialize()
+        
+        with pytest.raises(ValueError):
+            store.switch_layer("test-chapter", "semantic", "semantic__v2")
+        assert store.resolve_layer("test-chapter", "semantic") == "semantic"
+    
+    @pytest.mark.asyncio
+    async def test_failed_items_leave_layer_unswitched(self, local_vector_store, old_service, new_service):
+        """Test the layer keeps its namespace when re-embedding fails."""
+        await self.store(local_vector_store, old_service, "item", "some text")
+        
+        def broken(metadata):
+            raise KeyError("text")
+        
+        result = await ReembeddingJob(local_vector_store, new_service, "test-chapter", "semantic", text_for=broken).run()
+        
+        assert not result.switched
+        assert [failure["id"] for failure in result.failed] == ["item"]
+        assert local_vector_store.resolve_layer("test-chapter", "semantic") == "semantic"
+    
+    @pytest.mark.asyncio
+    async def test_switch_is_recorded_in_the_route_store(self, tmp_path, old_service, new_service):
+        """Test a store opened later serves the layer from the shadow with the target model."""
+        path = str(tmp_path / "routes.db")
+        store = LocalVectorStore(router=LayerRouter(SQLiteRouteStore(path)))
+        store.initialize()
+        await self.store(store, old_service, "item", "some text")
+        
+        result = await ReembeddingJob(store, new_service, "test-chapter", "semantic").run()
+        reopened = LocalVectorStore(router=LayerRouter(SQLiteRouteStore(path)))
+        
+        assert result.switched
+        assert reopened.resolve_layer("test-chapter", "semantic") == result.layer
+        with pytest.raises(ValueError):
+            reopened.router.embedding_service_for("test-chapter", "semantic", old_service)
+        reopened.router.register_embedding_service(new_service)
+        assert reopened.router.embedding_service_for("test-chapter", "semantic", old_service) is new_service
+        assert reopened.router.embedding_service_for("test-chapter", "kinetic", old_service) is old_service
+    
+    @pytest.mark.asyncio
+    async def test_tracking_lasts_until_every_process_loads_the_route(self, tmp_path, old_service, new_service):
+        """Test writes of a process still on the old route are replayed after the switch."""
+        path = str(tmp_path / "routes.db")
+        store = LocalVectorStore(router=LayerRouter(SQLiteRouteStore(path)))
+        store.initialize()
+        other_process = LayerRouter(SQLiteRouteStore(path), poll_interval=3600)
+        running = LayerRouter(SQLiteRouteStore(path), poll_interval=0)
+        await self.store(store, old_service, "item", "some text")
+        source = store.get_namespace("test-chapter", "semantic")
+        
+        task = ReembeddingJob(store, new_service, "test-chapter", "semantic").start()
+        while running.route("test-chapter", "semantic").target_layer == "semantic":
+            await asyncio.sleep(0.01)
+        assert not task.done()
+        
+        # The other process still writes the old namespace, which stays tracked
+        embedding = await old_service.generate_embeddings("written on the old route")
+        store._upsert(source, [("late", embedding, {"text": "written on the old route"})])
+        other_process.record_changes(source, ["late"])
+        other_process.refresh(force=True)
+        result = await task
+        
+        assert result.switched
+        items = await store.fetch("test-chapter", "semantic", ["item", "late"])
+        assert {item_id: len(item["values"]) for item_id, item in items.items()} == {"item": 48, "late": 48}
+        assert not store.router.route_store.is_tracked(source)
+    
+    @pytest.mark.asyncio
+    async def test_dimension_mismatch_fails_before_copying(self, local_vector_store, old_service, new_service):
+        """Test a shadow whose index has another dimension is rejected up front."""
+        await self.store(local_vector_store, old_service, "item", "some text")
+        target = shadow_layer("semantic", new_service.model_id)
+        await local_vector_store.store_item("test-chapter", target, "leftover", [0.5] * 32, {})
+        
+        with pytest.raises(ValueError):
+            await ReembeddingJob(local_vector_store, new_service, "test-chapter", "semantic").run()
+        
+        assert local_vector_store.resolve_layer("test-chapter", "semantic") == "semantic"
+        assert set(await local_vector_store.fetch("test-chapter", target, ["item", "leftover"])) == {"leftover"}
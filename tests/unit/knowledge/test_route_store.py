@@ -0,0 +1,94 @@
+"""Unit tests for the route store module."""
+
+import pytest
+
+from src.knowledge.embedding_service import EmbeddingService
+from src.knowledge.hashing_embedder import HashingEmbedder
+from src.knowledge.local_vector_store import LocalVectorStore
+from src.knowledge.route_store import LayerRoute, LayerRouter, SQLiteRouteStore
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestRouteStore:
+    """Tests for shared layer routes, their polling and the change log."""
+    
+    def test_routers_reload_changed_routes(self, tmp_path):
+        """Test a router picks up another process's switch at its next poll."""
+        path = str(tmp_path / "routes.db")
+        switching, polling = LayerRouter(SQLiteRouteStore(path)), LayerRouter(SQLiteRouteStore(path), poll_interval=0)
+        changes = []
+        polling.subscribe(lambda old, new: changes.append((old, new)))
+        
+        version = switching.switch(LayerRoute("test-chapter", "semantic", "semantic__v2", "model-b"))
+        
+        assert not switching.acknowledged(version)
+        assert polling.route("test-chapter", "semantic").target_layer == "semantic__v2"
+        assert polling.model_id("test-chapter", "semantic") == "model-b"
+        assert changes == [(None, LayerRoute("test-chapter", "semantic", "semantic__v2", "model-b"))]
+        assert switching.acknowledged(version)
+        
+        switching.switch(LayerRoute("test-chapter", "semantic", "semantic"))
+        assert polling.route("test-chapter", "semantic") == LayerRoute("test-chapter", "semantic", "semantic")
+        assert polling.routes() == []
+    
+    def test_gone_processes_are_not_waited_for(self, tmp_path):
+        """Test closed routers and those silent past the TTL do not hold a migration back."""
+        path = str(tmp_path / "routes.db")
+        switching = LayerRouter(SQLiteRouteStore(path, reader_ttl=3600))
+        closed = LayerRouter(SQLiteRouteStore(path))
+        silent = LayerRouter(SQLiteRouteStore(path), poll_interval=3600)
+        
+        version = switching.switch(LayerRoute("test-chapter", "semantic", "semantic__v2"))
+        closed.close()
+        assert not switching.acknowledged(version)
+        
+        switching.route_store.reader_ttl = 0
+        assert switching.acknowledged(version)
+        assert silent.route("test-chapter", "semantic").target_layer == "semantic"
+    
+    def test_switching_needs_a_route_store(self):
+        """Test a router without a route store serves every layer from its own namespace."""
+        router = LayerRouter()
+        
+        assert router.route("test-chapter", "semantic").target_layer == "semantic"
+        with pytest.raises(ValueError):
+            router.switch(LayerRoute("test-chapter", "semantic", "semantic__v2"))
+        with pytest.raises(ValueError):
+            router.track("gdg-test-chapter-semantic")
+    
+    def test_change_log_is_shared(self, tmp_path):
+        """Test changes are logged only for tracked namespaces and seen by every connection."""
+        path = str(tmp_path / "routes.db")
+        migration, writer = SQLiteRouteStore(path), SQLiteRouteStore(path)
+        writer.record_changes("ns-a", ["before"])
+        migration.track("ns-a")
+        
+        writer.record_changes("ns-a", ["item-1", "item-2"])
+        writer.record_changes("ns-b", ["other"])
+        
+        assert migration.has_changes("ns-a") and not migration.has_changes("ns-b")
+        assert migration.take_changes("ns-a") == {"item-1", "item-2"}
+        assert not migration.has_changes("ns-a")
+        migration.untrack("ns-a")
+        writer.record_changes("ns-a", ["after"])
+        assert migration.take_changes("ns-a") == set()
+    
+    def test_dimension_check_needs_an_event_loop(self, tmp_path):
+        """Test the background dimension check is not started outside an event loop."""
+        store = LocalVectorStore(data_dir=str(tmp_path), router=LayerRouter())
+        
+        assert store.router.check_dimensions_in_background(store, "test-chapter", ["semantic"], EmbeddingService(backend=HashingEmbedder())) is None
+    
+    @pytest.mark.asyncio
+    async def test_dimension_mismatch_is_logged_in_the_background(self, tmp_path, caplog):
+        """Test a background dimension check logs a layer whose index does not match its model."""
+        store = LocalVectorStore(data_dir=str(tmp_path), router=LayerRouter())
+        store.initialize()
+        await store.store_item("test-chapter", "semantic", "item", [1.0] * 8, {})
+        
+        task = store.router.check_dimensions_in_background(store, "test-chapter", ["semantic"], EmbeddingService(backend=HashingEmbedder(dimension=32)))
+        with pytest.raises(ValueError):
+            await task
+        
+        assert "Checking layer index dimensions failed" in caplog.text
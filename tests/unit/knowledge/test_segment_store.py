@@ -0,0 +1,136 @@
+"""Unit tests for the segment store module."""
+
+import numpy as np
+import pytest
+
+from src.knowledge.local_vector_store import LocalVectorStore
+from src.knowledge.segment_store import SegmentedNamespace
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestSegmentedNamespace:
+    """Tests for the SegmentedNamespace class."""
+    
+    @pytest.fixture
+    def vectors(self):
+        """Fixture for reproducible random vectors."""
+        return np.random.default_rng(3).standard_normal((25, 8)).astype(np.float32)
+    
+    def test_persists_across_reopen(self, vectors, tmp_path):
+        """Test data written by one instance is read back by another."""
+        namespace = SegmentedNamespace(str(tmp_path / "ns"), segment_size=10)
+        namespace.upsert([f"item-{i}" for i in range(25)], vectors, [{"i": i} for i in range(25)])
+        
+        reopened = SegmentedNamespace(str(tmp_path / "ns"))
+        
+        assert len(reopened) == 25
+        assert len(reopened._segments) == 3
+        item_id, score, metadata = reopened.search(vectors[12], 1)[0]
+        assert (item_id, metadata) == ("item-12", {"i": 12})
+        assert score == pytest.approx(1.0)
+        np.testing.assert_array_equal(reopened.get("item-7")[0], vectors[7])
+    
+    def test_latest_write_wins_and_filters(self, vectors, tmp_path):
+        """Test overwritten IDs resolve to their newest row."""
+        namespace = SegmentedNamespace(str(tmp_path / "ns"), segment_size=4)
+        namespace.upsert(["a", "b"], vectors[:2], [{"v": 1}, {"v": 1}])
+        namespace.upsert(["c", "d", "e", "a"], vectors[2:6], [{"v": 1}, {"v": 1}, {"v": 1}, {"v": 2}])
+        
+        assert len(namespace) == 5
+        assert namespace.get("a")[1] == {"v": 2}
+        assert [r[0] for r in namespace.search(vectors[5], 5)].count("a") == 1
+        assert namespace.search(vectors[5], 1, filter={"v": 2})[0][0] == "a"
+    
+    def test_filtered_search_does_not_cache_every_row(self, vectors, tmp_path):
+        """Test filters decode rows without keeping them, and only results are cached."""
+        namespace = SegmentedNamespace(str(tmp_path / "ns"))
+        namespace.upsert([f"item-{i}" for i in range(25)], vectors, [{"even": i % 2 == 0} for i in range(25)])
+        
+        results = namespace.search(vectors[4], 3, filter={"even": True})
+        
+        assert all(metadata["even"] for _, _, metadata in results)
+        assert len(namespace._segments[0]._metadata_cache) == 3
+    
+    def test_recovers_from_uncommitted_append(self, vectors, tmp_path):
+        """Test bytes written without committed offsets are discarded."""
+        namespace = SegmentedNamespace(str(tmp_path / "ns"))
+        namespace.upsert(["a", "b"], vectors[:2], [{}, {}])
+        segment = namespace._segments[-1]
+        with open(segment._path(".vec"), "ab") as f:
+            f.write(b"partial")
+        with open(segment._path(".ids"), "a") as f:
+            f.write("orphan\n")
+        
+        reopened = SegmentedNamespace(str(tmp_path / "ns"))
+        reopened.upsert(["c"], vectors[2:3], [{}])
+        
+        assert sorted(reopened.ids) == ["a", "b", "c"]
+        np.testing.assert_array_equal(reopened.get("c")[0], vectors[2])
+    
+    def test_compaction_merges_sealed_segments(self, vectors, tmp_path):
+        """Test compaction keeps only the latest row of every ID."""
+        namespace = SegmentedNamespace(str(tmp_path / "ns"), segment_size=5, max_segments=100)
+        namespace.upsert([f"item-{i}" for i in range(20)], vectors[:20], [{"v": 1}] * 20)
+        namespace.upsert(["item-0"], vectors[:1], [{"v": 2}])
+        
+        assert namespace.compact() == 4
+        
+        reopened = SegmentedNamespace(str(tmp_path / "ns"))
+        assert len(reopened) == 20
+        assert len(reopened._segments) == 2
+        assert reopened.get("item-0")[1] == {"v": 2}
+        assert reopened.search(vectors[9], 1)[0][0] == "item-9"
+    
+    def test_tombstones_persist_and_compact_away(self, vectors, tmp_path):
+        """Test deletes survive reopening and compaction drops their rows."""
+        namespace = SegmentedNamespace(str(tmp_path / "ns"), segment_size=5)
+        namespace.upsert([f"item-{i}" for i in range(12)], vectors[:12], [{"i": i} for i in range(12)])
+        
+        assert namespace.delete(["item-1", "item-7", "missing"]) == 2
+        assert namespace.get("item-1") is None
+        
+        reopened = SegmentedNamespace(str(tmp_path / "ns"), segment_size=5)
+        assert len(reopened) == 10
+        assert "item-7" not in reopened.ids_page(0, 100)[0]
+        assert all(item_id != "item-7" for item_id, _, _ in reopened.search(vectors[7], 12))
+        
+        reopened.upsert(["item-20"] * 3, vectors[20:23], [{}] * 3)
+        reopened.compact()
+        assert len(reopened) == 11
+        # 10 live sealed rows merged; the active segment keeps its 2 rows
+        assert sum(segment.count for segment in reopened._segments) == 12
+        reopened.upsert(["item-7"], vectors[7:8], [{"i": 7}])
+        assert reopened.get("item-7")[1] == {"i": 7}
+    
+    def test_paging_survives_compaction(self, vectors, tmp_path):
+        """Test a scan interrupted by compaction neither skips nor repeats IDs."""
+        namespace = SegmentedNamespace(str(tmp_path / "ns"), segment_size=5, max_segments=100)
+        namespace.upsert([f"item-{i}" for i in range(20)], vectors[:20], [{}] * 20)
+        namespace.delete([f"item-{i}" for i in range(0, 8, 2)])
+        
+        first, offset = namespace.ids_page(0, 6)
+        assert namespace.compact() > 0
+        seen = list(first)
+        while offset is not None:
+            page, offset = namespace.ids_page(offset, 6)
+            seen.extend(page)
+        
+        assert seen == [f"item-{i}" for i in range(20) if i >= 8 or i % 2]
+    
+    @pytest.mark.asyncio
+    async def test_local_vector_store_background_compaction(self, vectors, tmp_path):
+        """Test LocalVectorStore persists namespaces and compacts them."""
+        store = LocalVectorStore(data_dir=str(tmp_path), segment_size=2, max_segments=3)
+        store.initialize()
+        for i, vector in enumerate(vectors[:12]):
+            await store.store_item("test-chapter", "semantic", f"item-{i}", vector, {"i": i})
+        store.close()
+        
+        restarted = LocalVectorStore(data_dir=str(tmp_path))
+        restarted.initialize()
+        assert restarted._namespaces == {}
+        
+        results = await restarted.query("test-chapter", "semantic", vectors[4], top_k=1)
+        assert results[0]["id"] == "item-4"
+        assert len(restarted._get_index("gdg-test-chapter-semantic")) == 12
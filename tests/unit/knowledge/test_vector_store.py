@@ -0,0 +1,399 @@
+"""Unit tests for the vector store module."""
+
+import asyncio
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+
+from src.knowledge.route_store import LayerRouter, SQLiteRouteStore
+from src.knowledge.vector_store import VectorStore, _index_registry
+
+
+@pytest.mark.unit
+@pytest.mark.knowledge
+class TestVectorStore:
+    """Tests for the VectorStore class."""
+    
+    @pytest.fixture
+    def mock_index(self):
+        """Fixture for a mocked Pinecone index."""
+        return MagicMock()
+    
+    @pytest.fixture
+    def vector_store(self, mock_index):
+        """Fixture for a VectorStore connected to a mocked index."""
+        store = VectorStore(api_key="test-key", index_name="test-index", router=LayerRouter(SQLiteRouteStore()))
+        store.index = mock_index
+        store._initialized = True
+        return store
+    
+    @staticmethod
+    def _items(count, layer="semantic"):
+        return [
+            {
+                "chapter_id": "test-chapter",
+                "layer": layer,
+                "item_id": f"{layer}-{i}",
+                "embedding": [0.1] * 8,
+                "metadata": {"type": "template"},
+            }
+            for i in range(count)
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_store_items_groups_and_chunks(self, vector_store, mock_index):
+        """Test bulk upserts are grouped by namespace and chunked."""
+        items = self._items(5, "semantic") + self._items(2, "kinetic")
+        
+        result = await vector_store.store_items(items, batch_size=2)
+        
+        assert result.succeeded == 7
+        assert result.failed == []
+        
+        # 3 semantic chunks (2, 2, 1) and 1 kinetic chunk
+        calls = mock_index.upsert.call_args_list
+        assert len(calls) == 4
+        namespaces = sorted(call.kwargs["namespace"] for call in calls)
+        assert namespaces.count("gdg-test-chapter-semantic") == 3
+        assert namespaces.count("gdg-test-chapter-kinetic") == 1
+        assert all(len(call.kwargs["vectors"]) <= 2 for call in calls)
+    
+    @pytest.mark.asyncio
+    async def test_store_items_reports_failures(self, vector_store, mock_index):
+        """Test failed chunks and invalid items are reported per item."""
+        def upsert(vectors, namespace):
+            if namespace.endswith("kinetic"):
+                raise RuntimeError("backend unavailable")
+        mock_index.upsert.side_effect = upsert
+        
+        items = self._items(3, "semantic") + self._items(2, "kinetic")
+        items.append({"chapter_id": "test-chapter", "layer": "semantic"})
+        
+        result = await vector_store.store_items(items, batch_size=10)
+        
+        assert result.succeeded == 3
+        assert result.total == 6
+        failed_ids = {failure["id"] for failure in result.failed}
+        assert failed_ids == {"kinetic-0", "kinetic-1", None}
+    
+    @pytest.mark.asyncio
+    async def test_store_items_accepts_async_iterables(self, vector_store, mock_index):
+        """Test items can be streamed from an async generator."""
+        async def generate():
+            for item in self._items(3):
+                yield item
+        
+        result = await vector_store.store_items(generate(), batch_size=2)
+        
+        assert result.succeeded == 3
+        assert mock_index.upsert.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_queries_do_not_block_event_loop(self, vector_store, mock_index):
+        """Test blocking client calls run off the loop and overlap."""
+        def slow_query(**kwargs):
+            time.sleep(0.2)
+            return MagicMock(matches=[])
+        mock_index.query.side_effect = slow_query
+        
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            vector_store.query("test-chapter", "semantic", [0.1] * 8)
+            for _ in range(4)
+        ])
+        elapsed = time.perf_counter() - start
+        
+        assert results == [[], [], [], []]
+        assert elapsed < 0.6
+    
+    @pytest.mark.asyncio
+    async def test_pending_calls_are_bounded(self, mock_index):
+        """Test callers wait once max_pending calls are in flight."""
+        store = VectorStore(api_key="test-key", max_workers=4, max_pending=2)
+        store.index = mock_index
+        store._initialized = True
+        
+        lock = threading.Lock()
+        in_flight = 0
+        peak = 0
+        
+        def tracked_upsert(vectors, namespace):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.05)
+            with lock:
+                in_flight -= 1
+        mock_index.upsert.side_effect = tracked_upsert
+        
+        await asyncio.gather(*[
+            store.store_item("test-chapter", "semantic", f"item-{i}", [0.1] * 8, {})
+            for i in range(6)
+        ])
+        store.close()
+        
+        assert mock_index.upsert.call_count == 6
+        assert peak <= 2
+    
+    @pytest.mark.asyncio
+    async def test_timed_out_calls_keep_their_slot(self, mock_index):
+        """Test a call abandoned by its caller holds its slot until it returns."""
+        store = VectorStore(api_key="test-key", max_workers=2, max_pending=1)
+        finished = threading.Event()
+        
+        def slow_call():
+            time.sleep(0.2)
+            finished.set()
+        
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(store._run(slow_call), 0.02)
+        await store._run(lambda: None)
+        store.close()
+        
+        assert finished.is_set()
+    
+    @pytest.mark.asyncio
+    async def test_query_many_runs_layers_concurrently(self, vector_store, mock_index):
+        """Test multi-layer queries overlap and merge raw, weighted scores."""
+        scores = {
+            "gdg-test-chapter-semantic": [0.9, 0.5],
+            "gdg-test-chapter-dynamic": [0.3, 0.2, 0.1],
+            "gdg-test-chapter-kinetic": [0.4],
+        }
+        
+        def slow_query(vector, namespace, top_k, include_metadata, filter):
+            time.sleep(0.2)
+            return MagicMock(matches=[
+                MagicMock(id=f"{namespace}-{i}", score=score, metadata={})
+                for i, score in enumerate(scores[namespace])
+            ])
+        mock_index.query.side_effect = slow_query
+        
+        start = time.perf_counter()
+        results = await vector_store.query_many(
+            "test-chapter", ["semantic", "dynamic", "kinetic"], [0.1] * 8, top_k=4
+        )
+        elapsed = time.perf_counter() - start
+        
+        assert elapsed < 0.45
+        assert mock_index.query.call_count == 3
+        assert {call.kwargs["vector"] == [0.1] * 8 for call in mock_index.query.call_args_list} == {True}
+        
+        # A weak layer's best match does not outrank a strong layer's matches
+        assert [r["id"] for r in results] == [
+            "gdg-test-chapter-semantic-0",
+            "gdg-test-chapter-semantic-1",
+            "gdg-test-chapter-kinetic-0",
+            "gdg-test-chapter-dynamic-0",
+        ]
+        assert [r["layer"] for r in results] == ["semantic", "semantic", "kinetic", "dynamic"]
+        
+        weighted = await vector_store.query_many(
+            "test-chapter", ["semantic", "dynamic", "kinetic"], [0.1] * 8, top_k=2,
+            layer_weights={"dynamic": 2.0},
+        )
+        assert [r["id"] for r in weighted] == ["gdg-test-chapter-semantic-0", "gdg-test-chapter-dynamic-0"]
+        assert weighted[1]["score"] == pytest.approx(0.6)
+        assert weighted[1]["raw_score"] == pytest.approx(0.3)
+    
+    @pytest.mark.asyncio
+    async def test_query_many_calibrates_layers_of_different_models(self, vector_store, mock_index):
+        """Test layers left on different models are merged on calibrated scores."""
+        scores = {"gdg-test-chapter-semantic": 0.8, "gdg-test-chapter-dynamic": 0.4}
+        mock_index.query.side_effect = lambda vector, namespace, top_k, include_metadata, filter: MagicMock(
+            matches=[MagicMock(id=namespace, score=scores[namespace], metadata={})]
+        )
+        vector_store.switch_layer("test-chapter", "dynamic", "dynamic", model_id="model-b")
+        vector_store.score_calibrator.observe(None, [0.75, 0.85] * 10)
+        vector_store.score_calibrator.observe("model-b", [0.25, 0.35] * 10)
+        
+        results = await vector_store.query_many(
+            "test-chapter", ["semantic", "dynamic"], {"semantic": [0.1] * 8, "dynamic": [0.2] * 8}, top_k=2
+        )
+        
+        # 0.4 is a strong match for model-b, 0.8 an average one for the default model
+        assert [r["layer"] for r in results] == ["dynamic", "semantic"]
+        assert results[0]["raw_score"] == pytest.approx(0.4)
+        assert results[0]["score"] > 0.8
+    
+    @pytest.mark.asyncio
+    async def test_numpy_embeddings_are_accepted(self, vector_store, mock_index):
+        """Test array embeddings are converted only at the Pinecone boundary."""
+        mock_index.query.return_value = MagicMock(matches=[])
+        vector = np.full(8, 0.5, dtype=np.float32)
+        
+        await vector_store.store_item("test-chapter", "semantic", "item-1", vector, {"type": "template"})
+        await vector_store.query("test-chapter", "semantic", vector)
+        
+        upserted = mock_index.upsert.call_args.kwargs["vectors"]
+        assert upserted[0][1] == [0.5] * 8
+        assert mock_index.query.call_args.kwargs["vector"] == [0.5] * 8
+    
+    @pytest.mark.asyncio
+    async def test_repeated_queries_are_cached(self, vector_store, mock_index):
+        """Test identical queries are served from the query cache."""
+        match = MagicMock(id="template-1", score=0.9, metadata={"type": "template"})
+        mock_index.query.return_value = MagicMock(matches=[match])
+        
+        first = await vector_store.query("test-chapter", "semantic", [0.1] * 8, filter={"type": "template"})
+        first[0]["metadata"]["type"] = "mutated"
+        second = await vector_store.query("test-chapter", "semantic", [0.1] * 8, filter={"type": "template"})
+        await vector_store.query("test-chapter", "semantic", [0.1] * 8, top_k=3)
+        
+        assert second[0]["metadata"] == {"type": "template"}
+        assert mock_index.query.call_count == 2
+        assert vector_store.cache_stats()["hits"] == 1
+        assert vector_store.cache_stats()["misses"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_writes_invalidate_cached_queries(self, vector_store, mock_index):
+        """Test writing to a namespace invalidates only its cached queries."""
+        mock_index.query.return_value = MagicMock(matches=[])
+        
+        await vector_store.query("test-chapter", "semantic", [0.1] * 8)
+        await vector_store.query("test-chapter", "kinetic", [0.1] * 8)
+        await vector_store.store_item("test-chapter", "semantic", "item-1", [0.1] * 8, {})
+        await vector_store.store_items(self._items(1, "dynamic"))
+        await vector_store.query("test-chapter", "semantic", [0.1] * 8)
+        await vector_store.query("test-chapter", "kinetic", [0.1] * 8)
+        
+        assert mock_index.query.call_count == 3
+        assert vector_store.cache_stats()["hits"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_cached_queries_expire(self, mock_index):
+        """Test cached queries expire after the TTL and respect the size bound."""
+        store = VectorStore(api_key="test-key", query_cache_size=1, query_cache_ttl=0.05)
+        store.index = mock_index
+        store._initialized = True
+        mock_index.query.return_value = MagicMock(matches=[])
+        
+        await store.query("test-chapter", "semantic", [0.1] * 8)
+        await store.query("test-chapter", "semantic", [0.2] * 8)
+        await store.query("test-chapter", "semantic", [0.2] * 8)
+        time.sleep(0.06)
+        await store.query("test-chapter", "semantic", [0.2] * 8)
+        
+        assert mock_index.query.call_count == 3
+        assert len(store.query_cache) == 1
+    
+    @pytest.mark.asyncio
+    async def test_fetch_batches_ids(self, vector_store, mock_index):
+        """Test fetch splits IDs into batches and merges the responses."""
+        def fetch(ids, namespace):
+            vectors = {
+                item_id: MagicMock(values=[0.1] * 8, metadata={"type": "template"})
+                for item_id in ids if item_id != "item-3"
+            }
+            return MagicMock(vectors=vectors)
+        mock_index.fetch.side_effect = fetch
+        
+        items = await vector_store.fetch("test-chapter", "semantic", [f"item-{i}" for i in range(5)], batch_size=2)
+        
+        assert mock_index.fetch.call_count == 3
+        assert sorted(items) == ["item-0", "item-1", "item-2", "item-4"]
+        assert items["item-0"]["metadata"] == {"type": "template"}
+        assert all(
+            call.kwargs["namespace"] == "gdg-test-chapter-semantic"
+            for call in mock_index.fetch.call_args_list
+        )
+    
+    @pytest.mark.asyncio
+    async def test_scan_follows_pagination_tokens(self, vector_store, mock_index):
+        """Test scan lists IDs page by page and fetches each page."""
+        pages = {
+            None: (["item-0", "item-1"], "page-2"),
+            "page-2": (["item-2"], None),
+        }
+        
+        def list_paginated(namespace, limit, pagination_token):
+            ids, next_token = pages[pagination_token]
+            return MagicMock(
+                vectors=[MagicMock(id=item_id) for item_id in ids],
+                pagination=MagicMock(next=next_token) if next_token else None,
+            )
+        mock_index.list_paginated.side_effect = list_paginated
+        mock_index.fetch.side_effect = lambda ids, namespace: MagicMock(vectors={
+            item_id: MagicMock(values=[0.1] * 8, metadata={"type": "template" if item_id != "item-1" else "workflow"})
+            for item_id in ids
+        })
+        
+        items = [item async for item in vector_store.scan("test-chapter", "semantic", filter={"type": "template"}, page_size=2)]
+        
+        assert [item["id"] for item in items] == ["item-0", "item-2"]
+        assert mock_index.fetch.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_scan_lists_by_prefix(self, vector_store, mock_index):
+        """Test a prefix scan has the backend list only matching IDs."""
+        mock_index.list_paginated.return_value = MagicMock(vectors=[MagicMock(id="ep_s1_1")], pagination=None)
+        mock_index.fetch.return_value = MagicMock(vectors={"ep_s1_1": MagicMock(values=[0.1] * 8, metadata={})})
+        
+        items = [item async for item in vector_store.scan("test-chapter", "memory_episodic", prefix="ep_s1_")]
+        
+        assert [item["id"] for item in items] == ["ep_s1_1"]
+        assert mock_index.list_paginated.call_args.kwargs["prefix"] == "ep_s1_"
+    
+    @pytest.mark.asyncio
+    async def test_delete_batches_and_rate_limits(self, vector_store, mock_index):
+        """Test deletes are chunked, paced and invalidate cached queries."""
+        mock_index.query.return_value = MagicMock(matches=[])
+        await vector_store.query("test-chapter", "semantic", [0.1] * 8)
+        
+        start = time.perf_counter()
+        count = await vector_store.delete(
+            "test-chapter", "semantic", [f"item-{i}" for i in range(5)],
+            batch_size=2, max_requests_per_second=20,
+        )
+        elapsed = time.perf_counter() - start
+        await vector_store.query("test-chapter", "semantic", [0.1] * 8)
+        
+        assert count == 5
+        assert [len(call.kwargs["ids"]) for call in mock_index.delete.call_args_list] == [2, 2, 1]
+        # Three requests at 20/s need at least two 50ms gaps
+        assert elapsed >= 0.09
+        assert mock_index.query.call_count == 2
+    
+    @pytest.fixture
+    def pinecone_client(self):
+        """Fixture for a mocked Pinecone client class with one index."""
+        client = MagicMock()
+        client.list_indexes.return_value = [MagicMock()]
+        client.list_indexes.return_value[0].name = "test-index"
+        client.Index.return_value.query.return_value = MagicMock(matches=[])
+        module = MagicMock(Pinecone=MagicMock(return_value=client))
+        _index_registry.clear()
+        with patch.dict(sys.modules, {"pinecone": module}):
+            yield client
+        _index_registry.clear()
+    
+    @pytest.mark.asyncio
+    async def test_connection_is_lazy_and_shared(self, pinecone_client):
+        """Test stores connect on first use and share one checked handle."""
+        first = VectorStore(api_key="test-key", index_name="test-index")
+        second = VectorStore(api_key="test-key", index_name="test-index")
+        first.initialize()
+        second.initialize()
+        
+        assert pinecone_client.list_indexes.call_count == 0
+        
+        await first.query("test-chapter", "semantic", [0.1] * 8)
+        await second.query("test-chapter", "semantic", [0.1] * 8)
+        
+        assert pinecone_client.list_indexes.call_count == 1
+        assert pinecone_client.Index.call_count == 1
+        assert first.index is second.index
+    
+    def test_index_check_expires_and_rejects_missing_index(self, pinecone_client):
+        """Test the existence check is repeated after its TTL."""
+        VectorStore(api_key="test-key", index_name="test-index", index_check_ttl=0).connect()
+        VectorStore(api_key="test-key", index_name="test-index", index_check_ttl=0).connect()
+        
+        assert pinecone_client.list_indexes.call_count == 2
+        with pytest.raises(ValueError):
+            VectorStore(api_key="test-key", index_name="missing-index").connect()